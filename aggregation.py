@@ -0,0 +1,27 @@
+class Metric:
+    """ Aggregate function over an attribute (or all objects) of a class, compiled to SQL by ObjectInterface.aggregate """
+    def __init__(self, function: str, attribute_name: str = None, distinct: bool = False, transformed: bool = True) -> None:
+        self.function = function
+        self.attribute_name = attribute_name
+        self.distinct = distinct
+        self.transformed = transformed
+
+    def get_sql(self) -> str:
+        """ Returns the sql expression of the metric """
+        return f"{self.function}({'DISTINCT ' if self.distinct else ''}{self.attribute_name if self.attribute_name else '*'})"
+
+def count(attribute_name: str = None, distinct: bool = False) -> Metric:
+    """ Number of objects or of non-null (optionally distinct) values of an attribute """
+    return Metric('COUNT', attribute_name, distinct, transformed=False)
+
+def sum_(attribute_name: str) -> Metric:
+    return Metric('SUM', attribute_name)
+
+def avg(attribute_name: str) -> Metric:
+    return Metric('AVG', attribute_name)
+
+def min_(attribute_name: str) -> Metric:
+    return Metric('MIN', attribute_name)
+
+def max_(attribute_name: str) -> Metric:
+    return Metric('MAX', attribute_name)
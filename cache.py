@@ -0,0 +1,112 @@
+from collections import OrderedDict, namedtuple
+
+CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize', 'currsize'])
+
+class HopCache:
+    """ LRU cache of hop results keyed by reference, origin and version. All targets are cached regardless of their status, the status is filtered when reading.
+    Entries are dropped when the origin is bound or a target is modified in this process, and entirely when another connection commits (data_version).
+    The invalidations are also stamped, so that targets kept elsewhere (prefetched) can be validated. """
+    def __init__(self, max_size: int) -> None:
+        self.max_size = max_size
+        self.entries = OrderedDict()
+        self.versions = {}
+        self.keys_by_target = {}
+        self.data_version = None
+        self.hits = 0
+        self.misses = 0
+
+        # Logical clock of the invalidations, used to validate prefetched targets
+        self.clock = 0
+        self.cleared = 0
+        self.changed_origins = {}
+        self.changed_targets = {}
+
+    def check(self, data_version: int):
+        """ Clears the cache if the database was changed by another connection since the last check """
+        if data_version != self.data_version:
+            self.clear()
+            self.data_version = data_version
+
+    def get(self, reference_id: int, origin_id: int) -> tuple:
+        """ Returns the cached targets of the current version of the binding of an origin (None if not cached) """
+        version = self.versions.get((reference_id, origin_id))
+        if version is None:
+            self.misses += 1
+            return None
+        key = (reference_id, origin_id, version)
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return self.entries[key]
+
+    def put(self, reference_id: int, origin_id: int, version: int, targets: list):
+        key = (reference_id, origin_id, version)
+        previous_version = self.versions.get((reference_id, origin_id))
+        if previous_version is not None:
+            self.__remove__((reference_id, origin_id, previous_version))
+        self.entries[key] = tuple(targets)
+        self.versions[(reference_id, origin_id)] = version
+        for target in targets:
+            self.keys_by_target.setdefault(target.id, set()).add(key)
+        while len(self.entries) > self.max_size:
+            self.__remove__(next(iter(self.entries)))
+
+    def invalidate_origin(self, reference_id: int, origin_id: int):
+        """ Drops the cached targets of an origin (e.g. after a binding) """
+        version = self.versions.get((reference_id, origin_id))
+        if version is not None:
+            self.__remove__((reference_id, origin_id, version))
+        self.changed_origins[(reference_id, origin_id)] = self.__tick__()
+
+    def invalidate_targets(self, ids: list):
+        """ Drops all cached hops containing one of the given objects (e.g. after a modification or status change) """
+        for id in ids:
+            for key in list(self.keys_by_target.get(id, ())):
+                self.__remove__(key)
+            self.changed_targets[id] = self.__tick__()
+
+    def get_stamp(self) -> int:
+        """ Returns the stamp of targets read now, see is_valid """
+        return self.clock
+
+    def is_valid(self, reference_id: int, origin_id: int, targets: tuple, stamp: int) -> bool:
+        """ Returns whether targets read at the given stamp (e.g. prefetched) are still current: neither the binding nor one of the targets was invalidated since """
+        return self.cleared <= stamp and self.changed_origins.get((reference_id, origin_id), 0) <= stamp and all(self.changed_targets.get(target.id, 0) <= stamp for target in targets)
+
+    def expire_stamps(self):
+        """ Invalidates the stamps handed out so far (e.g. of targets read before a rollback), the cached hops of committed versions stay """
+        self.cleared = self.__tick__()
+
+    def clear(self):
+        self.entries.clear()
+        self.versions.clear()
+        self.keys_by_target.clear()
+        self.changed_origins.clear()
+        self.changed_targets.clear()
+        self.cleared = self.__tick__()
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self.hits, self.misses, self.max_size, len(self.entries))
+
+    def __tick__(self) -> int:
+        """ Advances the clock, the recorded changes are limited to the cache size (exceeding it invalidates everything) """
+        if len(self.changed_origins) + len(self.changed_targets) > self.max_size:
+            self.changed_origins.clear()
+            self.changed_targets.clear()
+            self.clock += 1
+            self.cleared = self.clock
+        self.clock += 1
+        return self.clock
+
+    def __remove__(self, key: tuple):
+        targets = self.entries.pop(key, None)
+        if targets is None:
+            return
+        reference_id, origin_id, version = key
+        if self.versions.get((reference_id, origin_id)) == version:
+            del self.versions[(reference_id, origin_id)]
+        for target in targets:
+            keys = self.keys_by_target.get(target.id)
+            if keys is not None:
+                keys.discard(key)
+                if len(keys) == 0:
+                    del self.keys_by_target[target.id]
@@ -3,4 +3,40 @@ VERSION = '0.1'
 STATUS_IN_CREATION = 0
 STATUS_ACTIVE = 1
 STATUS_INACTIVE = 2
-STATUS_DELETED = 3
\ No newline at end of file
+STATUS_DELETED = 3
+
+# Kinds of changes in the change feed
+CHANGE_CREATE = 'create'
+CHANGE_MODIFY = 'modify'
+CHANGE_STATUS = 'status'
+CHANGE_BIND = 'bind'
+CHANGE_PURGE = 'purge'
+
+# Maximum number of ids bound to a single IN (...) statement
+BULK_CHUNK_SIZE = 500
+
+# Size of the prepared statement cache of a connection (per class and reference of the structure)
+STATEMENT_CACHE_MIN_SIZE = 128
+STATEMENT_CACHE_BASE_SIZE = 64
+STATEMENT_CACHE_PER_CLASS = 16
+STATEMENT_CACHE_PER_REFERENCE = 8
+
+# Number of objects read at once by lazy object lists
+OBJECT_LIST_PAGE_SIZE = 500
+
+# Maximum number of hop results cached per interface
+HOP_CACHE_SIZE = 10000
+
+# Group commit of the writer service: maximum operations per transaction and maximum wait for further operations (seconds)
+WRITER_MAX_BATCH_SIZE = 1000
+WRITER_MAX_DELAY = 0.005
+
+# Retry of writer batches failing with an operational error (e.g. a locked database): total timeout and wait between the attempts (seconds)
+WRITER_RETRY_TIMEOUT = 30.0
+WRITER_RETRY_DELAY = 0.05
+
+# Number of rows read and written at once by exports
+EXPORT_CHUNK_SIZE = 5000
+
+# Maximum number of rows buffered by parquet exports to infer column types
+EXPORT_SCHEMA_ROWS = 50000
@@ -1,10 +1,22 @@
 from datetime import datetime
-from utils import remove_duplicates
+from utils import remove_duplicates, get_data_table_name, get_reference_table_name, get_search_table_name, get_view_name, get_in_condition, instance_cache
 import pandas as pd
-from functools import cache
-from constant import STATUS_ACTIVE
+from array import array
+from constant import STATUS_ACTIVE, OBJECT_LIST_PAGE_SIZE
+from programmability.native import get_native_codec
+
+class ConflictError(ValueError):
+    """ Konflikt beim Schreiben: Das Objekt oder die Bindung wurde seit dem Lesen von einer anderen Verbindung geändert """
+    def __init__(self, message: str, ids: list) -> None:
+        super().__init__(message)
+        self.ids = ids
+
+    def __reduce__(self):
+        return (self.__class__, (self.args[0], self.ids))
 
 class ObjectInterfaceControl:
+    __slots__ = ('interface', '__weakref__')
+
     def __init__(self, interface) -> None:
         self.interface = interface
 
@@ -12,13 +24,17 @@ class ObjectInterfaceControl:
         pass
 
 class Datatype(ObjectInterfaceControl):
-    def __init__(self, interface, id: int, name: str, read_transformer_source: str, write_transformer_source: str, generator: str, parent_id: int) -> None:
+    def __init__(self, interface, id: int, name: str, read_transformer_source: str, write_transformer_source: str, generator: str, parent_id: int, native: str = None) -> None:
         super().__init__(interface)
         self.id = id
         self.name = name
         self.__generator__ = generator
         self.parent_id = parent_id
 
+        # Native Umwandlung (ohne Execution Handler)
+        self.native = native
+        self.__native_codec__ = get_native_codec(native) if native else None
+
         # Transformfunktionen
         self.read_transformer_source = read_transformer_source
         self.__transform_read_value__ = interface.execution_handler.generate_transformer(read_transformer_source, parameters=['value'])
@@ -29,25 +45,38 @@ class Datatype(ObjectInterfaceControl):
 
     def get_generator(self):
         """ Gibt den Generator des Datentyps zurück """
-        if self.is_root():
+        if self.__native_codec__:
+            return self.__native_codec__.generator
+        elif self.is_root():
             return self.__generator__
         else:
             return self.get_parent().get_generator()
 
+    def get_native(self):
+        """ Gibt den nativen Datentyp des Ursprungstyps zurück """
+        if self.is_root():
+            return self.native
+        else:
+            return self.get_parent().get_native()
+
     def is_root(self):
         """ Gibt zurück, ob der Datentyp ein Ursprungstyp ist (keine Vorfahren hat) """
         return self.parent_id is None
 
     def transform_read_value(self, value):
         """ Transformiert den gegebenen Wert mithilfe der Lesen-Umwandlungsfunktion des Datentyps """
-        if self.is_root():
+        if self.__native_codec__:
+            return self.__transform_read_value__(self.__native_codec__.read(value))
+        elif self.is_root():
             return self.__transform_read_value__(value)
         else:
             return self.__transform_read_value__(self.get_parent().transform_read_value(value))
         
     def transform_write_value(self, value):
         """ Transformiert den gegebenen Wert mithilfe der Schreiben-Umwandlungsfunktion des Datentyps"""
-        if self.is_root():
+        if self.__native_codec__:
+            return self.__native_codec__.write(self.__transform_write_value__(value))
+        elif self.is_root():
             return self.__transform_write_value__(value)
         else:
             return self.get_parent().transform_write_value(self.__transform_write_value__(value))
@@ -61,12 +90,13 @@ class Datatype(ObjectInterfaceControl):
 
 
 class Class(ObjectInterfaceControl):
-    def __init__(self, interface, id: int, name: str, traced: bool, parent_id: int) -> None:
+    def __init__(self, interface, id: int, name: str, traced: bool, parent_id: int, single_table: bool = False) -> None:
         super().__init__(interface)
         self.id = id
         self.name = name
         self.traced = traced
         self.parent_id = parent_id
+        self.single_table = single_table
         self.interface.register_control(self)
 
     def clear_cache(self):
@@ -75,6 +105,15 @@ class Class(ObjectInterfaceControl):
         self.get_children.cache_clear()
         self.get_attribute_assignments.cache_clear()
         self.get_attribute_assignment.cache_clear()
+        self.get_attribute_names.cache_clear()
+        self.get_attribute_layout.cache_clear()
+        self.get_dependent_attribute_names.cache_clear()
+        self.get_storage_layout.cache_clear()
+        self.get_table_statements.cache_clear()
+        self.get_adopt_sql.cache_clear()
+        self.get_view_sql.cache_clear()
+        self.get_search_insert_sql.cache_clear()
+        self.get_search_delete_sql.cache_clear()
 
     def get_parent(self):
         """ Gibt Klassenobjekt der Parent-Klasse zurück """
@@ -83,17 +122,15 @@ class Class(ObjectInterfaceControl):
         else:
             return None
 
-    @cache
+    @instance_cache
     def get_family_tree(self) -> list:
         """ Gibt den Stammbaum der Klasse (alle übergeordneten Klassen und sich selbst) zurück """
         if self.is_root():
           return [self]
         else:
-          family_tree = self.get_parent().get_family_tree()
-          family_tree.append(self)
-          return family_tree
+          return [*self.get_parent().get_family_tree(), self]
     
-    @cache
+    @instance_cache
     def get_children(self, recursive: bool = False) -> list:
         """ Gibt die untergeordneten Klassen zurück """
         if recursive:
@@ -105,7 +142,7 @@ class Class(ObjectInterfaceControl):
         else:
             return self.interface.get_child_classes(self)
         
-    @cache
+    @instance_cache
     def get_attribute_assignments(self, recursive: bool = False):
         """ Gibt die Attributzuweisungen der Klasse zurück """
         if recursive:
@@ -130,11 +167,106 @@ class Class(ObjectInterfaceControl):
         else:
             return self.interface.get_references(self, by_target_class)
 
+    @instance_cache
+    def get_attribute_names(self, include_deferred: bool = True) -> list:
+        """ Gibt die Namen aller bei der Klasse erlaubten Attribute zurück, optional ohne die verzögert geladenen """
+        return [aa.get_attribute().name for aa in self.get_attribute_assignments(True) if include_deferred or not aa.deferred]
+
+    @instance_cache
+    def get_attribute_layout(self) -> dict:
+        """ Gibt die von allen Objekten der Klasse geteilte Spaltenanordnung (Attributname => Position) zurück """
+        return {name: position for position, name in enumerate(self.get_attribute_names())}
+
+    @instance_cache
+    def get_dependent_attribute_names(self) -> frozenset:
+        """ Gibt die Namen der Attribute zurück, deren Lesetransformation vom Objekt (und damit von anderen Attributen) abhängt """
+        return frozenset(aa.get_attribute().name for aa in self.get_attribute_assignments(True) if aa.read_transformer_source)
+
+    def get_loaded_attribute_names(self, deferred: list = None) -> list:
+        """ Gibt die Namen der beim Lesen eines Objekts direkt geladenen Attribute zurück (ohne verzögerte und die gegebenen) """
+        attribute_names = self.get_attribute_names(False)
+        if deferred:
+            return [name for name in attribute_names if name not in deferred]
+        else:
+            return attribute_names
+
+    def get_storage_class(self):
+        """ Gibt die Klasse zurück, in deren Tabelle die eigenen Attribute gespeichert werden (Ursprungsklasse bei Speicherung in einer Tabelle) """
+        root = self.get_family_tree()[0]
+        return root if root.single_table else self
+
+    def get_table_name(self) -> str:
+        """ Gibt den Namen der Datentabelle mit den eigenen Attributen zurück """
+        return get_data_table_name(self.get_storage_class().name)
+
+    def get_view_name(self) -> str:
+        """ Gibt den Namen der persistierten Sicht der Klasse zurück """
+        return get_view_name(self.name)
+
+    @instance_cache
+    def get_storage_layout(self) -> list:
+        """ Gibt die Datentabellen des Stammbaums mit den jeweils darin gespeicherten Attributnamen zurück: [(Tabelle, [Attribute])] """
+        layout = {}
+        for class_ in self.get_family_tree():
+            layout.setdefault(class_.get_table_name(), []).extend(a.name for a in class_.get_assigned_attributes())
+        return list(layout.items())
+
+    @instance_cache
+    def get_table_statements(self) -> list:
+        """ Gibt je Datentabelle des Stammbaums die vorbereiteten Statements mit fester Spaltenreihenfolge zurück: [(Tabelle, [Attribute], {Name: SQL})] """
+        table_statements = []
+        for table_name, attribute_names in self.get_storage_layout():
+            str_cols = ''.join(f', {name}' for name in attribute_names)
+            str_placeholders = ', ?' * len(attribute_names)
+            table_statements.append((table_name, attribute_names, {
+                'insert_version': f"INSERT INTO {table_name} (id, version, created{str_cols}) VALUES (?, ?, ?{str_placeholders})",
+                'delete_previous': f"DELETE FROM {table_name} WHERE id = ? AND version <= ?",
+                'update_version': f"UPDATE {table_name} SET version = ? WHERE id = ? AND version = ?",
+                'version_times': f"SELECT version, created FROM {table_name} WHERE id = ?"
+            }))
+        return table_statements
+
+    @instance_cache
+    def get_adopt_sql(self, table_name: str, count: int) -> str:
+        """ Gibt das Statement zurück, das die Werte der vorherigen Version einer Datentabelle für die gegebene Anzahl Objekte liest (die neue Version ist in data_meta bereits beansprucht) """
+        attribute_names = dict(self.get_storage_layout())[table_name]
+        str_cols = ''.join(f', {table_name}.{name}' for name in attribute_names)
+        return f"SELECT {table_name}.id AS __object_id__{str_cols} FROM {table_name} JOIN data_meta ON data_meta.id = {table_name}.id AND data_meta.current_version - 1 = {table_name}.version WHERE {table_name}.id {get_in_condition(count)}"
+
+    @instance_cache
+    def get_view_sql(self, attribute_names: tuple = None, recursive: bool = False, count: int = None) -> str:
+        """ Gibt das Statement zurück, das die aktuellen Attributwerte (alle oder die gegebenen) der Instanzen liest, optional für die gegebene Anzahl Objekte """
+        sql = self.interface.__get_class_view_sql__(self, list(attribute_names) if attribute_names is not None else None, recursive)
+        return f'{sql} AND __object_id__ {get_in_condition(count)}' if count is not None else sql
+
+    @instance_cache
+    def get_search_insert_sql(self, search_class, count: int = None) -> str:
+        """ Gibt das Statement zurück, das die aktuellen Werte der Instanzen (alle oder die gegebene Anzahl) in den Volltextindex der gegebenen Klasse des Stammbaums schreibt """
+        search_attribute_names = search_class.get_search_attribute_names()
+        columns = tuple(name for name in self.get_attribute_names() if name in search_attribute_names)
+        return f"INSERT INTO {get_search_table_name(search_class.name)} (rowid{''.join(f', {name}' for name in columns)}) {self.get_view_sql(columns, False, count)}"
+
+    @instance_cache
+    def get_search_delete_sql(self) -> str:
+        """ Gibt das Statement zurück, das ein Objekt aus dem Volltextindex der Klasse löscht """
+        return f"DELETE FROM {get_search_table_name(self.name)} WHERE rowid = ?"
+
+    def get_search_attribute_names(self) -> list:
+        """ Gibt die Namen der Attribute im Volltextindex der Klasse zurück """
+        return self.interface.get_search_attribute_names(self)
+
+    def get_search_class(self):
+        """ Gibt die nächste Klasse im Stammbaum mit Volltextindex zurück """
+        for class_ in reversed(self.get_family_tree()):
+            if len(class_.get_search_attribute_names()) > 0:
+                return class_
+        return None
+
     def is_root(self):
         """ Gibt zurück, ob die Klasse eine Ursprungsklasse ist (keine Vorfahren hat) """
         return self.parent_id is None
 
-    @cache
+    @instance_cache
     def get_attribute_assignment(self, attribute_name: str):
         """ Gibt die Attributzuweisung aller bei der Klasse erlaubten Attribute anhand des gegeben Attributnamens zurück """
         for aa in self.get_attribute_assignments(True):
@@ -156,11 +288,12 @@ class Attribute(ObjectInterfaceControl):
 
 
 class AttributeAssignment(ObjectInterfaceControl):
-    def __init__(self, interface, class_id: str, attribute_id: str, indexed: bool, read_transformer_source: str, write_transformer_source: str):
+    def __init__(self, interface, class_id: str, attribute_id: str, indexed: bool, read_transformer_source: str, write_transformer_source: str, deferred: bool = False):
         super().__init__(interface)
         self.class_id = class_id
         self.attribute_id = attribute_id
         self.indexed = indexed
+        self.deferred = deferred
         self.interface.register_control(self)
 
         # Eigene Transformfunktionen
@@ -196,6 +329,46 @@ class Reference(ObjectInterfaceControl):
         self.cardinality = cardinality
         self.interface.register_control(self)
 
+    def clear_cache(self):
+        super().clear_cache()
+        self.get_statements.cache_clear()
+        self.get_hop_ids_sql.cache_clear()
+        self.get_current_versions_sql.cache_clear()
+        self.get_bound_count_sql.cache_clear()
+
+    @instance_cache
+    def get_statements(self) -> dict:
+        """ Gibt die vorbereiteten Statements der Referenz zurück (Versionen, Sprung und Bindung) """
+        table_name = get_reference_table_name(self.name)
+        return {
+            'current_version': "SELECT current_version FROM structure_reference_version WHERE reference_id = ? AND origin_object_id = ?",
+            'insert_version': "INSERT OR IGNORE INTO structure_reference_version (reference_id, origin_object_id) VALUES (?, ?)",
+            'set_version': "UPDATE structure_reference_version SET current_version = ? WHERE reference_id = ? AND origin_object_id = ? AND current_version = ?",
+            'hop': f"SELECT target_id FROM {table_name} WHERE origin_id = ? AND version = ?",
+            'copy_bound': f"INSERT INTO {table_name} (origin_id, target_id, version) SELECT origin_id, target_id, ? FROM {table_name} WHERE origin_id = ? AND version = ? RETURNING target_id",
+            'insert_targets': f"INSERT INTO {table_name} (origin_id, target_id, version) VALUES (?, ?, ?)",
+            'delete_previous': f"DELETE FROM {table_name} WHERE origin_id = ? AND version <= ?",
+            'count_bound': f"SELECT COUNT(*) AS n FROM structure_reference_version JOIN {table_name} ON {table_name}.origin_id = structure_reference_version.origin_object_id AND {table_name}.version = structure_reference_version.current_version JOIN data_meta ON data_meta.id = {table_name}.target_id WHERE structure_reference_version.reference_id = ? AND structure_reference_version.origin_object_id = ? AND data_meta.status = {STATUS_ACTIVE}"
+        }
+
+    @instance_cache
+    def get_current_versions_sql(self, count: int) -> str:
+        """ Gibt das Statement zurück, das die aktuellen Versionen der Bindungen der gegebenen Anzahl Ursprungsobjekte liest """
+        return f"SELECT origin_object_id, current_version FROM structure_reference_version WHERE reference_id = {self.id} AND origin_object_id {get_in_condition(count)}"
+
+    @instance_cache
+    def get_bound_count_sql(self, count: int) -> str:
+        """ Gibt das Statement zurück, das die aktuell gebundenen aktiven Ziele der gegebenen Anzahl Ursprungsobjekte zählt """
+        table_name = get_reference_table_name(self.name)
+        return f"SELECT {table_name}.origin_id, COUNT(*) AS n FROM structure_reference_version JOIN {table_name} ON {table_name}.origin_id = structure_reference_version.origin_object_id AND {table_name}.version = structure_reference_version.current_version JOIN data_meta ON data_meta.id = {table_name}.target_id WHERE structure_reference_version.reference_id = {self.id} AND structure_reference_version.origin_object_id {get_in_condition(count)} AND data_meta.status = {STATUS_ACTIVE} GROUP BY {table_name}.origin_id"
+
+    @instance_cache
+    def get_hop_ids_sql(self, count: int, only_active_objects: bool = True) -> str:
+        """ Gibt das Statement zurück, das die aktuell gebundenen Ziel-Ids der gegebenen Anzahl Ursprungsobjekte liest """
+        table_name = get_reference_table_name(self.name)
+        str_status = f' AND data_meta.status = {STATUS_ACTIVE}' if only_active_objects else ''
+        return f"SELECT {table_name}.origin_id, {table_name}.target_id FROM structure_reference_version JOIN {table_name} ON {table_name}.origin_id = structure_reference_version.origin_object_id AND {table_name}.version = structure_reference_version.current_version JOIN data_meta ON data_meta.id = {table_name}.target_id WHERE structure_reference_version.reference_id = {self.id} AND structure_reference_version.origin_object_id {get_in_condition(count)}{str_status}"
+
     def get_origin_class(self):
         """ Gibt Klassenobjekt der Ursprungsklasse zurück """
         return self.interface.get_class(self.origin_class_id)
@@ -204,7 +377,12 @@ class Reference(ObjectInterfaceControl):
         """ Gibt Klassenobjekt der Zielklasse zurück """
         return self.interface.get_class(self.target_class_id)
 
+# Platzhalter für nicht geladene (verzögerte) Attribute
+NOT_LOADED = object()
+
 class Object(ObjectInterfaceControl):
+    __slots__ = ('id', 'class_', 'status', 'created', 'version', 'current_version', '__layout__', '__values__', '__decoded__', '__unprocessed__', '__prefetched__', '__cache_epoch__')
+
     def __init__(self, interface, id: str, class_: Class, status: int, created: datetime, version: int, current_version: int, **raw_attributes):
         super().__init__(interface)
         self.id = id
@@ -213,23 +391,69 @@ class Object(ObjectInterfaceControl):
         self.created = created
         self.version = version
         self.current_version = current_version
-        self.raw_attributes = raw_attributes
-        self.interface.register_control(self)
+        self.__layout__ = class_.get_attribute_layout()
+        self.__values__ = tuple(raw_attributes.get(name, NOT_LOADED) for name in self.__layout__)
+        self.__decoded__ = None
+        self.__unprocessed__ = None
+        self.__prefetched__ = None
+
+        # Objekte werden nicht registriert, ihre Zwischenspeicher verfallen beim nächsten Zugriff nach dem Leeren der Caches der Schnittstelle
+        self.__cache_epoch__ = interface.object_cache_epoch
 
     def __getitem__(self, key: str):
         return self.get_value(key)
 
+    @property
+    def raw_attributes(self) -> dict:
+        """ Gibt die geladenen Datenbankwerte als Dict zurück """
+        return {name: self.__values__[position] for name, position in self.__layout__.items() if self.__values__[position] is not NOT_LOADED}
+
     def get_class(self) -> Class:
         """ Gibt die Klasse des Objekts zurück """
         return self.class_
     
     def get_attribute_names(self) -> list:
-        return self.raw_attributes.keys()
+        return self.class_.get_attribute_names()
+
+    def is_loaded(self, attribute_name: str) -> bool:
+        """ Gibt zurück, ob der Datenbankwert eines Attributs bereits geladen ist """
+        position = self.__layout__.get(attribute_name)
+        return position is not None and self.__values__[position] is not NOT_LOADED
+
+    def load(self, attribute_name: str):
+        """ Lädt den Datenbankwert eines (verzögerten) Attributs nach, falls noch nicht geschehen """
+        if not self.is_loaded(attribute_name):
+            if self.class_.get_attribute_assignment(attribute_name) is None:
+                raise KeyError(f'Invalid attribute {attribute_name}')
+            self.interface.load_attributes([self], [attribute_name])
     
     def clear_cache(self):
         super().clear_cache()
-        self.get_value.cache_clear()
-        self.get_unprocessed_value.cache_clear()
+        self.__decoded__ = None
+        self.__unprocessed__ = None
+        self.__prefetched__ = None
+        self.__cache_epoch__ = self.interface.object_cache_epoch
+
+    def __check_cache__(self):
+        """ Verwirft die Zwischenspeicher, falls die Caches der Schnittstelle seit dem Befüllen geleert wurden """
+        if self.__cache_epoch__ != self.interface.object_cache_epoch:
+            self.clear_cache()
+
+    def set_prefetched(self, reference_id: int, objects: list, stamp: int):
+        """ Hinterlegt die vorab geladenen, aktuell über die Referenz verbundenen Objekte (unabhängig vom Status) mit dem Stempel des Hop-Caches beim Lesen """
+        self.__check_cache__()
+        if self.__prefetched__ is None:
+            self.__prefetched__ = {}
+        self.__prefetched__[reference_id] = (tuple(objects), stamp)
+
+    def get_prefetched(self, reference_id: int) -> tuple:
+        """ Gibt die vorab geladenen Objekte der Referenz und ihren Stempel zurück (None, falls nicht vorab geladen) """
+        self.__check_cache__()
+        return self.__prefetched__.get(reference_id) if self.__prefetched__ is not None else None
+
+    def clear_prefetched(self, reference_id: int):
+        if self.__prefetched__ is not None:
+            self.__prefetched__.pop(reference_id, None)
 
     def is_active(self):
         """ Gibt zurück, ob das Objekt aktiv ist """
@@ -251,8 +475,8 @@ class Object(ObjectInterfaceControl):
         """ Aktualisiert die übergebenen Attribute """
         self.interface.modify(self, **attributes)
 
-    def bind(self, reference: Reference | int | str, targets: list, rebind: bool = False):
-        self.interface.bind(reference, self, targets, rebind)
+    def bind(self, reference: Reference | int | str, targets: list, rebind: bool = False, version: int = None):
+        self.interface.bind(reference, self, targets, rebind, version)
 
     def hop(self, reference: Reference | int | str, version: int = None):
         return self.interface.hop(reference, self, version)
@@ -270,50 +494,68 @@ class Object(ObjectInterfaceControl):
         return f"{self.class_.name} {self.id} ({['In creation', 'Active', 'Inactive', 'Deleted'][self.status]}):\n  {str_attributes}"
     
     def update_raw_attributes(self, **raw_attributes):
-        self.raw_attributes.update(raw_attributes)
+        # Spaltenanordnung übernehmen, falls sich die Klasse seit dem Laden geändert hat
+        if any(name not in self.__layout__ for name in raw_attributes):
+            raw_attributes = self.raw_attributes | raw_attributes
+            self.__layout__ = self.class_.get_attribute_layout()
+            self.__values__ = tuple(NOT_LOADED for _ in self.__layout__)
+        values = list(self.__values__)
+        for name, value in raw_attributes.items():
+            if name in self.__layout__:
+                values[self.__layout__[name]] = value
+        self.__values__ = tuple(values)
+
+        # Zwischengespeicherte Werte der geänderten und der vom Objekt abhängigen Attribute verwerfen
+        if self.__unprocessed__:
+            for name in raw_attributes:
+                self.__unprocessed__.pop(name, None)
+        if self.__decoded__:
+            for name in self.class_.get_dependent_attribute_names().union(raw_attributes):
+                self.__decoded__.pop(name, None)
 
-        # Would be more efficient but does not work with the cache decorator
-        #for key in raw_attributes.keys():
-        #    self.get_value.cache_parameters().pop(key, None)
-        #    self.get_unprocessed_value.cache_parameters().pop(key, None)
-        
-        # Workaround
-        self.get_value.cache_clear()
-        self.get_unprocessed_value.cache_clear()
-    
-    @cache
     def get_value(self, attribute_name: str):
         """ Gibt den transformierten Wert eines Attributs zurück """
-        if attribute_name in self.raw_attributes.keys():
-            assignment = self.class_.get_attribute_assignment(attribute_name)
-            return assignment.transform_read_value(self.get_unprocessed_value(attribute_name), self)
-        else:
-            raise KeyError(f'Invalid attribute {attribute_name}')
-    
-    @cache
+        self.__check_cache__()
+        if self.__decoded__ is not None and attribute_name in self.__decoded__:
+            return self.__decoded__[attribute_name]
+        self.load(attribute_name)
+        assignment = self.class_.get_attribute_assignment(attribute_name)
+        value = assignment.transform_read_value(self.get_unprocessed_value(attribute_name), self)
+        if self.__decoded__ is None:
+            self.__decoded__ = {}
+        self.__decoded__[attribute_name] = value
+        return value
+
     def get_unprocessed_value(self, attribute_name: str):
         """ Gibt den nicht-transformierten Wert eines Attributs zurück """
-        if attribute_name in self.raw_attributes.keys():
-            assignment = self.class_.get_attribute_assignment(attribute_name)
-            return assignment.datatype_transform_read_value(self.raw_attributes[attribute_name])
-        else:
-            raise KeyError(f'Invalid attribute {attribute_name}')
-        
+        self.__check_cache__()
+        if self.__unprocessed__ is not None and attribute_name in self.__unprocessed__:
+            return self.__unprocessed__[attribute_name]
+        self.load(attribute_name)
+        assignment = self.class_.get_attribute_assignment(attribute_name)
+        value = assignment.datatype_transform_read_value(self.__values__[self.__layout__[attribute_name]])
+        if self.__unprocessed__ is None:
+            self.__unprocessed__ = {}
+        self.__unprocessed__[attribute_name] = value
+        return value
+
     def get_raw_value(self, attribute_name: str):
         """ Gibt den Datenbankwert eines Attributs zurück """
-        if attribute_name in self.raw_attributes.keys():
-            return self.raw_attributes[attribute_name]
-        else:
-            raise KeyError(f'Invalid attribute {attribute_name}')
-        
+        self.load(attribute_name)
+        return self.__values__[self.__layout__[attribute_name]]
+
     def get_version_times(self) -> dict:
         """ Gibt die Erstellungszeit der Versionen des Objektes als Dict zurück """
         return self.interface.get_version_times(self) 
+
+    def read_array(self, attribute_name: str, start: int = None, stop: int = None):
+        """ Liest einen Ausschnitt eines Array-Attributs direkt aus der Datenbank """
+        return self.interface.read_array(self, attribute_name, start, stop)
         
 class ObjectList(ObjectInterfaceControl):
-    def __init__(self, interface, objects: list = []):
+    def __init__(self, interface, objects: list = None):
         super().__init__(interface)
-        self.objects = objects
+        self.objects = objects if objects is not None else []
         self.interface.register_control(self)
 
     def __len__(self):
@@ -325,6 +567,22 @@ class ObjectList(ObjectInterfaceControl):
     def __getitem__(self, index: int):
         return self.objects[index]
 
+    def __setitem__(self, index: int | slice, objects):
+        self.objects[index] = objects
+        self.get_dataframe.cache_clear()
+
+    def __delitem__(self, index: int | slice):
+        del self.objects[index]
+        self.get_dataframe.cache_clear()
+
+    def clear_cache(self):
+        super().clear_cache()
+        self.get_dataframe.cache_clear()
+
+    def get_ids(self) -> list:
+        """ Gibt die Ids der enthaltenen Objekte zurück """
+        return [obj.id for obj in self.objects]
+
     def append(self, object_: Object):
         self.objects.append(object_)
         self.get_dataframe.cache_clear()
@@ -333,28 +591,189 @@ class ObjectList(ObjectInterfaceControl):
         self.objects.extend(objects)
         self.get_dataframe.cache_clear()
 
+    def insert(self, index: int, object_: Object):
+        self.objects.insert(index, object_)
+        self.get_dataframe.cache_clear()
+
+    def remove(self, object_: Object):
+        """ Entfernt das erste Objekt mit der Id des gegebenen Objekts """
+        del self[self.get_ids().index(object_.id)]
+
+    def pop(self, index: int = -1) -> Object:
+        object_ = self.objects.pop(index)
+        self.get_dataframe.cache_clear()
+        return object_
+
     def clear(self):
         self.objects.clear()
         self.get_dataframe.cache_clear()
 
-    @cache
+    def load_attributes(self, attribute_names: list = None):
+        """ Lädt die gegebenen oder alle noch nicht geladenen (verzögerten) Attribute der enthaltenen Objekte gesammelt nach """
+        self.interface.load_attributes(self.objects, attribute_names)
+
+    @instance_cache
     def get_dataframe(self) -> pd.DataFrame:
         """ Wandelt die enthaltenden Objekte mit den gegebenen oder allen Attributen in ein Dataframe um """
         if len(self) > 0:
-            data = [{'id': obj.id} | {key: obj[key] for key in obj.get_attribute_names()} for obj in self]
-            return pd.DataFrame.from_dict(data).set_index('id')
+            self.load_attributes()
+            return self.__create_dataframe__(self)
         else:
             return pd.DataFrame({'id': []}).set_index('id')
 
+    def __create_dataframe__(self, objects) -> pd.DataFrame:
+        data = [{'id': obj.id} | {key: obj[key] for key in obj.get_attribute_names()} for obj in objects]
+        return pd.DataFrame.from_dict(data).set_index('id')
+
     def hop(self, reference: Reference | int | str):
-        referenced_objects = []
-        for object in self:
-            referenced_objects.extend(self.interface.hop(reference, object))
-        return ObjectList(self.interface, remove_duplicates(referenced_objects))
+        """ Gibt die über die Referenz verbundenen (aktiven) Objekte als verzögert geladene Liste zurück """
+        return self.interface.create_lazy_object_list(self.interface.hop_ids(reference, self.get_ids()))
     
+    def prefetch(self, paths: list):
+        """ Lädt die Ziele der gegebenen Referenzpfade (z.B. 'employer.address') für alle Objekte gesammelt vorab """
+        self.interface.prefetch(self.objects, paths)
+
     def get_column(self, attribute_name: str) -> pd.Series:
         return self.get_dataframe()[attribute_name]
     
     def filter(self, conditions):
-        indices = list(self.get_dataframe()[conditions].index)
+        indices = set(self.get_dataframe()[conditions].index)
         return ObjectList(self.interface, [obj for obj in self if obj.id in indices])
+
+class LazyObjectList(ObjectList):
+    """ Objektliste, die nur die Ids (und die erzeugende Abfrage) hält und die Objekte seitenweise gesammelt lädt, sobald sie benötigt werden.
+    Sie wird wie eine ObjectList über ihre Methoden verändert (append, extend, insert, remove, pop, Index- und Slice-Zuweisung, del, clear); objects liefert eine Kopie. """
+    def __init__(self, interface, ids: list, query: tuple = None, attribute_names: list = None, deferred: list = None, prefetch: list = None, page_size: int = OBJECT_LIST_PAGE_SIZE, loaded: dict = None):
+        ObjectInterfaceControl.__init__(self, interface)
+        self.ids = array('q', ids)
+        self.query = query
+        self.attribute_names = attribute_names
+        self.deferred = deferred
+        self.prefetch_paths = prefetch
+        self.page_size = page_size
+        self.__loaded__ = loaded if loaded is not None else {}
+        self.interface.register_control(self)
+
+    @property
+    def objects(self) -> list:
+        """ Gibt alle Objekte als neue Liste zurück (lädt die noch nicht geladenen) """
+        return list(self)
+
+    @objects.setter
+    def objects(self, objects: list):
+        self.ids = array('q', [object_.id for object_ in objects])
+        self.__loaded__ = {object_.id: object_ for object_ in objects}
+        self.get_dataframe.cache_clear()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __iter__(self):
+        for start in range(0, len(self.ids), self.page_size):
+            yield from self.__load_page__(start)
+
+    def __getitem__(self, index: int | slice):
+        if isinstance(index, slice):
+            ids = self.ids[index]
+            return LazyObjectList(self.interface, ids, None, self.attribute_names, self.deferred, self.prefetch_paths, self.page_size, {id: self.__loaded__[id] for id in ids if id in self.__loaded__})
+        id = self.ids[index]
+        if id not in self.__loaded__:
+            index = index if index >= 0 else index + len(self.ids)
+            self.__load_page__(index - index % self.page_size)
+        return self.__loaded__.get(id)
+
+    def __setitem__(self, index: int | slice, objects):
+        if isinstance(index, slice):
+            objects = list(objects)
+            self.ids[index] = array('q', [object_.id for object_ in objects])
+        else:
+            objects = [objects]
+            self.ids[index] = objects[0].id
+        for object_ in objects:
+            self.__loaded__[object_.id] = object_
+        self.get_dataframe.cache_clear()
+
+    def __delitem__(self, index: int | slice):
+        del self.ids[index]
+        self.get_dataframe.cache_clear()
+
+    def __load_page__(self, start: int) -> list:
+        """ Lädt die noch nicht geladenen Objekte der Seite ab der gegebenen Position und gibt die Objekte der Seite zurück """
+        ids = self.ids[start: start + self.page_size]
+        missing_ids = [id for id in ids if id not in self.__loaded__]
+        if len(missing_ids) > 0:
+            for obj in self.interface.get_objects(missing_ids, self.attribute_names, self.deferred, self.prefetch_paths):
+                self.__loaded__[obj.id] = obj
+        return [self.__loaded__[id] for id in ids if id in self.__loaded__]
+
+    def clear_cache(self):
+        super().clear_cache()
+        self.__loaded__.clear()
+
+    def is_loaded(self) -> bool:
+        """ Gibt zurück, ob alle Objekte der Liste geladen sind """
+        return all(id in self.__loaded__ for id in self.ids)
+
+    def refresh(self):
+        """ Führt die erzeugende Abfrage erneut aus und verwirft die geladenen Objekte """
+        if self.query is None:
+            raise ValueError('Object list has no source query')
+        self.interface.cursor.execute(*self.query)
+        self.ids = array('q', [row[0] for row in self.interface.cursor.fetchall()])
+        self.clear_cache()
+
+    def get_ids(self) -> list:
+        return list(self.ids)
+
+    def append(self, object_: Object):
+        self.ids.append(object_.id)
+        self.__loaded__[object_.id] = object_
+        self.get_dataframe.cache_clear()
+
+    def extend(self, objects: list):
+        for object_ in objects:
+            self.append(object_)
+
+    def insert(self, index: int, object_: Object):
+        self.ids.insert(index, object_.id)
+        self.__loaded__[object_.id] = object_
+        self.get_dataframe.cache_clear()
+
+    def remove(self, object_: Object):
+        self.ids.remove(object_.id)
+        self.get_dataframe.cache_clear()
+
+    def pop(self, index: int = -1) -> Object:
+        object_ = self[index]
+        del self[index]
+        return object_
+
+    def clear(self):
+        self.ids = array('q')
+        self.clear_cache()
+
+    def load_attributes(self, attribute_names: list = None):
+        """ Lädt die gegebenen oder alle noch nicht geladenen (verzögerten) Attribute seitenweise nach (lädt dabei alle Objekte) """
+        for start in range(0, len(self.ids), self.page_size):
+            self.interface.load_attributes(self.__load_page__(start), attribute_names)
+
+    @instance_cache
+    def get_dataframe(self) -> pd.DataFrame:
+        """ Wandelt die Objekte seitenweise in ein Dataframe um. Nicht geladene Objekte werden nur vorübergehend gelesen und nicht in der Liste gehalten. """
+        frames = []
+        for start in range(0, len(self.ids), self.page_size):
+            ids = self.ids[start: start + self.page_size]
+            missing_ids = [id for id in ids if id not in self.__loaded__]
+            objects = {obj.id: obj for obj in self.interface.get_objects(missing_ids)} if len(missing_ids) > 0 else {}
+            page_objects = [self.__loaded__[id] if id in self.__loaded__ else objects[id] for id in ids if id in self.__loaded__ or id in objects]
+            self.interface.load_attributes(page_objects)
+            frames.append(self.__create_dataframe__(page_objects))
+        if len(frames) > 0:
+            return pd.concat(frames)
+        else:
+            return pd.DataFrame({'id': []}).set_index('id')
+
+    def filter(self, conditions):
+        indices = set(self.get_dataframe()[conditions].index)
+        ids = [id for id in self.ids if id in indices]
+        return LazyObjectList(self.interface, ids, None, self.attribute_names, self.deferred, self.prefetch_paths, self.page_size, {id: self.__loaded__[id] for id in ids if id in self.__loaded__})
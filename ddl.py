@@ -1,30 +1,13 @@
 from interface import ObjectInterface
+from programmability.native import get_native_codec
+from utils import get_data_table_name, get_reference_table_statements, get_search_table_name, get_index_name, bool_to_int
 import logging
+from bisect import bisect_right
+import re
 
 DEF_OPEN = '{'
 DEF_CLOSE = '}'
 
-def find_corresponding_close(text, str_open: str, str_close: str, start: int = 0):
-    level = 1
-    while level > 0:
-        first_open = text.find(str_open, start)
-        first_close = text.find(str_close, start)
-
-        # Kein Schluss vorhanden
-        if first_close < 0:
-            return -1
-        
-        # Öffnen zuerst
-        elif first_open < first_close and first_open >= start:
-            level += 1
-            start = first_open + 1
-
-        # Schließen zuerst
-        else:
-            level -= 1
-            start = first_close + 1
-    return first_close
-
 def correct_source_indentation(source: str) -> str:
     lines = [line for line in source.splitlines() if len(line) > 0]
     if len(lines) > 0:
@@ -33,11 +16,325 @@ def correct_source_indentation(source: str) -> str:
     else:
         return None
     
-def parse_tagged_name(name: str, tag_character: str = '*'):
-    if tag_character in name:
-        return name.replace(tag_character, ''), True
-    else:
-        return name, False
+class DatatypeDefinition:
+    def __init__(self, name: str, generator: str = None, parent_name: str = None, native: str = None, read_transformer_source: str = None, write_transformer_source: str = None) -> None:
+        self.name = name
+        self.generator = generator
+        self.parent_name = parent_name
+        self.native = native
+        self.read_transformer_source = read_transformer_source
+        self.write_transformer_source = write_transformer_source
+
+class AttributeDefinition:
+    def __init__(self, name: str, datatype_name: str) -> None:
+        self.name = name
+        self.datatype_name = datatype_name
+
+class AttributeAssignmentDefinition:
+    def __init__(self, attribute_name: str, indexed: bool = False, deferred: bool = False, read_transformer_source: str = None, write_transformer_source: str = None) -> None:
+        self.attribute_name = attribute_name
+        self.indexed = indexed
+        self.deferred = deferred
+        self.read_transformer_source = read_transformer_source
+        self.write_transformer_source = write_transformer_source
+
+class ReferenceDefinition:
+    def __init__(self, name: str, target_class_name: str, cardinality: int = None) -> None:
+        self.name = name
+        self.target_class_name = target_class_name
+        self.cardinality = cardinality
+
+class IndexDefinition:
+    def __init__(self, name: str, attribute_names: list, covering_attribute_names: list = None) -> None:
+        self.name = name
+        self.attribute_names = attribute_names
+        self.covering_attribute_names = covering_attribute_names if covering_attribute_names else []
+
+class ClassDefinition:
+    def __init__(self, name: str, traced: bool = False, parent_name: str = None) -> None:
+        self.name = name
+        self.traced = traced
+        self.parent_name = parent_name
+        self.attribute_assignments = []
+        self.references = []
+        self.indexes = []
+        self.search_attribute_names = []
+        self.single_table = False
+
+    def get_index_name(self, index: IndexDefinition) -> str:
+        return index.name if index.name else get_index_name(self.name, '_'.join(index.attribute_names))
+
+class Schema:
+    """ In-memory model of a ddl script """
+    def __init__(self) -> None:
+        self.datatypes = []
+        self.attributes = []
+        self.classes = []
+
+TOKEN_NAME = 'name'
+TOKEN_NUMBER = 'number'
+TOKEN_SYMBOL = 'symbol'
+TOKEN_END = 'end'
+
+TOKEN_PATTERN = re.compile(r'\s*(?:(?P<name>[A-Za-z_]\w*)|(?P<number>\d+)|(?P<symbol>->|[#@+{}(),:*!~])|(?P<end>$))')
+WHITESPACE_PATTERN = re.compile(r'\s*')
+BRACE_PATTERN = re.compile(r'[{}]')
+
+class Token:
+    def __init__(self, kind: str, value: str, position: int, end: int = None) -> None:
+        self.kind = kind
+        self.value = value
+        self.position = position
+        self.end = end
+
+class Tokenizer:
+    """ Single-pass scanner for ddl scripts. Generators and transformer sources are read as raw text on request of the parser. """
+    def __init__(self, text: str) -> None:
+        self.text = text
+        self.position = 0
+        self.peeked = None
+        self.line_starts = [0] + [match.end() for match in re.finditer('\n', text)]
+
+    def get_line_column(self, position: int) -> tuple:
+        """ Returns line and column (both starting at 1) of the given text position """
+        line = bisect_right(self.line_starts, position)
+        return line, position - self.line_starts[line - 1] + 1
+
+    def error(self, message: str, position: int = None) -> SyntaxError:
+        """ Creates a syntax error with line and column of the given or current position """
+        position = self.position if position is None else position
+        line, column = self.get_line_column(position)
+        line_end = self.text.find('\n', self.line_starts[line - 1])
+        line_text = self.text[self.line_starts[line - 1]: line_end if line_end >= 0 else len(self.text)]
+        return SyntaxError(f'{message} (line {line}, column {column})', ('<ddl>', line, column, line_text))
+
+    def skip_whitespace(self):
+        self.position = WHITESPACE_PATTERN.match(self.text, self.position).end()
+
+    def peek(self) -> Token:
+        """ Returns the next token without consuming it """
+        if self.peeked is None:
+            self.peeked = self.__scan__()
+        return self.peeked
+
+    def next(self) -> Token:
+        """ Consumes and returns the next token """
+        token = self.peek()
+        self.peeked = None
+        self.position = token.end
+        return token
+
+    def __scan__(self) -> Token:
+        match = TOKEN_PATTERN.match(self.text, self.position)
+        if match is None:
+            position = WHITESPACE_PATTERN.match(self.text, self.position).end()
+            raise self.error(f'Unexpected character {self.text[position]!r}', position)
+        kind = match.lastgroup
+        if kind == 'end':
+            return Token(TOKEN_END, None, match.start(kind), match.end())
+        return Token(kind, match.group(kind), match.start(kind), match.end())
+
+    def read_raw_until(self, stop_characters: str) -> Token:
+        """ Reads raw text until one of the stop characters outside of parentheses """
+        self.peeked = None
+        self.skip_whitespace()
+        text = self.text
+        start = self.position
+        level = 0
+        while self.position < len(text):
+            character = text[self.position]
+            if character == '(':
+                level += 1
+            elif character == ')':
+                level -= 1
+            elif level == 0 and character in stop_characters:
+                break
+            self.position += 1
+        return Token(TOKEN_NAME, text[start: self.position].strip(), start)
+
+    def read_block(self) -> Token:
+        """ Reads the raw content of a block after its opening brace up to the corresponding closing brace """
+        self.peeked = None
+        start = self.position
+        level = 1
+        match = BRACE_PATTERN.search(self.text, start)
+        while match:
+            level += 1 if match.group() == DEF_OPEN else -1
+            if level == 0:
+                self.position = match.end()
+                return Token(TOKEN_NAME, self.text[start: match.start()], start, self.position)
+            match = BRACE_PATTERN.search(self.text, match.end())
+        raise self.error('Missing closing brace', start - 1)
+
+class Parser:
+    """ Recursive-descent parser creating a schema model from a ddl script """
+    def __init__(self, text: str) -> None:
+        self.tokenizer = Tokenizer(text)
+
+    def expect(self, value: str = None, kind: str = TOKEN_SYMBOL) -> Token:
+        token = self.tokenizer.next()
+        if token.kind != kind or (value is not None and token.value != value):
+            expected = repr(value) if value is not None else kind
+            found = repr(token.value) if token.kind != TOKEN_END else 'end of script'
+            raise self.tokenizer.error(f'Expected {expected}, found {found}', token.position)
+        return token
+
+    def accept(self, value: str) -> bool:
+        """ Consumes the next token if it is the given symbol """
+        token = self.tokenizer.peek()
+        if token.kind == TOKEN_SYMBOL and token.value == value:
+            self.tokenizer.next()
+            return True
+        return False
+
+    def parse(self) -> Schema:
+        """ script := (datatype | attributes | class)* """
+        schema = Schema()
+        while True:
+            token = self.tokenizer.peek()
+            if token.kind == TOKEN_END:
+                return schema
+            elif token.kind == TOKEN_SYMBOL and token.value == '#':
+                schema.datatypes.append(self.parse_datatype())
+            elif token.kind == TOKEN_SYMBOL and token.value == '+':
+                schema.attributes.extend(self.parse_attributes())
+            else:
+                schema.classes.append(self.parse_class())
+
+    def parse_datatype(self) -> DatatypeDefinition:
+        """ datatype := '#' name '{' ('#' parent | '@' native | generator) (','? transformer)* '}' """
+        self.expect('#')
+        datatype = DatatypeDefinition(self.expect(kind=TOKEN_NAME).value)
+        self.expect(DEF_OPEN)
+        if self.accept('#'):
+            datatype.parent_name = self.expect(kind=TOKEN_NAME).value
+        elif self.accept('@'):
+            datatype.native = self.tokenizer.read_raw_until(',' + DEF_CLOSE).value
+        else:
+            generator = self.tokenizer.read_raw_until(',' + DEF_CLOSE)
+            if len(generator.value) == 0:
+                raise self.tokenizer.error(f'Missing generator of datatype {datatype.name}', generator.position)
+            datatype.generator = generator.value
+        self.parse_transformers(datatype)
+        return datatype
+
+    def parse_transformers(self, definition):
+        """ transformers := (','? ('get' | 'set') '{' source '}')* '}' """
+        while not self.accept(DEF_CLOSE):
+            self.accept(',')
+            if self.accept(DEF_CLOSE):
+                return
+            indicator = self.expect(kind=TOKEN_NAME)
+            self.expect(DEF_OPEN)
+            source = correct_source_indentation(self.tokenizer.read_block().value)
+            if indicator.value.lower() == 'get':
+                definition.read_transformer_source = source
+            elif indicator.value.lower() == 'set':
+                definition.write_transformer_source = source
+            else:
+                line, column = self.tokenizer.get_line_column(indicator.position)
+                logging.warning(f'Unknown transformer indicator {indicator.value} (line {line}, column {column})')
+
+    def parse_attributes(self) -> list:
+        """ attributes := '+' 'attributes' '{' (name ':' datatype (',' name ':' datatype)* ','?)? '}' """
+        self.expect('+')
+        keyword = self.expect(kind=TOKEN_NAME)
+        if keyword.value.lower() != 'attributes':
+            raise self.tokenizer.error(f'Expected attributes, found {keyword.value!r}', keyword.position)
+        self.expect(DEF_OPEN)
+        attributes = []
+        while not self.accept(DEF_CLOSE):
+            name = self.expect(kind=TOKEN_NAME).value
+            self.expect(':')
+            attributes.append(AttributeDefinition(name, self.expect(kind=TOKEN_NAME).value))
+            if not self.accept(','):
+                self.expect(DEF_CLOSE)
+                break
+        return attributes
+
+    def parse_class(self) -> ClassDefinition:
+        """ class := name '*'? ('(' parent ')')? '{' (element (',' element)* ','?)? '}' """
+        class_ = ClassDefinition(self.expect(kind=TOKEN_NAME).value)
+        class_.traced = self.accept('*')
+        if self.accept('('):
+            class_.parent_name = self.expect(kind=TOKEN_NAME).value
+            self.expect(')')
+        self.expect(DEF_OPEN)
+        while not self.accept(DEF_CLOSE):
+            if self.tokenizer.peek().value == '~':
+                class_.references.append(self.parse_reference())
+            elif self.tokenizer.peek().value == '+':
+                self.parse_class_option(class_)
+            else:
+                class_.attribute_assignments.append(self.parse_attribute_assignment())
+            if not self.accept(','):
+                self.expect(DEF_CLOSE)
+                break
+        return class_
+
+    def parse_reference(self) -> ReferenceDefinition:
+        """ reference := '~' name '->' target ('(' cardinality ')')? """
+        self.expect('~')
+        reference = ReferenceDefinition(self.expect(kind=TOKEN_NAME).value, None)
+        self.expect('->')
+        reference.target_class_name = self.expect(kind=TOKEN_NAME).value
+        if self.accept('('):
+            reference.cardinality = int(self.expect(kind=TOKEN_NUMBER).value)
+            self.expect(')')
+        return reference
+
+    def parse_class_option(self, class_: ClassDefinition):
+        """ option := '+' ('index' index | 'search' '(' attributes ')' | 'storage' ('single' | 'split')) """
+        self.expect('+')
+        keyword = self.expect(kind=TOKEN_NAME)
+        if keyword.value.lower() == 'index':
+            class_.indexes.append(self.parse_index())
+        elif keyword.value.lower() == 'search':
+            if len(class_.search_attribute_names) > 0:
+                raise self.tokenizer.error(f'Class {class_.name} already has a search index', keyword.position)
+            class_.search_attribute_names = self.parse_name_list()
+        elif keyword.value.lower() == 'storage':
+            mode = self.expect(kind=TOKEN_NAME)
+            if mode.value.lower() not in ('single', 'split'):
+                raise self.tokenizer.error(f'Expected single or split, found {mode.value!r}', mode.position)
+            if mode.value.lower() == 'single' and class_.parent_name:
+                raise self.tokenizer.error(f'Class {class_.name} is not a root class and can not store its family tree in a single table', mode.position)
+            class_.single_table = mode.value.lower() == 'single'
+        else:
+            raise self.tokenizer.error(f'Expected index, search or storage, found {keyword.value!r}', keyword.position)
+
+    def parse_index(self) -> IndexDefinition:
+        """ index := name? '(' attributes ')' ('covering' '(' attributes ')')? """
+        name = self.expect(kind=TOKEN_NAME).value if self.tokenizer.peek().kind == TOKEN_NAME else None
+        index = IndexDefinition(name, self.parse_name_list())
+        token = self.tokenizer.peek()
+        if token.kind == TOKEN_NAME and token.value.lower() == 'covering':
+            self.tokenizer.next()
+            index.covering_attribute_names = self.parse_name_list()
+        return index
+
+    def parse_name_list(self) -> list:
+        """ names := '(' name (',' name)* ')' """
+        self.expect('(')
+        names = [self.expect(kind=TOKEN_NAME).value]
+        while self.accept(','):
+            names.append(self.expect(kind=TOKEN_NAME).value)
+        self.expect(')')
+        return names
+
+    def parse_attribute_assignment(self) -> AttributeAssignmentDefinition:
+        """ assignment := name ('*' | '!')* ('{' transformers)? """
+        assignment = AttributeAssignmentDefinition(self.expect(kind=TOKEN_NAME).value)
+        while True:
+            if self.accept('*'):
+                assignment.indexed = True
+            elif self.accept('!'):
+                assignment.deferred = True
+            else:
+                break
+        if self.accept(DEF_OPEN):
+            self.parse_transformers(assignment)
+        return assignment
 
 class Interpreter:
     def __init__(self, interface: ObjectInterface) -> None:
@@ -45,202 +342,203 @@ class Interpreter:
 
     def run(self, text: str):
         """ Run ddl script """
-        start = 0
-        valid = True
-        while valid:
-            first_open = text.find(DEF_OPEN, start)
-            first_close = find_corresponding_close(text, DEF_OPEN, DEF_CLOSE, first_open + 1)
-            if first_open > 0 and first_close > 0 and first_open < first_close:
-                
-                # Textelemente auslesen
-                indicator = text[start: first_open].strip()
-                clear_indicator = indicator.lower().replace(' ', '')
-                content = text[first_open + 1: first_close]
-                
-                # Datentyp erzeugen
-                if clear_indicator.startswith('#'):
-                    self.__run_datatype_creation__(indicator[1:], content)
-
-                # Attribute erzeugen
-                elif clear_indicator == '+attributes':
-                    self.__run_attribute_creation__(content)
-                
-                # Klasse erzeugen
-                else:
-                    self.__run_class_creation__(indicator, content)
-
-                # Startpunkt hinter das aktuelle Ende setzen
-                start = first_close + 1
-            else:
-                valid = False
+        self.build(self.parse(text))
         self.interface.log('DDL execution')
         self.interface.commit()
         logging.debug('Structure built')
 
-    def __run_datatype_creation__(self, datatype_name, text: str):
-        """ Creates new datatype with the given name and ddl text """
-        start = 0
-        indicator = None
-        generator = None
-        parent_name = None
-        read_transformer_source = None
-        write_transformer_source = None
-        valid = True
-        while valid:
-
-            # Generator / Parent
-            if not (generator or parent_name):
-                first_comma = text.find(',', start)
-                if first_comma > 0:
-                    indicator = text[start: first_comma].strip()
-                    start = first_comma + 1
-                else:
-                    indicator = text.strip()
-                    valid = False
-                if indicator.startswith('#'):
-                    parent_name = indicator[1:]
-                else:
-                    generator = indicator
+    def parse(self, text: str) -> Schema:
+        """ Parses a ddl script into a schema model without touching the database """
+        return Parser(text).parse()
+
+    def build(self, schema: Schema):
+        """ Creates the structure of the given schema model in one savepoint: one CREATE TABLE per class (or per family tree stored in a single table) with all columns, batched metadata inserts and the regenerated class views """
+        try:
+            with self.interface.__savepoint__('build'):
+                self.__build__(schema)
+                self.interface.create_views()
+        finally:
+            self.interface.clear_cache()
+        logging.debug(f'Built {len(schema.datatypes)} datatypes, {len(schema.attributes)} attributes and {len(schema.classes)} classes')
 
-            # Transformer Funktionen
+    def get_storage_class_name(self, schema: Schema, class_name: str) -> str:
+        """ Returns the name of the class whose table stores the own attributes of the given class (the root class if it stores its family tree in a single table) """
+        class_definitions = {c.name: c for c in schema.classes}
+        current_name = class_name
+        while True:
+            if current_name in class_definitions:
+                single_table, parent_name = class_definitions[current_name].single_table, class_definitions[current_name].parent_name
             else:
-                first_open = text.find(DEF_OPEN, start)
-                first_close = find_corresponding_close(text, DEF_OPEN, DEF_CLOSE, first_open + 1)
-                if first_open > 0 and first_close > 0 and first_open < first_close:
-                    indicator = text[start: first_open].lower().strip()
-                    source = correct_source_indentation(text[first_open + 1: first_close])
-                    if indicator == 'get':
-                        read_transformer_source = source
-                    elif indicator == 'set':
-                        write_transformer_source = source
-                    else:
-                        logging.warning(f'Unknown transformer indicator {indicator}')
-                    start = first_close + 1
+                class_ = self.interface.get_class(current_name)
+                single_table, parent_name = class_.single_table, class_.get_parent().name if class_.get_parent() else None
+            if parent_name is None:
+                return current_name if single_table else class_name
+            current_name = parent_name
+
+    def resolve_index_class(self, schema: Schema, class_name: str, index: IndexDefinition) -> str:
+        """ Returns the name of the class whose table stores all attributes of the given index """
+        class_definitions = {c.name: c for c in schema.classes}
+        holders = set()
+        for attribute_name in [*index.attribute_names, *index.covering_attribute_names]:
+            current_name = class_name
+            while current_name is not None:
+                if current_name in class_definitions:
+                    definition = class_definitions[current_name]
+                    own_attribute_names = [aa.attribute_name for aa in definition.attribute_assignments]
+                    parent_name = definition.parent_name
                 else:
-                    valid = False
-        if generator:
-            self.interface.create_datatype(datatype_name, 
-                                           read_transformer_source=read_transformer_source, 
-                                           write_transformer_source=write_transformer_source, 
-                                           generator=generator)
-        elif parent_name:
-            self.interface.create_datatype(datatype_name, 
-                                           read_transformer_source=read_transformer_source, 
-                                           write_transformer_source=write_transformer_source, 
-                                           parent=self.interface.get_datatype(parent_name))
-        else:
-            raise SyntaxError('Incorrect datatype definition')
-
-    def __run_attribute_creation__(self, text: str):
-        """ Run attribute creation with the given ddl text """
-        for a in [a.strip() for a in text.split(',')]:
-            parameters = [p.strip() for p in a.split(':')]
-            self.interface.create_attribute(parameters[0], self.interface.get_datatype(parameters[1]))
-
-    def __run_class_creation__(self, class_text: str, content_text: str):
-            bracket_open = class_text.find('(')
-            bracket_close = class_text.find(')')
-            
-            # Mit Parent
-            if bracket_open > 0 and bracket_close > 0 and bracket_open < bracket_close:
-                class_name, traced = parse_tagged_name(class_text[0: bracket_open])
-                parent = self.interface.get_class(class_text[bracket_open + 1: bracket_close])
-
-            # Ohne Parent
+                    class_ = self.interface.get_class(current_name)
+                    own_attribute_names = [a.name for a in class_.get_assigned_attributes()]
+                    parent_name = class_.get_parent().name if class_.get_parent() else None
+                if attribute_name in own_attribute_names:
+                    holders.add(self.get_storage_class_name(schema, current_name))
+                    break
+                current_name = parent_name
+            if current_name is None:
+                raise KeyError(f'Attribute {attribute_name} not assigned to class {class_name}')
+        if len(holders) != 1:
+            raise ValueError(f"Index attributes {', '.join(index.attribute_names)} of class {class_name} are stored in different tables")
+        return holders.pop()
+
+    def get_index_statement(self, schema: Schema, class_: ClassDefinition, index: IndexDefinition) -> str:
+        """ Returns the statement creating the given index of a class """
+        table_name = get_data_table_name(self.resolve_index_class(schema, class_.name, index))
+        return f"CREATE INDEX {class_.get_index_name(index)} ON {table_name}({', '.join([*index.attribute_names, *index.covering_attribute_names])})"
+
+    def get_search_statement(self, schema: Schema, class_: ClassDefinition) -> str:
+        """ Returns the statement creating the full-text index of a class """
+        for attribute_name in class_.search_attribute_names:
+            self.resolve_index_class(schema, class_.name, IndexDefinition(None, [attribute_name]))
+        return f"CREATE VIRTUAL TABLE {get_search_table_name(class_.name)} USING fts5({', '.join(class_.search_attribute_names)})"
+
+    def __get_next_id__(self, table_name: str) -> int:
+        """ Returns the next id of the given structure table """
+        cursor = self.interface.cursor
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {table_name}")
+        max_id = cursor.fetchone()[0]
+        cursor.execute("SELECT seq FROM sqlite_sequence WHERE name = ?", (table_name,))
+        res = cursor.fetchone()
+        return max(max_id, res[0] if res else 0) + 1
+
+    def __get_existing_ids__(self, table_name: str) -> dict:
+        """ Returns the ids of the existing elements of a structure table by name """
+        self.interface.cursor.execute(f"SELECT id, name FROM {table_name}")
+        return {row['name']: row['id'] for row in self.interface.cursor.fetchall()}
+
+    def __build__(self, schema: Schema):
+        cursor = self.interface.cursor
+
+        # Datentypen
+        datatype_ids = self.__get_existing_ids__('structure_datatype')
+        datatype_definitions = {d.name: d for d in schema.datatypes}
+        next_id = self.__get_next_id__('structure_datatype')
+        for i, datatype in enumerate(schema.datatypes):
+            datatype_ids[datatype.name] = next_id + i
+
+        def get_datatype_id(name: str) -> int:
+            if name not in datatype_ids:
+                raise KeyError(f'Datatype {name} not found')
+            return datatype_ids[name]
+        
+        def get_generator(name: str) -> str:
+            datatype = datatype_definitions.get(name)
+            if datatype is None:
+                return self.interface.get_datatype(name).get_generator()
+            elif datatype.native:
+                return get_native_codec(datatype.native).generator
+            elif datatype.generator:
+                return datatype.generator
             else:
-                class_name, traced = parse_tagged_name(class_text)
-                parent = None
-            class_ = self.interface.create_class(class_name, traced, parent)
-
-            # Attribute und Referenzen
-            start = 0
-            valid = True
-            while valid:
-
-                # Ende des Elements finden und Elementtext extrahieren
-                first_comma = content_text.find(',', start)
-                first_open = content_text.find(DEF_OPEN, start)
-
-                # Kein Komma und kein Transformer => Letztes Element
-                if first_comma < 0 and first_open < 0:
-                    element_text = content_text[start:]
-                    valid = False
-
-                # Nur Komma gefunden oder Komma vor Transformer => Element ohne Transformer
-                elif first_comma >= 0 and first_open < 0 or first_comma < first_open:
-                    element_text = content_text[start: first_comma]
-                    start = first_comma + 1
-
-                # Sonst => Element mit Transformer
-                else:
-                    first_close = find_corresponding_close(content_text, DEF_OPEN, DEF_CLOSE, first_open + 1)
-                    element_text = content_text[start: first_close]
-                    next_comma = content_text.find(',', first_close)
-                    
-                    # Letztes Element?
-                    if next_comma < 0:
-                        valid = False
-                    else:
-                        start = next_comma + 1
-
-                # Referenz
-                if element_text.strip().startswith('~'):
-                    self.__run_reference_creation__(element_text, class_)
-
-                # Attributzuweisung
-                else:
-                    self.__run_attribute_assignment__(element_text, class_)
-
-    def __run_reference_creation__(self, text: str, class_):
-        """ Create new reference with the given ddl text at the given class """
-        parameters = [p.strip() for p in text.split('->')]
-        reference_name = parameters[0][1:]
-        bracket_open = parameters[1].find('(')
-        bracket_close = parameters[1].find(')')
-        if bracket_open > 0 and bracket_close > 0:
-            if bracket_open < bracket_close:
-                target_class_name = parameters[1][:bracket_open]
-                cardinality = int(parameters[1][bracket_open + 1: bracket_close])
+                return get_generator(datatype.parent_name)
+
+        cursor.executemany("INSERT INTO structure_datatype (id, name, read_transformer_source, write_transformer_source, generator, parent_id, native) VALUES (?, ?, ?, ?, ?, ?, ?)", [
+            (datatype_ids[d.name], d.name, d.read_transformer_source, d.write_transformer_source, get_native_codec(d.native).generator if d.native else d.generator, get_datatype_id(d.parent_name) if d.parent_name else None, d.native)
+            for d in schema.datatypes])
+
+        # Attribute
+        attribute_ids = self.__get_existing_ids__('structure_attribute')
+        attribute_datatype_names = {a.name: a.datatype_name for a in schema.attributes}
+        next_id = self.__get_next_id__('structure_attribute')
+        for i, attribute in enumerate(schema.attributes):
+            attribute_ids[attribute.name] = next_id + i
+        cursor.executemany("INSERT INTO structure_attribute (id, name, datatype_id) VALUES (?, ?, ?)", [
+            (attribute_ids[a.name], a.name, get_datatype_id(a.datatype_name))
+            for a in schema.attributes])
+
+        def get_attribute_id(name: str) -> int:
+            if name not in attribute_ids:
+                raise KeyError(f'Attribute {name} not found')
+            return attribute_ids[name]
+
+        def get_attribute_generator(name: str) -> str:
+            if name in attribute_datatype_names:
+                return get_generator(attribute_datatype_names[name])
             else:
-                raise SyntaxError(f'Incorrect reference definition ({parameters[0]})')
-        else:
-            target_class_name = parameters[1]
-            cardinality = None
-        self.interface.create_reference(reference_name, class_, self.interface.get_class(target_class_name), cardinality)
-
-    def __run_attribute_assignment__(self, text: str, class_):
-        """ Assigns an existing attribute by the given ddl text to the given class """
-        read_transformer_source = None
-        write_transformer_source = None
-        start = 0
-        first_open = text.find(DEF_OPEN, start)
-
-        # Keine Transformer funktionen
-        if first_open < 0:
-            attribute_text = text.strip()
-
-        # Transformer funktionen
-        else:
-            attribute_text = text[start: first_open].strip()
-            start = first_open + 1
-            valid = True
-            while valid:
-                first_open = text.find(DEF_OPEN, start)
-                first_close = find_corresponding_close(text, DEF_OPEN, DEF_CLOSE, first_open + 1)
-                if first_open > 0 and first_close > 0 and first_open < first_close:
-                    indicator = text[start: first_open].lower().strip()
-                    source = correct_source_indentation(text[first_open + 1: first_close])
-                    if indicator == 'get':
-                        read_transformer_source = source
-                    elif indicator == 'set':
-                        write_transformer_source = source
-                    else:
-                        logging.warning(f'Unknown transformer indicator {indicator}')
-                    start = first_close + 1
-                else:
-                    valid = False
+                return self.interface.get_attribute(name).get_datatype().get_generator()
+
+        # Klassen
+        class_ids = self.__get_existing_ids__('structure_class')
+        next_id = self.__get_next_id__('structure_class')
+        for i, class_ in enumerate(schema.classes):
+            class_ids[class_.name] = next_id + i
+
+        def get_class_id(name: str) -> int:
+            if name not in class_ids:
+                raise KeyError(f'Class {name} not found')
+            return class_ids[name]
+
+        # Spalten nach Datentabelle (bei Speicherung in einer Tabelle teilen sich Unterklassen die Tabelle der Ursprungsklasse)
+        table_columns = {}
+        for class_ in schema.classes:
+            if class_.single_table and class_.parent_name:
+                raise ValueError(f'Class {class_.name} is not a root class and can not store its family tree in a single table')
+            columns = table_columns.setdefault(self.get_storage_class_name(schema, class_.name), {})
+            for aa in class_.attribute_assignments:
+                columns.setdefault(aa.attribute_name, get_attribute_generator(aa.attribute_name))
+        class_names = [c.name for c in schema.classes]
+        for storage_class_name, columns in table_columns.items():
+            table_name = get_data_table_name(storage_class_name)
+            if storage_class_name in class_names:
+                str_cols = ''.join(f', {name} {generator}' for name, generator in columns.items())
+                cursor.execute(f"CREATE TABLE {table_name} (id INTEGER, version INTEGER, created DATETIME{str_cols}, PRIMARY KEY(id, version))")
+            else:
+                cursor.execute(f"SELECT name FROM pragma_table_info('{table_name}')")
+                existing_columns = [row['name'] for row in cursor.fetchall()]
+                for name, generator in columns.items():
+                    if name not in existing_columns:
+                        cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {name} {generator}")
+        for class_ in schema.classes:
+            for aa in class_.attribute_assignments:
+                if aa.indexed:
+                    cursor.execute(f"CREATE INDEX {get_index_name(class_.name, aa.attribute_name)} ON {get_data_table_name(self.get_storage_class_name(schema, class_.name))}({aa.attribute_name})")
+        cursor.executemany("INSERT INTO structure_class (id, name, traced, parent_id, single_table) VALUES (?, ?, ?, ?, ?)", [
+            (class_ids[c.name], c.name, bool_to_int(c.traced), get_class_id(c.parent_name) if c.parent_name else None, bool_to_int(c.single_table))
+            for c in schema.classes])
+        cursor.executemany("INSERT INTO structure_attribute_assignment (class_id, attribute_id, indexed, deferred, read_transformer_source, write_transformer_source) VALUES (?, ?, ?, ?, ?, ?)", [
+            (class_ids[c.name], get_attribute_id(aa.attribute_name), bool_to_int(aa.indexed), bool_to_int(aa.deferred), aa.read_transformer_source, aa.write_transformer_source)
+            for c in schema.classes for aa in c.attribute_assignments])
+
+        # Indizes
+        for class_ in schema.classes:
+            for index in class_.indexes:
+                cursor.execute(self.get_index_statement(schema, class_, index))
+        cursor.executemany("INSERT INTO structure_index (name, class_id, columns, covering_columns) VALUES (?, ?, ?, ?)", [
+            (c.get_index_name(i), class_ids[c.name], ','.join(i.attribute_names), ','.join(i.covering_attribute_names) if i.covering_attribute_names else None)
+            for c in schema.classes for i in c.indexes])
+
+        # Volltextindizes
+        for class_ in schema.classes:
+            if len(class_.search_attribute_names) > 0:
+                cursor.execute(self.get_search_statement(schema, class_))
+        cursor.executemany("INSERT INTO structure_search (class_id, columns) VALUES (?, ?)", [
+            (class_ids[c.name], ','.join(c.search_attribute_names))
+            for c in schema.classes if len(c.search_attribute_names) > 0])
 
-        # Attribut zuweisen
-        attribute_name = attribute_text.replace('*', '')
-        indexed = len(attribute_text) > len(attribute_name)
-        self.interface.assign_attribute_to_class(class_, self.interface.get_attribute(attribute_name), indexed, read_transformer_source, write_transformer_source)
+        # Referenzen
+        references = [(c, r) for c in schema.classes for r in c.references]
+        cursor.executemany("INSERT INTO structure_reference (name, origin_class_id, target_class_id, cardinality) VALUES (?, ?, ?, ?)", [
+            (r.name, class_ids[c.name], get_class_id(r.target_class_name), r.cardinality)
+            for c, r in references])
+        for _, reference in references:
+            for sql in get_reference_table_statements(reference.name):
+                cursor.execute(sql)
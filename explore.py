@@ -1,18 +1,139 @@
 import sys
+import re
 import logging
 import sqlite3
+from interface import ObjectInterface
 from utils import print_table
 
 FILENAME_DATABASE = 'data/database.db'
+IGNORED_STATEMENTS = ('BEGIN', 'COMMIT', 'ROLLBACK', 'PRAGMA', 'EXPLAIN')
+STRUCTURE_TABLE_PATTERN = re.compile(r'\b(structure_\w+|info|sqlite_schema)\b')
+LITERAL_PATTERN = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+PLAN_TABLE_PATTERN = re.compile(r'^SCAN (\w+)')
 
 def get_db_connection():
     connection = sqlite3.connect(FILENAME_DATABASE)
     connection.row_factory = sqlite3.Row
     return connection
 
+class QueryRecorder:
+    """ Records the statements executed on a connection (with expanded parameters) by operation """
+    def __init__(self, connection: sqlite3.Connection) -> None:
+        self.connection = connection
+        self.operation = None
+        self.statements = []
+
+    def __enter__(self):
+        self.connection.set_trace_callback(self.record)
+        return self
+
+    def __exit__(self, exception_type, exception_value, exception_traceback):
+        self.connection.set_trace_callback(None)
+
+    def record(self, sql: str):
+        # Von virtuellen Tabellen (FTS5) intern ausgeführte Statements ignorieren
+        if not sql.lstrip().upper().startswith(IGNORED_STATEMENTS + ('--',)) and "'main'." not in sql:
+            self.statements.append((self.operation, sql))
+
+def normalize_sql(sql: str) -> str:
+    """ Replaces literals by placeholders, so that statements only differing in their parameters are grouped """
+    return LITERAL_PATTERN.sub('?', ' '.join(sql.split()))
+
+def explain(connection: sqlite3.Connection, sql: str) -> list:
+    """ Returns the details of the query plan of the given statement """
+    return [row[3] for row in connection.execute(f'EXPLAIN QUERY PLAN {sql}').fetchall()]
+
+def suggest_index(connection: sqlite3.Connection, sql: str, table_name: str) -> str:
+    """ Suggests an index for a scanned table from the columns filtered in the statement """
+    columns = [row[1] for row in connection.execute(f'PRAGMA table_info({table_name})').fetchall()]
+    str_where = sql[sql.upper().find(' WHERE '):] if ' WHERE ' in sql.upper() else ''
+    equality_columns, range_columns = [], []
+    for column, operator in re.findall(rf'(?:\b{table_name}\.)?\b(\w+)\s*(=|IN\b|>=|<=|>|<)', str_where, re.IGNORECASE):
+        if column in columns and column not in equality_columns + range_columns:
+            (equality_columns if operator.upper() in ('=', 'IN') else range_columns).append(column)
+    index_columns = equality_columns + range_columns[:1]
+    if len(index_columns) > 0:
+        return f"CREATE INDEX idx_{table_name}_{'_'.join(index_columns)} ON {table_name}({', '.join(index_columns)})"
+    return None
+
+def get_writable_attribute(object_) -> str:
+    """ Returns an attribute whose value can be written back unchanged (no transformers involved) """
+    for assignment in object_.get_class().get_attribute_assignments(True):
+        datatype = assignment.get_attribute().get_datatype()
+        if not (assignment.read_transformer_source or assignment.write_transformer_source or datatype.read_transformer_source or datatype.write_transformer_source or datatype.get_native() or not datatype.is_root()):
+            return assignment.get_attribute().name
+    return None
+
+def record_operations(interface: ObjectInterface, recorder: QueryRecorder):
+    """ Runs the hot path operations of the interface for every class and reference. Writes are rolled back. """
+    interface.cursor.execute('SELECT id FROM structure_class ORDER BY id')
+    classes = [interface.get_class(row['id']) for row in interface.cursor.fetchall()]
+    samples = {}
+    for class_ in classes:
+        recorder.operation = f'get_instances {class_.name}'
+        interface.get_instances_page(class_, 10, recursive=True)
+        recorder.operation = f'count_instances {class_.name}'
+        interface.count_instances(class_, recursive=True)
+        recorder.operation = f'get_object {class_.name}'
+        page = interface.get_instances_page(class_, 1, attribute_names=[])
+        if len(page) > 0:
+            samples[class_.id] = interface.get_object(page[0].id)
+            recorder.operation = f'get_version_times {class_.name}'
+            samples[class_.id].get_version_times()
+            recorder.operation = f'modify {class_.name}'
+            attribute_name = get_writable_attribute(samples[class_.id])
+            if attribute_name:
+                interface.modify(samples[class_.id], **{attribute_name: samples[class_.id].get_raw_value(attribute_name)})
+            else:
+                interface.modify(samples[class_.id])
+            interface.rollback()
+    for class_ in classes:
+        for reference in class_.get_references():
+            origin = samples.get(class_.id)
+            target = samples.get(reference.get_target_class().id)
+            if origin is None:
+                continue
+            recorder.operation = f'hop {reference.name}'
+            interface.hop(reference, origin)
+            if target is not None:
+                recorder.operation = f'bind {reference.name}'
+                interface.bind(reference, origin, [target], rebind=True)
+                interface.rollback()
+
+def audit(filename: str, include_structure: bool = False) -> list:
+    """ Records the statements of the interface operations on the given database, explains them and returns the flagged ones with index suggestions """
+    with ObjectInterface(filename) as interface:
+        with QueryRecorder(interface.connection) as recorder:
+            record_operations(interface, recorder)
+        interface.rollback()
+
+        # Gruppieren und erklären
+        rows = []
+        seen = set()
+        for operation, sql in recorder.statements:
+            normalized_sql = normalize_sql(sql)
+            if (operation, normalized_sql) in seen or (not include_structure and STRUCTURE_TABLE_PATTERN.search(sql)):
+                continue
+            seen.add((operation, normalized_sql))
+            for detail in explain(interface.connection, sql):
+                match = PLAN_TABLE_PATTERN.match(detail)
+                if match and 'VIRTUAL TABLE' not in detail:
+                    rows.append({'operation': operation, 'issue': 'full scan', 'plan': detail, 'suggestion': suggest_index(interface.connection, sql, match.group(1)), 'statement': normalized_sql})
+                elif 'USE TEMP B-TREE' in detail:
+                    rows.append({'operation': operation, 'issue': 'temp b-tree', 'plan': detail, 'suggestion': None, 'statement': normalized_sql})
+        return rows
+
 if __name__ == '__main__':
     logging.basicConfig(format='[%(asctime)s] %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S', level=logging.DEBUG)
 
+    # Audit der vom Interface erzeugten Abfragen
+    if len(sys.argv) > 1 and sys.argv[1] == '--audit':
+        logging.getLogger().setLevel(logging.INFO)
+        filename = sys.argv[2] if len(sys.argv) > 2 and not sys.argv[2].startswith('--') else FILENAME_DATABASE
+        rows = audit(filename, '--structure' in sys.argv[2:])
+        print_table(rows if '--verbose' in sys.argv[2:] else [{k: v for k, v in row.items() if k != 'statement'} for row in rows])
+        sys.exit(1 if len(rows) > 0 else 0)
+
     with get_db_connection() as connection:
         if len(sys.argv) > 1:
             sql = sys.argv[1]
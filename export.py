@@ -0,0 +1,158 @@
+import sys
+import os
+import csv
+import json
+import logging
+from datetime import datetime
+from interface import ObjectInterface
+from control import Class
+from utils import parse_sqlite_datetime, encode_export_value
+from constant import EXPORT_CHUNK_SIZE, EXPORT_SCHEMA_ROWS
+
+EXPORT_FORMATS = ('csv', 'ndjson', 'parquet')
+SQL_EXPORT_TYPES = (('INT', 'int64'), ('CHAR', 'string'), ('TEXT', 'string'), ('CLOB', 'string'), ('BLOB', 'binary'), ('REAL', 'float64'), ('FLOA', 'float64'), ('DOUB', 'float64'), ('DATE', 'string'))
+
+def get_export_format(filename: str) -> str:
+    """ Returns the export format given by the file extension """
+    format_ = os.path.splitext(filename)[1][1:].lower()
+    format_ = 'ndjson' if format_ in ('json', 'jsonl') else format_
+    if format_ not in EXPORT_FORMATS:
+        raise ValueError(f'Invalid export format {format_}')
+    return format_
+
+def export(interface: ObjectInterface, class_: Class | int | str, filename: str, format_: str = None, recursive: bool = False, snapshot_time: datetime = None, only_active_objects: bool = True, chunk_size: int = EXPORT_CHUNK_SIZE) -> int:
+    """ Streams the state of the instances of a class (current or at the snapshot time) to a CSV, NDJSON or Parquet file chunk by chunk and returns the number of exported objects """
+    class_ = interface.parse_class(class_)
+    format_ = format_ or get_export_format(filename)
+    columns = ['id', *interface.get_export_attribute_names(class_, recursive)]
+    chunks = interface.iter_instance_rows(class_, recursive, only_active_objects, snapshot_time, chunk_size)
+    if format_ == 'csv':
+        return write_csv(filename, columns, chunks)
+    elif format_ == 'ndjson':
+        return write_ndjson(filename, chunks)
+    elif format_ == 'parquet':
+        return write_parquet(filename, get_export_types(class_, recursive), chunks)
+    raise ValueError(f'Invalid export format {format_}')
+
+def get_datatype_export_type(datatype) -> str:
+    """ Returns the type of the values of a datatype (None if it depends on a read transformer) """
+    if datatype.read_transformer_source:
+        return None
+    elif datatype.native:
+        name = datatype.native.replace(' ', '')
+        return name if name in ('date', 'datetime', 'ndarray') or name.startswith('decimal(') else None
+    elif not datatype.is_root():
+        return get_datatype_export_type(datatype.get_parent())
+    generator = (datatype.get_generator() or '').upper()
+    return next((export_type for affinity, export_type in SQL_EXPORT_TYPES if affinity in generator), None)
+
+def get_export_types(class_: Class, recursive: bool = False) -> dict:
+    """ Returns the types of the exported columns by name: int64, float64, string, binary, date, datetime, decimal(n), ndarray or None (inferred from the values) """
+    classes = [class_, *class_.get_children(True)] if recursive else [class_]
+    types = {'id': 'int64'}
+    for current_class in classes:
+        for name in current_class.get_attribute_names():
+            assignment = current_class.get_attribute_assignment(name)
+            export_type = None if assignment.read_transformer_source else get_datatype_export_type(assignment.get_attribute().get_datatype())
+            types[name] = export_type if types.get(name, export_type) == export_type else None
+    return types
+
+def encode_rows(rows: list, binary: bool = False) -> list:
+    """ Encodes arrays and bytes of the rows losslessly (see encode_export_value) """
+    return [{name: encode_export_value(value, binary) for name, value in row.items()} for row in rows]
+
+def encode_csv_value(value):
+    """ Writes encoded arrays and bytes as JSON, other values as text """
+    return json.dumps(value) if isinstance(value, dict) else value
+
+def write_csv(filename: str, columns: list, chunks) -> int:
+    n = 0
+    with open(filename, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, columns)
+        writer.writeheader()
+        for rows in chunks:
+            writer.writerows({name: encode_csv_value(value) for name, value in row.items()} for row in encode_rows(rows))
+            n += len(rows)
+    return n
+
+def write_ndjson(filename: str, chunks) -> int:
+    n = 0
+    with open(filename, 'w', encoding='utf-8') as file:
+        for rows in chunks:
+            file.writelines(json.dumps(row, default=str) + '\n' for row in encode_rows(rows))
+            n += len(rows)
+    return n
+
+def get_arrow_type(pyarrow, export_type: str):
+    if export_type == 'date':
+        return pyarrow.date32()
+    elif export_type == 'datetime':
+        return pyarrow.timestamp('us')
+    elif export_type == 'ndarray':
+        return pyarrow.struct([('dtype', pyarrow.string()), ('shape', pyarrow.list_(pyarrow.int64())), ('data', pyarrow.binary())])
+    elif export_type.startswith('decimal('):
+        return pyarrow.decimal128(38, int(export_type[8:-1]))
+    return getattr(pyarrow, export_type)()
+
+def write_parquet(filename: str, types: dict, chunks) -> int:
+    """ Writes every chunk as row group. The schema is built from the datatypes, columns depending on read transformers are inferred from their first values (rows are buffered until known, up to EXPORT_SCHEMA_ROWS, afterwards they are written as text). """
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError('Parquet export requires pyarrow')
+    n = 0
+    writer = None
+    buffered_rows = []
+    text_columns = []
+    try:
+        for rows in chunks:
+            rows = encode_rows(rows, True)
+            n += len(rows)
+            if writer is None:
+                buffered_rows.extend(rows)
+                if len(buffered_rows) < EXPORT_SCHEMA_ROWS and any(export_type is None and all(row[name] is None for row in buffered_rows) for name, export_type in types.items()):
+                    continue
+                rows, buffered_rows = buffered_rows, []
+                writer = create_parquet_writer(pyarrow, filename, types, rows, text_columns)
+            write_parquet_rows(pyarrow, writer, rows, text_columns)
+        if writer is None:
+            writer = create_parquet_writer(pyarrow, filename, types, buffered_rows, text_columns)
+            write_parquet_rows(pyarrow, writer, buffered_rows, text_columns)
+    finally:
+        if writer is not None:
+            writer.close()
+    return n
+
+def create_parquet_writer(pyarrow, filename: str, types: dict, rows: list, text_columns: list):
+    """ Creates the writer with the schema of the given types, unknown types are inferred from the rows (text if no value is given) """
+    fields = []
+    for name, export_type in types.items():
+        if export_type is not None:
+            arrow_type = get_arrow_type(pyarrow, export_type)
+        else:
+            values = [row[name] for row in rows if row[name] is not None]
+            arrow_type = pyarrow.array(values).type if len(values) > 0 else pyarrow.string()
+            if len(values) == 0:
+                text_columns.append(name)
+        fields.append((name, arrow_type))
+    return pyarrow.parquet.ParquetWriter(filename, pyarrow.schema(fields))
+
+def write_parquet_rows(pyarrow, writer, rows: list, text_columns: list):
+    for row in rows:
+        for name in text_columns:
+            row[name] = str(row[name]) if row[name] is not None else None
+    writer.write_table(pyarrow.Table.from_pylist(rows, schema=writer.schema))
+
+def get_option(name: str, default=None):
+    return sys.argv[sys.argv.index(name) + 1] if name in sys.argv else default
+
+if __name__ == '__main__':
+    logging.basicConfig(format='[%(asctime)s] %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S', level=logging.INFO)
+    if len(sys.argv) < 4:
+        print('Usage: python export.py <database> <class> <file> [--recursive] [--all] [--at "<YYYY-MM-DD HH:MM:SS>"] [--format csv|ndjson|parquet] [--chunk-size <size>]')
+        sys.exit(1)
+    snapshot_time = get_option('--at')
+    with ObjectInterface(sys.argv[1]) as interface:
+        n = export(interface, sys.argv[2], sys.argv[3], get_option('--format'), '--recursive' in sys.argv, parse_sqlite_datetime(snapshot_time) if snapshot_time else None, '--all' not in sys.argv, int(get_option('--chunk-size', EXPORT_CHUNK_SIZE)))
+        logging.info(f'Exported {n} objects to {sys.argv[3]}')
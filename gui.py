@@ -1,16 +1,111 @@
 from interface import ObjectInterface
-from flask import Flask, render_template, request, redirect, url_for, abort
+from flask import Flask, render_template, request, redirect, url_for, abort, g
+from contextlib import contextmanager
+from queue import Queue, Empty
+from threading import Lock
+from time import perf_counter
 import utils
 
 FILENAME_DATABASE = 'data/database.db'
+PAGE_SIZE = 50
+POOL_SIZE = 4
 app = Flask(__name__,
             static_folder='gui/static',
             template_folder='gui/templates')
 
-def get_interface() -> ObjectInterface:
-    interface = ObjectInterface(FILENAME_DATABASE)
-    interface.connect()
-    return interface
+class InterfacePool:
+    """ Pool of long-lived interfaces with a warm structure cache, each used by one request at a time """
+    def __init__(self, filename: str, size: int) -> None:
+        self.filename = filename
+        self.size = size
+        self.created = 0
+        self.lock = Lock()
+        self.interfaces = Queue()
+        self.pooled_interfaces = []
+        self.cache_clears = 0
+
+    def acquire(self) -> ObjectInterface:
+        try:
+            interface = self.interfaces.get_nowait()
+        except Empty:
+            with self.lock:
+                if self.created < self.size:
+                    self.created += 1
+                    interface = ObjectInterface(self.filename)
+                    interface.connect(check_same_thread=False)
+                    self.pooled_interfaces.append(interface)
+                else:
+                    interface = None
+            if interface is None:
+                interface = self.interfaces.get()
+
+        # Strukturcache bei geänderter Struktur verwerfen
+        if interface.refresh_cache():
+            self.cache_clears += 1
+        return interface
+
+    def get_cache_info(self) -> dict:
+        """ Sums the cache statistics of the pooled interfaces (each interface has its own caches) """
+        with self.lock:
+            interfaces = list(self.pooled_interfaces)
+        cache_info = {}
+        for interface in interfaces:
+            for name, info in interface.get_cache_info().items():
+                hits, misses, size = cache_info.get(name, (0, 0, 0))
+                cache_info[name] = (hits + info.hits, misses + info.misses, size + info.currsize)
+        return cache_info
+
+    def release(self, interface: ObjectInterface):
+        interface.rollback()
+        interface.clear_object_cache()
+        self.interfaces.put(interface)
+
+class RequestStatistics:
+    """ Thread-safe collection of request timings by endpoint """
+    def __init__(self) -> None:
+        self.lock = Lock()
+        self.endpoints = {}
+
+    def record(self, endpoint: str, duration: float):
+        with self.lock:
+            count, total, maximum = self.endpoints.get(endpoint, (0, 0.0, 0.0))
+            self.endpoints[endpoint] = (count + 1, total + duration, max(maximum, duration))
+
+    def get_rows(self) -> list:
+        with self.lock:
+            return [{'endpoint': endpoint, 'count': count, 'mean_ms': 1000 * total / count, 'max_ms': 1000 * maximum} for endpoint, (count, total, maximum) in sorted(self.endpoints.items())]
+
+pool = None
+pool_lock = Lock()
+statistics = RequestStatistics()
+
+def get_pool() -> InterfacePool:
+    """ Returns the interface pool of the database, created once by the first request """
+    global pool
+    with pool_lock:
+        if pool is None or pool.filename != FILENAME_DATABASE:
+            pool = InterfacePool(FILENAME_DATABASE, POOL_SIZE)
+        return pool
+
+@contextmanager
+def get_interface():
+    current_pool = get_pool()
+    interface = current_pool.acquire()
+    try:
+        yield interface
+    finally:
+        current_pool.release(interface)
+
+# Laufzeit der Anfragen messen
+@app.before_request
+def start_timer():
+    g.start_time = perf_counter()
+
+@app.after_request
+def record_timer(response):
+    if request.endpoint and 'start_time' in g:
+        statistics.record(request.endpoint, perf_counter() - g.start_time)
+    return response
 
 # Eigene Methoden in den Templates
 @app.context_processor
@@ -48,8 +143,20 @@ def show_class(class_id: int):
         class_references = class_.get_references()
         inherited_references = [tr for tr in all_references if tr.id not in [cr.id for cr in class_references]]
 
-        # Objekte ermitteln
-        objects = interface.get_instances(class_id, recursive=True)
+        # Objekte seitenweise ermitteln (Keyset-Paging über die ID, nur Metadaten)
+        after_id = request.args.get('after', type=int)
+        before_id = request.args.get('before', type=int)
+        n_objects = interface.count_instances(class_, recursive=True, only_active_objects=False)
+        objects = interface.get_instances_page(class_, PAGE_SIZE + 1, after_id, before_id, recursive=True, only_active_objects=False, attribute_names=[])
+
+        # Eine zusätzliche Zeile zeigt an, ob in Leserichtung weitere Objekte folgen
+        has_more = len(objects) > PAGE_SIZE
+        if before_id is not None:
+            objects = objects[-PAGE_SIZE:]
+            has_previous, has_next = has_more, True
+        else:
+            objects = objects[:PAGE_SIZE]
+            has_previous, has_next = after_id is not None, has_more
 
         return render_template('show_class.html', 
                                class_=class_, 
@@ -57,7 +164,10 @@ def show_class(class_id: int):
                                inherited_attributes=inherited_attributes,
                                class_references=class_references,
                                inherited_references=inherited_references,
-                               objects=objects)
+                               objects=objects,
+                               n_objects=n_objects,
+                               has_previous=has_previous,
+                               has_next=has_next)
 
 # Attributzuweisung anzeigen    
 @app.route('/attribute/<int:class_id>/<int:attribute_id>')
@@ -82,6 +192,16 @@ def show_object(object_id: int):
         object_ = interface.get_object(object_id)
         return render_template('show_object.html', object_=object_)
     
+# Statistiken anzeigen
+@app.route('/stats')
+def stats():
+    current_pool = get_pool()
+    cache_rows = []
+    for name, (hits, misses, size) in current_pool.get_cache_info().items():
+        requests = hits + misses
+        cache_rows.append({'name': name, 'hits': hits, 'misses': misses, 'size': size, 'hit_rate': hits / requests if requests > 0 else None})
+    return render_template('stats.html', request_rows=statistics.get_rows(), cache_rows=cache_rows, pool=current_pool)
+
 # Logeinträge anzeigen
 @app.route('/log')
 def log():
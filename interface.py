@@ -1,10 +1,20 @@
 import sqlite3
 import logging
-from datetime import datetime
-from control import ObjectInterfaceControl, Datatype, Class, Attribute, AttributeAssignment, Reference, Object, ObjectList
-from utils import get_data_table_name, get_reference_table_name, get_index_name, create_condition, print_table, parse_sqlite_datetime, int_to_bool, bool_to_int
+import re
+import json
+import weakref
+from contextlib import contextmanager, closing
+from datetime import datetime, timedelta
+from control import ObjectInterfaceControl, Datatype, Class, Attribute, AttributeAssignment, Reference, Object, ObjectList, LazyObjectList, ConflictError
+from utils import get_data_table_name, get_reference_table_name, get_reference_table_statements, get_search_table_name, get_view_name, get_index_name, create_condition, print_table, parse_sqlite_datetime, int_to_bool, bool_to_int, chunk_list, get_in_condition, instance_cache, encode_change_value, parse_array_header, ARRAY_HEADER_LENGTH_FORMAT, ARRAY_HEADER_LENGTH_SIZE
+import struct
+import numpy as np
 from programmability.handler import ExecutionHandler
-from functools import cached_property, cache
+from programmability.native import get_native_codec
+from aggregation import Metric, count
+from session import Session
+from cache import HopCache
+from functools import cached_property
 from constant import *
 
 class ObjectInterface:
@@ -15,13 +25,26 @@ class ObjectInterface:
         self.execution_handler = ExecutionHandler(self)
         self.connection = None
         self.cursor = None
-        self.__controls__ = []
+        self.schema_version = None
+        self.__controls__ = weakref.WeakSet()
+        self.object_cache_epoch = 0
+        self.__session__ = None
+        self.__hop_cache__ = HopCache(HOP_CACHE_SIZE)
 
-    def connect(self):
-        self.connection = sqlite3.connect(self.filename)
+    def connect(self, check_same_thread: bool = True):
+        self.connection = sqlite3.connect(self.filename, check_same_thread=check_same_thread, cached_statements=self.__get_statement_cache_size__())
         self.connection.row_factory = sqlite3.Row
         self.cursor = self.connection.cursor()
 
+    def __get_statement_cache_size__(self) -> int:
+        """ Returns the size of the prepared statement cache, estimated from the number of classes and references in the database """
+        try:
+            with closing(sqlite3.connect(self.filename)) as connection:
+                n_classes, n_references = connection.execute('SELECT (SELECT COUNT(*) FROM structure_class), (SELECT COUNT(*) FROM structure_reference)').fetchone()
+        except sqlite3.OperationalError:
+            return STATEMENT_CACHE_MIN_SIZE
+        return max(STATEMENT_CACHE_MIN_SIZE, n_classes * STATEMENT_CACHE_PER_CLASS + n_references * STATEMENT_CACHE_PER_REFERENCE + STATEMENT_CACHE_BASE_SIZE)
+
     def setup(self):
         with open('setup/init.sql', 'r') as file:
             self.cursor.executescript(file.read().format(STATUS_IN_CREATION=STATUS_IN_CREATION))
@@ -30,7 +53,7 @@ class ObjectInterface:
         logging.debug('Setup successful')
 
     def register_control(self, control: ObjectInterfaceControl):
-        self.__controls__.append(control)
+        self.__controls__.add(control)
 
     def clear_cache(self):
         self.get_datatype.cache_clear()
@@ -39,9 +62,54 @@ class ObjectInterface:
         self.get_attribute_assignments.cache_clear()
         self.get_attribute.cache_clear()
         self.get_reference.cache_clear()
-        for control in self.__controls__:
+        self.get_references.cache_clear()
+        self.get_search_attribute_names.cache_clear()
+        self.get_view_names.cache_clear()
+        self.has_change_feed.cache_clear()
+        self.__hop_cache__.clear()
+        self.object_cache_epoch += 1
+        for control in list(self.__controls__):
             control.clear_cache()
 
+    def clear_object_cache(self):
+        """ Clears the caches of objects (on their next access) and object lists but keeps the structure cache """
+        self.object_cache_epoch += 1
+        for control in list(self.__controls__):
+            if isinstance(control, (Object, ObjectList)):
+                control.clear_cache()
+
+    def get_schema_version(self) -> tuple:
+        """ Returns a token that changes whenever the structure of the database is changed (schema version and last log entry) """
+        self.cursor.execute('PRAGMA schema_version')
+        schema_version = self.cursor.fetchone()[0]
+        self.cursor.execute('SELECT MAX(id) AS id FROM info')
+        return schema_version, self.cursor.fetchone()['id']
+
+    def refresh_cache(self) -> bool:
+        """ Clears the cache if the structure of the database changed since the last call and returns whether it was cleared """
+        schema_version = self.get_schema_version()
+        if schema_version != self.schema_version:
+            changed = self.schema_version is not None
+            if changed:
+                self.clear_cache()
+                logging.debug('Structure changed, cache cleared')
+            self.schema_version = schema_version
+            return changed
+        return False
+
+    def get_cache_info(self) -> dict:
+        """ Returns the cache statistics of the structure getters and the hop cache """
+        return {
+            'datatype': self.get_datatype.cache_info(),
+            'class': self.get_class.cache_info(),
+            'child_classes': self.get_child_classes.cache_info(),
+            'attribute_assignments': self.get_attribute_assignments.cache_info(),
+            'attribute': self.get_attribute.cache_info(),
+            'reference': self.get_reference.cache_info(),
+            'references': self.get_references.cache_info(),
+            'hop': self.__hop_cache__.cache_info()
+        }
+
     @cached_property
     def version(self):
         self.cursor.execute('SELECT version FROM info ORDER BY time DESC LIMIT 1')
@@ -65,6 +133,15 @@ class ObjectInterface:
     def commit(self):
         self.connection.commit()
 
+    def rollback(self):
+        """ Rolls back the open transaction and clears the hop cache, which may hold bindings of rolled back versions """
+        self.connection.rollback()
+        self.__hop_cache__.clear()
+
+    def session(self) -> Session:
+        """ Returns a unit of work: within its context, modifications, status changes and bindings are recorded and written in bulk on exit, followed by a commit """
+        return Session(self)
+
     def __enter__(self):
         self.connect()
         return self
@@ -104,72 +181,164 @@ class ObjectInterface:
     #endregion
 
     #region Datatype
-    def create_datatype(self, name: str, read_transformer_source: str = None, write_transformer_source: str = None, generator: str = None, parent: Datatype = None) -> Datatype:
-        """ Creates new datatype and returns Datatype object """
-        self.cursor.execute("INSERT INTO structure_datatype (name, read_transformer_source, write_transformer_source, generator, parent_id) VALUES (?, ?, ?, ?, ?)", (name, read_transformer_source, write_transformer_source, generator, parent.id if parent else None))
-        logging.debug(f"Created datatype {name} ({generator if generator else f'Inherits from {parent.name}'}, {'read transformer' if read_transformer_source else 'no read transformer'}, {'write transformer' if write_transformer_source else 'no write transformer'})")
-        return Datatype(self, self.cursor.lastrowid, name, read_transformer_source, write_transformer_source, generator, parent.id if parent else None)
+    def create_datatype(self, name: str, read_transformer_source: str = None, write_transformer_source: str = None, generator: str = None, parent: Datatype = None, native: str = None) -> Datatype:
+        """ Creates new datatype and returns Datatype object. Native datatypes (e.g. date or decimal(2)) use a built-in codec. """
+        if native:
+            generator = get_native_codec(native).generator
+        self.cursor.execute("INSERT INTO structure_datatype (name, read_transformer_source, write_transformer_source, generator, parent_id, native) VALUES (?, ?, ?, ?, ?, ?)", (name, read_transformer_source, write_transformer_source, generator, parent.id if parent else None, native))
+        logging.debug(f"Created datatype {name} ({f'Native {native}' if native else generator if generator else f'Inherits from {parent.name}'}, {'read transformer' if read_transformer_source else 'no read transformer'}, {'write transformer' if write_transformer_source else 'no write transformer'})")
+        return Datatype(self, self.cursor.lastrowid, name, read_transformer_source, write_transformer_source, generator, parent.id if parent else None, native)
     
-    @cache
+    @instance_cache
     def get_datatype(self, key: int | str) -> Datatype:
         """ Reads a datatype from the database by its ID or name and returns a Datatype object """
         condition, parameters = create_condition(key)
         self.cursor.execute(f"SELECT * FROM structure_datatype WHERE {condition}", parameters)
         res = self.cursor.fetchone()
         if res:
-            return Datatype(self, res['id'], res['name'], res['read_transformer_source'], res['write_transformer_source'], res['generator'], res['parent_id'])
+            return Datatype(self, res['id'], res['name'], res['read_transformer_source'], res['write_transformer_source'], res['generator'], res['parent_id'], res['native'] if 'native' in res.keys() else None)
         else:
             raise KeyError(f'Datatype {parameters[0]} not found')
     #endregion
 
     #region Class
-    def create_class(self, name: str, traced: bool = True, parent: Class = None):
-        """ Creates new class and returns Class object """
-        self.cursor.execute(f"CREATE TABLE {get_data_table_name(name)} (id INTEGER, version INTEGER, created DATETIME, PRIMARY KEY(id, version))")
-        if parent:
-            self.cursor.execute("INSERT INTO structure_class (name, traced, parent_id) VALUES (?, ?, ?)", (name, bool_to_int(traced), parent.id))
-        else:
-            self.cursor.execute("INSERT INTO structure_class (name, traced) VALUES (?, ?)", (name, bool_to_int(traced)))
-        logging.debug(f"Created new{' traced' if traced else ''} class {name}{f' as subclass of {parent.name}' if parent else ''}")
-        return Class(self, self.cursor.lastrowid, name, traced, parent.id if parent else None)
+    def create_class(self, name: str, traced: bool = True, parent: Class = None, single_table: bool = False):
+        """ Creates new class and returns Class object. A root class with single_table stores the attributes of its whole family tree in its own table. """
+        if single_table and parent:
+            raise ValueError(f'Class {name} is not a root class and can not store its family tree in a single table')
+        if not (parent and parent.get_family_tree()[0].single_table):
+            self.cursor.execute(f"CREATE TABLE {get_data_table_name(name)} (id INTEGER, version INTEGER, created DATETIME, PRIMARY KEY(id, version))")
+        self.cursor.execute("INSERT INTO structure_class (name, traced, parent_id, single_table) VALUES (?, ?, ?, ?)", (name, bool_to_int(traced), parent.id if parent else None, bool_to_int(single_table)))
+        class_id = self.cursor.lastrowid
+        self.create_views([*(parent.get_family_tree() if parent else []), class_id])
+        logging.debug(f"Created new{' traced' if traced else ''} class {name}{f' as subclass of {parent.name}' if parent else ''}{' (single table)' if single_table else ''}")
+        return self.get_class(class_id)
     
-    @cache
+    @instance_cache
     def get_class(self, key: int | str):
         """ Reads a class from the database by its ID or name and returns a Class object """
         condition, parameters = create_condition(key)
         self.cursor.execute(f"SELECT * FROM structure_class WHERE {condition}", parameters)
         res = self.cursor.fetchone()
         if res:
-            return Class(self, res['id'], res['name'], int_to_bool(res['traced']), res['parent_id'])
+            return Class(self, res['id'], res['name'], int_to_bool(res['traced']), res['parent_id'], int_to_bool(res['single_table']) if 'single_table' in res.keys() else False)
         else:
             raise KeyError(f'Class {parameters[0]} not found')
     
-    def assign_attribute_to_class(self, class_: Class | int | str, attribute: Attribute | int | str, indexed: bool = False, read_transformer_source: str = None, write_transformer_source: str = None) -> AttributeAssignment:
-        """ Assigns given attribute to given class and return AttributeAssignment object """
+    def assign_attribute_to_class(self, class_: Class | int | str, attribute: Attribute | int | str, indexed: bool = False, read_transformer_source: str = None, write_transformer_source: str = None, deferred: bool = False) -> AttributeAssignment:
+        """ Assigns given attribute to given class and return AttributeAssignment object. Deferred attributes are not loaded with the object but on first access. """
         class_ = self.parse_class(class_)
         attribute = self.parse_attribute(attribute)
-        self.cursor.execute(f"ALTER TABLE {get_data_table_name(class_.name)} ADD COLUMN {attribute.name} {attribute.get_datatype().get_generator()}")
+        table_name = class_.get_table_name()
+
+        # Subclasses in a single table share the column of an attribute
+        self.cursor.execute(f"SELECT 1 FROM pragma_table_info('{table_name}') WHERE name = ?", (attribute.name,))
+        if not self.cursor.fetchone():
+            self.cursor.execute(f"ALTER TABLE {table_name} ADD COLUMN {attribute.name} {attribute.get_datatype().get_generator()}")
         if indexed:
-            self.cursor.execute(f"CREATE INDEX {get_index_name(class_.name, attribute.name)} ON {get_data_table_name(class_.name)}({attribute.name})")
-        self.cursor.execute("INSERT INTO structure_attribute_assignment (class_id, attribute_id, indexed, read_transformer_source, write_transformer_source) VALUES (?, ?, ?, ?, ?)", (class_.id, attribute.id, indexed, read_transformer_source, write_transformer_source))
-        logging.debug(f'Assigned {attribute.name} to {class_.name}')
-        return AttributeAssignment(self, class_.id, attribute.id, indexed, read_transformer_source, write_transformer_source)
+            self.cursor.execute(f"CREATE INDEX {get_index_name(class_.name, attribute.name)} ON {table_name}({attribute.name})")
+        self.cursor.execute("INSERT INTO structure_attribute_assignment (class_id, attribute_id, indexed, deferred, read_transformer_source, write_transformer_source) VALUES (?, ?, ?, ?, ?, ?)", (class_.id, attribute.id, indexed, bool_to_int(deferred), read_transformer_source, write_transformer_source))
+        self.create_views([class_, *class_.get_children(True)])
+        logging.debug(f"Assigned {attribute.name}{' (deferred)' if deferred else ''} to {class_.name}")
+        return AttributeAssignment(self, class_.id, attribute.id, indexed, read_transformer_source, write_transformer_source, deferred)
     
-    @cache
+    def create_index(self, class_: Class | int | str, attribute_names: list, covering_attribute_names: list = None, name: str = None) -> str:
+        """ Creates an index over attributes of a class stored in one table, optionally with covering attributes, and returns its name """
+        class_ = self.parse_class(class_)
+        covering_attribute_names = covering_attribute_names if covering_attribute_names else []
+        table_names = set()
+        for attribute_name in [*attribute_names, *covering_attribute_names]:
+            assignment = class_.get_attribute_assignment(attribute_name)
+            if assignment is None:
+                raise KeyError(f'Invalid attribute {attribute_name}')
+            table_names.add(assignment.get_class().get_table_name())
+        if len(table_names) != 1:
+            raise ValueError(f"Index attributes {', '.join(attribute_names)} of class {class_.name} are stored in different tables")
+        name = name if name else get_index_name(class_.name, '_'.join(attribute_names))
+        table_name = table_names.pop()
+        self.cursor.execute(f"CREATE INDEX {name} ON {table_name}({', '.join([*attribute_names, *covering_attribute_names])})")
+        self.cursor.execute("INSERT INTO structure_index (name, class_id, columns, covering_columns) VALUES (?, ?, ?, ?)", (name, class_.id, ','.join(attribute_names), ','.join(covering_attribute_names) if covering_attribute_names else None))
+        logging.debug(f'Created index {name} on {table_name}')
+        return name
+
+    def create_search_index(self, class_: Class | int | str, attribute_names: list):
+        """ Creates the full-text index (FTS5) over the given attributes of a class and its subclasses and fills it with the current values """
+        class_ = self.parse_class(class_)
+        for attribute_name in attribute_names:
+            if class_.get_attribute_assignment(attribute_name) is None:
+                raise KeyError(f'Invalid attribute {attribute_name}')
+        if len(class_.get_search_attribute_names()) > 0:
+            raise ValueError(f'Class {class_.name} already has a search index')
+        self.cursor.execute(f"CREATE VIRTUAL TABLE {get_search_table_name(class_.name)} USING fts5({', '.join(attribute_names)})")
+        self.cursor.execute("INSERT INTO structure_search (class_id, columns) VALUES (?, ?)", (class_.id, ','.join(attribute_names)))
+        self.clear_cache()
+        self.rebuild_search_index(class_)
+        logging.debug(f"Created search index on {class_.name} ({', '.join(attribute_names)})")
+
+    @instance_cache
+    def get_search_attribute_names(self, class_: Class | int | str) -> list:
+        """ Returns the names of the attributes in the full-text index of the given class (empty if the class has none) """
+        class_ = self.parse_class(class_)
+        try:
+            self.cursor.execute("SELECT columns FROM structure_search WHERE class_id = ?", (class_.id,))
+        except sqlite3.OperationalError:
+            return []
+        res = self.cursor.fetchone()
+        return res['columns'].split(',') if res else []
+
+    def rebuild_search_index(self, class_: Class | int | str):
+        """ Refills the full-text index of the given class with the current values of all its and its subclasses' objects """
+        class_ = self.parse_class(class_)
+        self.get_search_attribute_names.cache_clear()
+        self.cursor.execute(f"DELETE FROM {get_search_table_name(class_.name)}")
+        for current_class in [class_, *class_.get_children(True)]:
+            self.__write_search_index__(current_class, class_)
+
+    def __get_class_view_definition__(self, class_: Class, attribute_names: list = None) -> str:
+        """ Returns the select statement of the view of a class (optionally only joining the tables of the given attributes) """
+        strs_joins = []
+        strs_cols = ['data_meta.id AS __object_id__', 'data_meta.class_id AS __class_id__', 'data_meta.status AS __status__']
+        for table_name, table_attribute_names in class_.get_storage_layout():
+            table_attribute_names = [name for name in table_attribute_names if attribute_names is None or name in attribute_names]
+            if len(table_attribute_names) > 0:
+                strs_joins.append(f'LEFT JOIN {table_name} ON data_meta.id = {table_name}.id AND data_meta.current_version = {table_name}.version')
+                strs_cols.extend(f'{table_name}.{name} AS {name}' for name in table_attribute_names)
+        class_ids = [class_.id, *[c.id for c in class_.get_children(True)]]
+        return f"SELECT {', '.join(strs_cols)} FROM data_meta {' '.join(strs_joins)} WHERE data_meta.class_id IN ({', '.join(str(id) for id in class_ids)})"
+
+    def create_views(self, classes: list = None):
+        """ (Re)creates the persisted views of the given classes (all if None). Needs to be called after each change of the structure for the affected classes. """
+        class_ids = [class_ if isinstance(class_, int) else self.parse_class(class_).id for class_ in classes] if classes is not None else None
+        self.clear_cache()
+        if class_ids is None:
+            self.cursor.execute("SELECT id FROM structure_class")
+            class_ids = [row['id'] for row in self.cursor.fetchall()]
+        for class_ in [self.get_class(class_id) for class_id in class_ids]:
+            self.cursor.execute(f"DROP VIEW IF EXISTS {class_.get_view_name()}")
+            self.cursor.execute(f"CREATE VIEW {class_.get_view_name()} AS {self.__get_class_view_definition__(class_)}")
+        self.get_view_names.cache_clear()
+
+    @instance_cache
+    def get_view_names(self) -> set:
+        """ Returns the names of the existing class views """
+        self.cursor.execute("SELECT name FROM sqlite_schema WHERE type = 'view'")
+        return set(row['name'] for row in self.cursor.fetchall())
+
+    @instance_cache
     def get_child_classes(self, class_: Class | int | str):
         """ Returns the classes that have the given class as parent """
         class_ = self.parse_class(class_)
         self.cursor.execute("SELECT id FROM structure_class WHERE parent_id = ?", (class_.id,))
         return [self.get_class(row['id']) for row in self.cursor.fetchall()]
     
-    @cache
+    @instance_cache
     def get_attribute_assignments(self, class_: Class | int | str) -> list:
         """ Retrieves attributes assigned to a class from the database """
         class_ = self.parse_class(class_)
         self.cursor.execute("SELECT * FROM structure_attribute_assignment WHERE class_id = ?", (class_.id,))
-        return [AttributeAssignment(self, class_.id, row['attribute_id'], row['indexed'], row['read_transformer_source'], row['write_transformer_source']) for row in self.cursor.fetchall()]
+        return [AttributeAssignment(self, class_.id, row['attribute_id'], row['indexed'], row['read_transformer_source'], row['write_transformer_source'], int_to_bool(row['deferred']) if 'deferred' in row.keys() else False) for row in self.cursor.fetchall()]
     
-    @cache
+    @instance_cache
     def get_references(self, class_: Class | int | str, by_target_class: bool = False) -> list:
         """ Retrieves the references of the given class from the database. The given class can be the origin or the target class. """
         class_ = self.parse_class(class_)
@@ -186,7 +355,7 @@ class ObjectInterface:
         logging.debug(f'Created new attribute {name}')
         return Attribute(self, self.cursor.lastrowid, name, datatype.id)
 
-    @cache
+    @instance_cache
     def get_attribute(self, key: int | str):
         """ Reads an attribute from the database by its ID or name and returns an Attribute object """
         condition, parameters = create_condition(key)
@@ -204,11 +373,12 @@ class ObjectInterface:
         origin_class = self.parse_class(origin_class)
         target_class = self.parse_class(target_class)
         self.cursor.execute("INSERT INTO structure_reference (name, origin_class_id, target_class_id, cardinality) VALUES (?, ?, ?, ?)", (name, origin_class.id, target_class.id, cardinality))
-        self.cursor.execute(f"CREATE TABLE {get_reference_table_name(name)} (origin_id INTEGER REFERENCES data_meta(id), target_id INTEGER REFERENCES data_meta(id), version INTEGER, created DATETIME DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY(origin_id, target_id, version))")
+        for sql in get_reference_table_statements(name):
+            self.cursor.execute(sql)
         logging.debug(f'Created new reference {name} between class {origin_class.name} and {target_class.name}')
         return Reference(self, self.cursor.lastrowid, name, origin_class, target_class, cardinality)
 
-    @cache
+    @instance_cache
     def get_reference(self, key: int | str):
         """ Reads a reference from the database by its ID or name and returns a Reference object """
         condition, parameters = create_condition(key)
@@ -227,11 +397,17 @@ class ObjectInterface:
         creation_time = datetime.now()
         self.cursor.execute("INSERT INTO data_meta (class_id, created) VALUES (?, ?) RETURNING id, status, current_version", (class_.id, creation_time))
         meta = self.cursor.fetchone()
+        self.__log_changes__([(meta['id'], class_.id, CHANGE_CREATE, meta['current_version'], None)])
         return Object(self, meta['id'], class_, meta['status'], creation_time, meta['current_version'], meta['current_version'], **{a.name: None for a in class_.get_assigned_attributes(True)})
 
     def __set_object_status__(self, object_: Object, status: int):
-        """ Sets the status of the given object """
-        self.cursor.execute('UPDATE data_meta SET status = ? WHERE id = ?', (status, object_.id))
+        """ Sets the status of the given object. Within a session, the change is recorded and written on flush. """
+        if self.__session__ is not None:
+            self.__session__.record_status(object_, status)
+        else:
+            self.cursor.execute('UPDATE data_meta SET status = ? WHERE id = ?', (status, object_.id))
+            self.__log_changes__([(object_.id, object_.get_class().id, CHANGE_STATUS, object_.current_version, {'status': status})])
+        self.__hop_cache__.invalidate_targets([object_.id])
         object_.status = status
 
     def activate(self, object_: Object):
@@ -256,61 +432,84 @@ class ObjectInterface:
         return object_
     
     def modify(self, object_: Object, **attributes) -> Object:
-        """ Modifies the given objects with the given attributes """
-        raw_attributes = {}
+        """ Modifies the given objects with the given attributes. Within a session, the modification is recorded and written on flush. """
+        class_ = object_.get_class()
 
-        # Get next version number
-        self.cursor.execute('SELECT current_version FROM data_meta WHERE id = ?', (object_.id,))
-        current_version = self.cursor.fetchone()['current_version']
-        new_version = current_version + 1
+        # Transform given attributes for insertion into database
+        raw_attributes = {k: class_.get_attribute_assignment(k).transform_write_processed_to_raw_value(v, object_) for k, v in attributes.items() if class_.get_attribute_assignment(k) is not None}
+        if self.__session__ is not None:
+            self.__session__.record_modification(object_, raw_attributes)
+            object_.update_raw_attributes(**raw_attributes)
+        else:
+            self.__write_modifications__([(object_, raw_attributes)])
+        return object_
 
-        for current_class in object_.get_class().get_family_tree():
-            table_name = get_data_table_name(current_class.name)
+    def __write_modifications__(self, modifications: list):
+        """ Writes a new version per modified object in bulk in a savepoint, raises a ConflictError if a version was changed concurrently """
+        with self.__savepoint__('modify'):
+            # Claim the next versions
+            current_versions = {object_.id: object_.current_version for object_, _ in modifications}
+            for id, version in current_versions.items():
+                self.cursor.execute('UPDATE data_meta SET current_version = ? WHERE id = ? AND current_version = ?', (version + 1, id, version))
+                if self.cursor.rowcount == 0:
+                    raise ConflictError(f'Object {id} was modified concurrently (expected version {version})', [id])
 
-            # Get attributes that are assigned to the current class and are given as parameter and transform them for insertion into database
-            class_attribute_names = [a.name for a in current_class.get_assigned_attributes()]
-            current_attributes = {k: current_class.get_attribute_assignment(k).transform_write_processed_to_raw_value(v, object_) for k, v in attributes.items() if k in class_attribute_names}
+            modifications_by_class = {}
+            for object_, raw_attributes in modifications:
+                modifications_by_class.setdefault(object_.get_class().id, []).append((object_, raw_attributes))
+            creation_time = datetime.now()
+            for class_modifications in modifications_by_class.values():
+                class_ = class_modifications[0][0].get_class()
+                for table_name, class_attribute_names, statements in class_.get_table_statements():
 
-            # Add transformed attributes to raw attribute dict
-            raw_attributes.update(current_attributes)
-            
-            # Insert / Update attributes
-            if current_attributes:
-
-                # Get columns to adopt from current version
-                cols_to_adopt = [col for col in class_attribute_names if col not in current_attributes.keys()]
-                if len(cols_to_adopt) > 0:
-                    self.cursor.execute(f"SELECT {', '.join(cols_to_adopt)} FROM {table_name} WHERE id = ? AND version = ?", (object_.id, current_version))
-                    values_to_adopt = self.cursor.fetchone()
-                    if values_to_adopt:
-                        current_attributes.update(dict(values_to_adopt))
-
-                # Insert new version
-                str_cols = ', '.join(current_attributes.keys())
-                str_placeholder = ', '.join(['?'] * len(current_attributes.keys()))
-                self.cursor.execute(f"INSERT INTO {table_name} (id, version, created, {str_cols}) VALUES (?, ?, ?, {str_placeholder})", (object_.id, new_version, datetime.now(), *current_attributes.values()))
-
-                # Delete previous version if class is not traced
-                if not object_.get_class().traced and current_version > 0:
-                    self.cursor.execute(f"DELETE FROM {table_name} WHERE id = ? AND version <= ?", (object_.id, current_version))
-
-            # No changes => Just update version
-            else:
-                self.cursor.execute(f'UPDATE {table_name} SET version = ? WHERE id = ? AND version = ?', (new_version, object_.id, current_version))
+                    # Get attributes that are stored in the current table
+                    changes = [(object_, {k: v for k, v in raw_attributes.items() if k in class_attribute_names}) for object_, raw_attributes in class_modifications]
+                    changed = [(object_, current_attributes) for object_, current_attributes in changes if current_attributes]
+                    unchanged_ids = [object_.id for object_, current_attributes in changes if not current_attributes]
+
+                    # Insert new versions with the columns adopted from the current versions
+                    if changed:
+                        adopted_values = {}
+                        for chunk in chunk_list([object_.id for object_, _ in changed if current_versions[object_.id] > 0], BULK_CHUNK_SIZE):
+                            self.cursor.execute(class_.get_adopt_sql(table_name, len(chunk)), chunk)
+                            for row in self.cursor.fetchall():
+                                adopted_values[row[0]] = row
+                        self.cursor.executemany(statements['insert_version'], [
+                            (object_.id, current_versions[object_.id] + 1, creation_time, *[current_attributes[name] if name in current_attributes else adopted_values[object_.id][name] if object_.id in adopted_values else None for name in class_attribute_names])
+                            for object_, current_attributes in changed])
+
+                        # Delete previous versions if class is not traced
+                        if not class_.traced:
+                            self.cursor.executemany(statements['delete_previous'], [(object_.id, current_versions[object_.id]) for object_, _ in changed if current_versions[object_.id] > 0])
+
+                    # No changes => Just update version
+                    if unchanged_ids:
+                        self.cursor.executemany(statements['update_version'], [(current_versions[id] + 1, id, current_versions[id]) for id in unchanged_ids])
+
+            self.__hop_cache__.invalidate_targets([object_.id for object_, _ in modifications])
+
+            # Update full-text indexes containing modified attributes
+            for class_modifications in modifications_by_class.values():
+                class_ = class_modifications[0][0].get_class()
+                for current_class in class_.get_family_tree():
+                    search_attribute_names = current_class.get_search_attribute_names()
+                    search_ids = [object_.id for object_, raw_attributes in class_modifications if any(name in raw_attributes for name in search_attribute_names)]
+                    if search_ids:
+                        self.cursor.executemany(current_class.get_search_delete_sql(), [(id,) for id in search_ids])
+                        self.__write_search_index__(class_, current_class, search_ids)
+
+            self.__log_changes__([(object_.id, object_.get_class().id, CHANGE_MODIFY, current_versions[object_.id] + 1, {'attributes': {name: encode_change_value(value) for name, value in raw_attributes.items()}}) for object_, raw_attributes in modifications])
+
+        for object_, raw_attributes in modifications:
+            object_.update_raw_attributes(**raw_attributes)
+            object_.current_version = current_versions[object_.id] + 1
+            object_.version = object_.current_version
 
-        # Set new version to the current version
-        self.cursor.execute('UPDATE data_meta SET current_version = ? WHERE id = ?', (new_version, object_.id))
-        object_.update_raw_attributes(**raw_attributes)
-        object_.current_version = new_version
-        object_.version = new_version
-        return object_
-    
     def get_version_times(self, object_: Object) -> dict:
         """ Returns the creation times of an objects versions as a dict """
         version_times = {}
-        for current_class in object_.get_class().get_family_tree():
-            table_name = get_data_table_name(current_class.name)
-            self.cursor.execute(f"SELECT version, created FROM {table_name} WHERE id = ?", (object_.id,))
+        for _, _, statements in object_.get_class().get_table_statements():
+            self.cursor.execute(statements['version_times'], (object_.id,))
             for row in self.cursor.fetchall():
                 version, time = row['version'], parse_sqlite_datetime(row['created'])
                 if version in version_times.keys():
@@ -319,20 +518,88 @@ class ObjectInterface:
                     version_times[version] = [time]
         return {k: min(v) for k, v in version_times.items()}
 
-    def __get_class_view_sql__(self, class_: Class):
-        strs_joins = []
-        strs_cols = []
-        for current_class in class_.get_family_tree():
-            class_attributes = current_class.get_assigned_attributes()
-            table_name = get_data_table_name(current_class.name)
-            strs_joins.append(f'LEFT JOIN {table_name} ON data_meta.id = {table_name}.id AND data_meta.current_version = {table_name}.version')
-            strs_cols.append(', '.join([f'{table_name}.{a.name}' for a in class_attributes]))
-        str_joins = ' '.join(strs_joins)
-        str_cols = ', '.join(strs_cols)
-        return f'SELECT {str_cols} FROM data_meta {str_joins} WHERE data_meta.class_id = {class_.id}'
+    def open_attribute_blob(self, object_: Object, attribute_name: str, readonly: bool = True):
+        """ Opens the current value of a BLOB attribute of the given object for incremental I/O """
+        assignment = object_.get_class().get_attribute_assignment(attribute_name)
+        if assignment is None:
+            raise KeyError(f'Invalid attribute {attribute_name}')
+        table_name = assignment.get_class().get_table_name()
+        self.cursor.execute(f"SELECT rowid FROM {table_name} WHERE id = ? AND version = (SELECT current_version FROM data_meta WHERE id = ?)", (object_.id, object_.id))
+        res = self.cursor.fetchone()
+        if not res:
+            raise KeyError(f'No current value of {attribute_name} for object {object_.id}')
+        return self.connection.blobopen(table_name, attribute_name, res[0], readonly=readonly)
+
+    def read_array(self, object_: Object, attribute_name: str, start: int = None, stop: int = None) -> np.ndarray:
+        """ Reads the rows start to stop (first axis) of a native ndarray attribute without loading the whole blob. Transformers are not applied. """
+        with self.__open_array_blob__(object_, attribute_name) as blob:
+            dtype, shape, data_offset = self.__read_array_header__(blob)
+            if len(shape) == 0:
+                return np.frombuffer(blob.read(), dtype).reshape(shape)
+
+            # Read requested rows only
+            start, stop, _ = slice(start, stop).indices(shape[0])
+            stop = max(start, stop)
+            row_size = dtype.itemsize * int(np.prod(shape[1:], dtype=np.int64))
+            blob.seek(data_offset + start * row_size)
+            return np.frombuffer(blob.read((stop - start) * row_size), dtype).reshape((stop - start, *shape[1:]))
+
+    def iterate_array(self, object_: Object, attribute_name: str, rows_per_chunk: int):
+        """ Streams a native ndarray attribute in chunks of rows (first axis), reading the blob sequentially while it is open """
+        with self.__open_array_blob__(object_, attribute_name) as blob:
+            dtype, shape, _ = self.__read_array_header__(blob)
+            if len(shape) == 0:
+                return
+            row_size = dtype.itemsize * int(np.prod(shape[1:], dtype=np.int64))
+            for start in range(0, shape[0], rows_per_chunk):
+                n_rows = min(rows_per_chunk, shape[0] - start)
+                yield np.frombuffer(blob.read(n_rows * row_size), dtype).reshape((n_rows, *shape[1:]))
+
+    def __open_array_blob__(self, object_: Object, attribute_name: str) -> sqlite3.Blob:
+        """ Opens the blob of a native ndarray attribute for reading """
+        assignment = object_.get_class().get_attribute_assignment(attribute_name)
+        if assignment is None:
+            raise KeyError(f'Invalid attribute {attribute_name}')
+        if assignment.get_attribute().get_datatype().get_native() != 'ndarray':
+            raise ValueError(f'Attribute {attribute_name} is not a native ndarray attribute')
+        return self.open_attribute_blob(object_, attribute_name)
+
+    def __read_array_header__(self, blob: sqlite3.Blob) -> tuple:
+        """ Reads the header of an array blob and returns dtype, shape and the offset of the data """
+        header_length, = struct.unpack(ARRAY_HEADER_LENGTH_FORMAT, blob.read(ARRAY_HEADER_LENGTH_SIZE))
+        dtype, shape = parse_array_header(blob.read(header_length))
+        return dtype, shape, ARRAY_HEADER_LENGTH_SIZE + header_length
+
+    @instance_cache
+    def __get_meta_sql__(self, count: int) -> str:
+        """ Returns the statement reading the meta data of the given number of objects """
+        return f"SELECT * FROM data_meta WHERE id {get_in_condition(count)}"
+
+    def __get_class_view_sql__(self, class_: Class, attribute_names: list = None, recursive: bool = False):
+        """ Returns the sql selecting the current attribute values of the instances of the given class """
+        str_cols = ''.join(f', {name}' for name in class_.get_attribute_names() if attribute_names is None or name in attribute_names)
+        layout = [names for _, names in class_.get_storage_layout() if len(names) > 0]
+        if class_.get_view_name() in self.get_view_names() and all(attribute_names is None or any(name in attribute_names for name in names) for names in layout):
+            str_source = class_.get_view_name()
+        else:
+            str_source = f'({self.__get_class_view_definition__(class_, attribute_names)})'
+        if recursive:
+            return f"SELECT __object_id__{str_cols} FROM {str_source} WHERE __class_id__ IN ({', '.join(str(c.id) for c in [class_, *class_.get_children(True)])})"
+        return f'SELECT __object_id__{str_cols} FROM {str_source} WHERE __class_id__ = {class_.id}'
+
+    def __read_raw_attributes__(self, class_: Class, ids: list, attribute_names: list = None) -> dict:
+        """ Reads the current raw attributes of the given instances of a class in chunks and returns them as dict by object id """
+        raw_attributes = {}
+        attribute_names = tuple(attribute_names) if attribute_names is not None else None
+        for chunk in chunk_list(ids, BULK_CHUNK_SIZE):
+            self.cursor.execute(class_.get_view_sql(attribute_names, False, len(chunk)), chunk)
+            for row in self.cursor.fetchall():
+                values = dict(row)
+                raw_attributes[values.pop('__object_id__')] = values
+        return raw_attributes
         
-    def get_object(self, id: int) -> Object:
-        """ Reads the object with given id from database. Optionally, a snapshot time can be specified. """
+    def get_object(self, id: int, deferred: list = None) -> Object:
+        """ Reads the object with given id from database. Deferred attributes (by assignment or given names) are loaded on first access. """
 
         # Get meta data
         self.cursor.execute('SELECT * FROM data_meta WHERE id = ?', (id,))
@@ -344,92 +611,597 @@ class ObjectInterface:
         class_ = self.get_class(meta['class_id'])
 
         # Get attributes
-        self.cursor.execute(f"{self.__get_class_view_sql__(class_)} AND data_meta.id = ?", (id,))
-        return Object(self, id, class_, meta['status'], parse_sqlite_datetime(meta['created']), meta['current_version'], meta['current_version'], **dict(self.cursor.fetchone()))
+        raw_attributes = self.__read_raw_attributes__(class_, [id], class_.get_loaded_attribute_names(deferred))[id]
+        return Object(self, id, class_, meta['status'], parse_sqlite_datetime(meta['created']), meta['current_version'], meta['current_version'], **raw_attributes)
+
+    def get_objects(self, ids: list, attribute_names: list = None, deferred: list = None, prefetch: list = None) -> ObjectList:
+        """ Reads the objects with the given ids in bulk and returns them in the given order """
+
+        # Get meta data
+        metas = {}
+        for chunk in chunk_list(ids, BULK_CHUNK_SIZE):
+            self.cursor.execute(self.__get_meta_sql__(len(chunk)), chunk)
+            metas.update({row['id']: row for row in self.cursor.fetchall()})
+
+        # Get attributes per class
+        ids_by_class = {}
+        for meta in metas.values():
+            ids_by_class.setdefault(meta['class_id'], []).append(meta['id'])
+        raw_attributes = {}
+        for class_id, class_ids in ids_by_class.items():
+            class_ = self.get_class(class_id)
+            raw_attributes.update(self.__read_raw_attributes__(class_, class_ids, attribute_names if attribute_names is not None else class_.get_loaded_attribute_names(deferred)))
+
+        # Create objects
+        objects = []
+        for id in ids:
+            meta = metas.get(id)
+            if meta:
+                objects.append(Object(self, id, self.get_class(meta['class_id']), meta['status'], parse_sqlite_datetime(meta['created']), meta['current_version'], meta['current_version'], **raw_attributes.get(id, {})))
+        if prefetch:
+            self.prefetch(objects, prefetch)
+        return self.create_object_list(objects)
     
-    def bind(self, reference: Reference | int | str, origin: Object, targets: list, rebind: bool = False):
-        """ Binds two objects using the given reference """
+    def load_attributes(self, objects: list, attribute_names: list = None):
+        """ Loads the given or all not yet loaded attributes of the given objects in bulk (one query per class and chunk) """
+        objects_by_class = {}
+        for object_ in objects:
+            objects_by_class.setdefault(object_.get_class().id, []).append(object_)
+        for class_objects in objects_by_class.values():
+            class_ = class_objects[0].get_class()
+            class_attribute_names = [a.name for a in class_.get_assigned_attributes(True) if attribute_names is None or a.name in attribute_names]
+            missing_attribute_names = [name for name in class_attribute_names if any(not object_.is_loaded(name) for object_ in class_objects)]
+            if len(missing_attribute_names) > 0:
+                raw_attributes = self.__read_raw_attributes__(class_, [object_.id for object_ in class_objects], missing_attribute_names)
+                for object_ in class_objects:
+                    object_.update_raw_attributes(**{k: v for k, v in raw_attributes.get(object_.id, {k: None for k in missing_attribute_names}).items() if not object_.is_loaded(k)})
+
+    def bind(self, reference: Reference | int | str, origin: Object, targets: list, rebind: bool = False, version: int = None):
+        """ Binds two objects using the given reference, raises a ConflictError if the given version of the binding is outdated """
         reference = self.parse_reference(reference)
+        origin.clear_prefetched(reference.id)
+        self.__hop_cache__.invalidate_origin(reference.id, origin.id)
+        if self.__session__ is not None:
+            if version is not None:
+                raise ValueError('Versioned bindings are not supported within a session')
+            self.__session__.record_bind(reference, origin, targets, rebind)
+            return
 
-        # Check cardinality
-        if reference.cardinality is not None:
-            if reference.cardinality < len(targets):
-                raise ValueError(f'{len(targets)} objects can not be linked via reference with cardinality {reference.cardinality}.')
-            elif rebind == False:
-                current_bound_objects = len(origin.hop(reference))
-                if reference.cardinality < len(targets) + current_bound_objects:
-                    raise ValueError(f'{current_bound_objects} objects are already linked via reference. {len(targets)} others can not be linked with cardinality {reference.cardinality}. Use a rebind instead.')
-
-        # Get current and next version number
-        self.cursor.execute('INSERT OR IGNORE INTO structure_reference_version (reference_id, origin_object_id) VALUES (?, ?)', (reference.id, origin.id))
-        self.cursor.execute('SELECT current_version FROM structure_reference_version WHERE reference_id = ? AND origin_object_id = ?', (reference.id, origin.id))
-        current_version = self.cursor.fetchone()['current_version']
-        new_version = current_version + 1
-
-        # Update version of already bound objects
-        table_name = get_reference_table_name(reference.name)
-        if not rebind:
-            self.cursor.execute(f"UPDATE {table_name} SET version = ? WHERE origin_id = ? RETURNING target_id", (new_version, origin.id))
+        with self.__savepoint__('bind'):
+            # Get current and next version number (the insert starts the write transaction, the following reads are consistent)
+            statements = reference.get_statements()
+            self.cursor.execute(statements['insert_version'], (reference.id, origin.id))
+            self.cursor.execute(statements['current_version'], (reference.id, origin.id))
+            current_version = self.cursor.fetchone()['current_version']
+            new_version = current_version + 1
+            if version is not None and version != current_version:
+                raise ConflictError(f'Binding of object {origin.id} via reference {reference.name} was changed concurrently (expected version {version}, found {current_version})', [origin.id])
+
+            # Check cardinality
+            if reference.cardinality is not None:
+                if reference.cardinality < len(targets):
+                    raise ValueError(f'{len(targets)} objects can not be linked via reference with cardinality {reference.cardinality}.')
+                elif rebind == False:
+                    self.cursor.execute(statements['count_bound'], (reference.id, origin.id))
+                    current_bound_objects = self.cursor.fetchone()['n']
+                    if reference.cardinality < len(targets) + current_bound_objects:
+                        raise ValueError(f'{current_bound_objects} objects are already linked via reference. {len(targets)} others can not be linked with cardinality {reference.cardinality}. Use a rebind instead.')
+
+            # Copy already bound objects to the new version
+            if not rebind:
+                self.cursor.execute(statements['copy_bound'], (new_version, origin.id, current_version))
             
-            # Remove already bound objects from objects to bind
-            current_target_ids = [row['target_id'] for row in self.cursor.fetchall()]
-            if len(current_target_ids) > 0:
-                targets = [t for t in targets if t.id not in current_target_ids]
+                # Remove already bound objects from objects to bind
+                current_target_ids = [row['target_id'] for row in self.cursor.fetchall()]
+                if len(current_target_ids) > 0:
+                    targets = [t for t in targets if t.id not in current_target_ids]
         
-        # Insert targets
-        if len(targets) > 0:
-            self.cursor.executemany(f"INSERT INTO {table_name} (origin_id, target_id, version) VALUES (?, ?, ?)", ((origin.id, target.id, new_version) for target in targets))
-
-        # Delete previous version if origin class is not traced
-        origin_class = reference.get_origin_class()
-        if not origin_class.traced and current_version > 0:
-            self.cursor.execute(f"DELETE FROM {table_name} WHERE origin_id = ? AND version <= ?", (origin_class.id, current_version))
+            # Insert targets
+            if len(targets) > 0:
+                self.cursor.executemany(statements['insert_targets'], ((origin.id, target.id, new_version) for target in targets))
+
+            # Delete previous version if origin class is not traced
+            if not reference.get_origin_class().traced and current_version > 0:
+                self.cursor.execute(statements['delete_previous'], (origin.id, current_version))
         
-        # Apply new version
-        self.cursor.execute("UPDATE structure_reference_version SET current_version = ? WHERE reference_id = ? AND origin_object_id = ?", (new_version, reference.id, origin.id))
+            # Apply new version
+            self.cursor.execute(statements['set_version'], (new_version, reference.id, origin.id, current_version))
+            if self.cursor.rowcount == 0:
+                raise ConflictError(f'Binding of object {origin.id} via reference {reference.name} was changed concurrently', [origin.id])
+            self.__log_changes__([(origin.id, origin.get_class().id, CHANGE_BIND, new_version, {'reference': reference.name, 'targets': [*(current_target_ids if not rebind else []), *[target.id for target in targets]]})])
+
+    @contextmanager
+    def __savepoint__(self, name: str):
+        """ Rolls back the statements of the block if it raises, the transaction itself stays open """
+        if not self.connection.in_transaction:
+            self.cursor.execute('BEGIN')
+        self.cursor.execute(f'SAVEPOINT {name}')
+        try:
+            yield
+        except BaseException:
+
+            # The transaction may already be rolled back as a whole (e.g. by RAISE(ROLLBACK))
+            if self.connection.in_transaction:
+                self.cursor.execute(f'ROLLBACK TO {name}')
+                self.cursor.execute(f'RELEASE {name}')
+
+            # Only committed hops are cached, targets prefetched within the transaction expire
+            self.__hop_cache__.expire_stamps()
+            raise
+        self.cursor.execute(f'RELEASE {name}')
+
+    def get_reference_version(self, reference: Reference | int | str, origin: Object) -> int:
+        """ Returns the current version of the binding of the given origin object (0 if never bound) """
+        reference = self.parse_reference(reference)
+        self.cursor.execute(reference.get_statements()['current_version'], (reference.id, origin.id))
+        res = self.cursor.fetchone()
+        return res['current_version'] if res else 0
+
+    def bind_many(self, reference: Reference | int | str, bindings: dict, rebind: bool = False, versions: dict = None):
+        """ Binds the targets to their origins ({origin: targets}) using the given reference in bulk, raises a ConflictError if one of the given versions ({origin: version}) is outdated """
+        reference = self.parse_reference(reference)
+        for origin in bindings.keys():
+            origin.clear_prefetched(reference.id)
+            self.__hop_cache__.invalidate_origin(reference.id, origin.id)
+        if self.__session__ is not None:
+            if versions:
+                raise ValueError('Versioned bindings are not supported within a session')
+            for origin, targets in bindings.items():
+                self.__session__.record_bind(reference, origin, targets, rebind)
+            return
+        target_ids_by_origin = {origin.id: list(dict.fromkeys(target.id for target in targets)) for origin, targets in bindings.items()}
+        origin_ids = list(target_ids_by_origin.keys())
+
+        # Check cardinality
+        if reference.cardinality is not None:
+            for origin_id, target_ids in target_ids_by_origin.items():
+                if reference.cardinality < len(target_ids):
+                    raise ValueError(f'{len(target_ids)} objects can not be linked to object {origin_id} via reference with cardinality {reference.cardinality}.')
+            if rebind == False:
+                for chunk in chunk_list(origin_ids, BULK_CHUNK_SIZE):
+                    self.cursor.execute(reference.get_bound_count_sql(len(chunk)), chunk)
+                    for row in self.cursor.fetchall():
+                        n_targets = len(target_ids_by_origin[row['origin_id']])
+                        if reference.cardinality < n_targets + row['n']:
+                            raise ValueError(f"{row['n']} objects are already linked to object {row['origin_id']} via reference. {n_targets} others can not be linked with cardinality {reference.cardinality}. Use a rebind instead.")
+
+        with self.__savepoint__('bind_many'):
+            # Get current version numbers
+            statements = reference.get_statements()
+            self.cursor.executemany(statements['insert_version'], ((reference.id, origin_id) for origin_id in origin_ids))
+            current_versions = {}
+            for chunk in chunk_list(origin_ids, BULK_CHUNK_SIZE):
+                self.cursor.execute(reference.get_current_versions_sql(len(chunk)), chunk)
+                current_versions.update({row['origin_object_id']: row['current_version'] for row in self.cursor.fetchall()})
+            if versions:
+                conflict_ids = [origin.id for origin, version in versions.items() if current_versions[origin.id] != version]
+                if len(conflict_ids) > 0:
+                    raise ConflictError(f'Bindings via reference {reference.name} were changed concurrently', conflict_ids)
+
+            # Carry already bound objects over to the new versions
+            if not rebind:
+                for chunk in chunk_list(origin_ids, BULK_CHUNK_SIZE):
+                    self.cursor.execute(reference.get_hop_ids_sql(len(chunk), False), chunk)
+                    for row in self.cursor.fetchall():
+                        target_ids_by_origin[row[0]].append(row[1])
+                target_ids_by_origin = {origin_id: list(dict.fromkeys(target_ids)) for origin_id, target_ids in target_ids_by_origin.items()}
+
+            # Insert links
+            self.cursor.executemany(statements['insert_targets'], ((origin_id, target_id, current_versions[origin_id] + 1) for origin_id, target_ids in target_ids_by_origin.items() for target_id in target_ids))
+
+            # Delete previous versions if origin class is not traced
+            if not reference.get_origin_class().traced:
+                self.cursor.executemany(statements['delete_previous'], ((origin_id, current_versions[origin_id]) for origin_id in origin_ids if current_versions[origin_id] > 0))
+
+            # Apply new versions
+            self.cursor.executemany(statements['set_version'], ((current_versions[origin_id] + 1, reference.id, origin_id, current_versions[origin_id]) for origin_id in origin_ids))
+            if self.cursor.rowcount < len(origin_ids):
+                raise ConflictError(f'Bindings via reference {reference.name} were changed concurrently', origin_ids)
+            self.__log_changes__([(origin.id, origin.get_class().id, CHANGE_BIND, current_versions[origin.id] + 1, {'reference': reference.name, 'targets': target_ids_by_origin[origin.id]}) for origin in bindings.keys()])
 
     def hop(self, reference: Reference | int | str, origin: Object, version: int = None, only_active_objects: bool = True) -> ObjectList:
         """ Returns objects referenced to the origin objects by the give reference """
         reference = self.parse_reference(reference)
+        cached = not version and only_active_objects
+        if cached:
+
+            self.__check_hop_cache__()
+
+            # Prefetched targets, unless the binding or a target was changed since
+            prefetched = origin.get_prefetched(reference.id)
+            if prefetched is not None:
+                targets, stamp = prefetched
+                if self.__hop_cache__.is_valid(reference.id, origin.id, targets, stamp):
+                    return self.create_object_list([target for target in targets if target.is_active()])
+                origin.clear_prefetched(reference.id)
+            targets = self.__hop_cache__.get(reference.id, origin.id)
+            if targets is not None:
+                return self.create_object_list([target for target in targets if target.is_active()])
 
         # Get current version
+        statements = reference.get_statements()
         if not version:
-            self.cursor.execute('SELECT current_version FROM structure_reference_version WHERE reference_id = ? AND origin_object_id = ?', (reference.id, origin.id))
+            self.cursor.execute(statements['current_version'], (reference.id, origin.id))
             res = self.cursor.fetchone()
-            if not res:
-                return self.create_object_list()
-            version = res['current_version']
+            version = res['current_version'] if res else 0
+        if version:
+            self.cursor.execute(statements['hop'], (origin.id, version))
+            objects = self.get_objects([row['target_id'] for row in self.cursor.fetchall()])
+        else:
+            objects = self.create_object_list()
 
-        # Get referenced objects
-        table_name = get_reference_table_name(reference.name)
-        self.cursor.execute(f"SELECT target_id FROM {table_name} WHERE origin_id = ? AND version = ?", (origin.id, version))
-        objects = [self.get_object(row['target_id']) for row in self.cursor.fetchall()]
+        # Uncommitted changes of this connection are not cached, inactive targets are cached to be invalidated by their activation
+        if cached and not self.connection.in_transaction:
+            self.__hop_cache__.put(reference.id, origin.id, version, objects)
         if only_active_objects:
-            return self.create_object_list([object_ for object_ in objects if object_.is_active()])
+            objects = self.create_object_list([object_ for object_ in objects if object_.is_active()])
+        return objects
+
+    def __check_hop_cache__(self):
+        """ Clears the hop cache if another connection committed changes """
+        self.cursor.execute('PRAGMA data_version')
+        self.__hop_cache__.check(self.cursor.fetchone()[0])
+
+    def hop_ids(self, reference: Reference | int | str, origin_ids: list, only_active_objects: bool = True) -> list:
+        """ Returns the ids of the objects currently referenced to the given origin objects (in bulk, without reading objects), ordered by origin and without duplicates """
+        reference = self.parse_reference(reference)
+        target_ids_by_origin = self.__get_target_ids__(reference, origin_ids, only_active_objects)
+        return list(dict.fromkeys(target_id for origin_id in origin_ids for target_id in target_ids_by_origin.get(origin_id, [])))
+
+    def __get_target_ids__(self, reference: Reference, origin_ids: list, only_active_objects: bool = True) -> dict:
+        """ Returns the ids of the objects currently referenced to the given origin objects by origin id (one query per chunk) """
+        target_ids_by_origin = {}
+        for chunk in chunk_list(list(dict.fromkeys(origin_ids)), BULK_CHUNK_SIZE):
+            self.cursor.execute(reference.get_hop_ids_sql(len(chunk), only_active_objects), chunk)
+            for row in self.cursor.fetchall():
+                target_ids_by_origin.setdefault(row[0], []).append(row[1])
+        return target_ids_by_origin
+
+    def prefetch(self, objects: list, paths: list):
+        """ Reads the targets of the given reference paths (e.g. ['employer', 'employer.address']) in bulk, so that hops are served from memory """
+        tree = {}
+        for path in paths:
+            node = tree
+            for name in path.split('.'):
+                node = node.setdefault(name, {})
+        self.__prefetch__(list(objects), tree)
+
+    def __prefetch__(self, objects: list, tree: dict):
+        for name, subtree in tree.items():
+            reference = self.parse_reference(name)
+            self.__check_hop_cache__()
+            stamp = self.__hop_cache__.get_stamp()
+            target_ids_by_origin = self.__get_target_ids__(reference, [object_.id for object_ in objects], False)
+            target_ids = list(dict.fromkeys(target_id for target_ids in target_ids_by_origin.values() for target_id in target_ids))
+            targets = {target.id: target for target in self.get_objects(target_ids)}
+            for object_ in objects:
+                object_.set_prefetched(reference.id, [targets[id] for id in target_ids_by_origin.get(object_.id, []) if id in targets], stamp)
+            active_targets = [target for target in targets.values() if target.is_active()]
+            if len(subtree) > 0 and len(active_targets) > 0:
+                self.__prefetch__(active_targets, subtree)
+
+    def __write_search_index__(self, class_: Class, search_class: Class, ids: list = None):
+        """ Inserts the current values of the given (or all) instances of a class into the full-text index of the given class of its family tree """
+        if ids is None:
+            self.cursor.execute(class_.get_search_insert_sql(search_class))
         else:
-            return self.create_object_list(objects)
-        
-    def get_instances(self, class_: Class | int | str, recursive: bool = False, only_active_objects: bool = True) -> ObjectList:
-        """ Returns all objects of the given class """
+            for chunk in chunk_list(ids, BULK_CHUNK_SIZE):
+                self.cursor.execute(class_.get_search_insert_sql(search_class, len(chunk)), chunk)
+
+    def search(self, class_: Class | int | str, query: str, limit: int = 20, recursive: bool = True, only_active_objects: bool = True, prefetch: list = None) -> ObjectList:
+        """ Returns the objects of the given class matching the full-text query (FTS5 syntax), ordered by relevance """
         class_ = self.parse_class(class_)
+        search_class = class_.get_search_class()
+        if search_class is None:
+            raise KeyError(f'Class {class_.name} has no search index')
+        table_name = get_search_table_name(search_class.name)
+        class_ids = [class_.id, *[c.id for c in class_.get_children(True)]] if recursive else [class_.id]
+        str_status = f' AND data_meta.status = {STATUS_ACTIVE}' if only_active_objects else ''
+        self.cursor.execute(f"SELECT {table_name}.rowid AS id FROM {table_name} JOIN data_meta ON data_meta.id = {table_name}.rowid WHERE {table_name} MATCH ? AND data_meta.class_id IN ({', '.join(['?'] * len(class_ids))}){str_status} ORDER BY {table_name}.rank LIMIT ?", (query, *class_ids, limit))
+        return self.get_objects([row['id'] for row in self.cursor.fetchall()], prefetch=prefetch)
+
+    def __get_instances_condition__(self, class_: Class, recursive: bool = False, only_active_objects: bool = True):
+        """ Returns the condition and parameters to select the instances of the given class from data_meta """
+        parameters = [class_.id, *[c.id for c in class_.get_children(True)]] if recursive else [class_.id]
+        condition = f"class_id IN ({', '.join(['?'] * len(parameters))})"
+        if only_active_objects:
+            condition += f' AND status = {STATUS_ACTIVE}'
+        return condition, parameters
         
-        # Get sql
-        status_condition = '' if only_active_objects else f' AND status = {STATUS_ACTIVE}'
-        if recursive:
-            parameters = [class_.id, *[c.id for c in class_.get_children(True)]]
-            sql = f"SELECT id FROM data_meta WHERE class_id IN ({', '.join(['?'] * len(parameters))}){status_condition}"
+    def get_instances(self, class_: Class | int | str, recursive: bool = False, only_active_objects: bool = True, deferred: list = None, prefetch: list = None) -> LazyObjectList:
+        """ Returns all objects of the given class as a LazyObjectList (an ObjectList holding only the ids), read in pages on first access """
+        class_ = self.parse_class(class_)
+        condition, parameters = self.__get_instances_condition__(class_, recursive, only_active_objects)
+        query = (f"SELECT id FROM data_meta WHERE {condition} ORDER BY id", tuple(parameters))
+        self.cursor.execute(*query)
+        return self.create_lazy_object_list([row['id'] for row in self.cursor.fetchall()], query, deferred=deferred, prefetch=prefetch)
+
+    def count_instances(self, class_: Class | int | str, recursive: bool = False, only_active_objects: bool = True) -> int:
+        """ Returns the number of objects of the given class """
+        class_ = self.parse_class(class_)
+        condition, parameters = self.__get_instances_condition__(class_, recursive, only_active_objects)
+        self.cursor.execute(f"SELECT COUNT(*) AS n FROM data_meta WHERE {condition}", parameters)
+        return self.cursor.fetchone()['n']
+
+    def aggregate(self, class_: Class | int | str, group_by: list = None, metrics: dict = None, where: dict | str = None, parameters: list = None, recursive: bool = False, only_active_objects: bool = True) -> list:
+        """ Aggregates the attribute values of the objects of the given class in SQL and returns one dict per group """
+        class_ = self.parse_class(class_)
+        group_by = group_by if group_by else []
+        metrics = metrics if metrics else {'n': count()}
+
+        # Condition: attribute values (lists for IN) or sql over the attribute names
+        if isinstance(where, str):
+            where_attribute_names = [name for name in class_.get_attribute_names() if re.search(rf'\b{name}\b', where)]
         else:
-            sql = f"SELECT id FROM data_meta WHERE class_id = ?{status_condition}"
-            parameters = [class_.id]
-        
-        # Get object ids
-        self.cursor.execute(sql, parameters)
-        object_ids = [row['id'] for row in self.cursor.fetchall()]
+            where_attribute_names = list(where.keys()) if where else []
+
+        # Check attributes
+        assignments = {}
+        for name in [*group_by, *[m.attribute_name for m in metrics.values() if m.attribute_name], *where_attribute_names]:
+            assignment = class_.get_attribute_assignment(name)
+            if assignment is None:
+                raise KeyError(f'Invalid attribute {name}')
+            if assignment.read_transformer_source:
+                raise ValueError(f'Attribute {name} is computed by a read transformer and can not be aggregated')
+            assignments[name] = assignment
 
-        # Return object list
-        return self.create_object_list([self.get_object(id) for id in object_ids])
+        # Conditions
+        strs_conditions = []
+        condition_parameters = []
+        if isinstance(where, str):
+            strs_conditions.append(f'({where})')
+            condition_parameters.extend(parameters if parameters else [])
+        elif where:
+            for name, value in where.items():
+                if value is None:
+                    strs_conditions.append(f'{name} IS NULL')
+                elif isinstance(value, (list, tuple, set)):
+                    strs_conditions.append(f"{name} IN ({', '.join(['?'] * len(value))})")
+                    condition_parameters.extend(assignments[name].transform_write_processed_to_raw_value(v, None) for v in value)
+                else:
+                    strs_conditions.append(f'{name} = ?')
+                    condition_parameters.append(assignments[name].transform_write_processed_to_raw_value(value, None))
+
+        # Aggregate over the class view
+        view_sql = self.__get_class_view_sql__(class_, list(assignments.keys()), recursive)
+        if only_active_objects:
+            view_sql += f' AND __status__ = {STATUS_ACTIVE}'
+        str_cols = ', '.join([*group_by, *[f'{metric.get_sql()} AS "{key}"' for key, metric in metrics.items()]])
+        str_where = f" WHERE {' AND '.join(strs_conditions)}" if len(strs_conditions) > 0 else ''
+        str_group_by = f" GROUP BY {', '.join(group_by)} ORDER BY {', '.join(group_by)}" if len(group_by) > 0 else ''
+        self.cursor.execute(f"SELECT {str_cols} FROM ({view_sql}){str_where}{str_group_by}", condition_parameters)
+
+        # Transform aggregated values
+        transformed_names = {**{name: name for name in group_by}, **{key: metric.attribute_name for key, metric in metrics.items() if metric.transformed and metric.attribute_name}}
+        rows = []
+        for row in self.cursor.fetchall():
+            values = dict(row)
+            for key, name in transformed_names.items():
+                if values[key] is not None:
+                    values[key] = assignments[name].datatype_transform_read_value(values[key])
+            rows.append(values)
+        return rows
+
+    def get_instances_page(self, class_: Class | int | str, limit: int, after_id: int = None, before_id: int = None, recursive: bool = False, only_active_objects: bool = True, attribute_names: list = None, prefetch: list = None) -> ObjectList:
+        """ Returns a page of objects of the given class ordered by id (keyset paging after after_id or before before_id) """
+        class_ = self.parse_class(class_)
+        condition, parameters = self.__get_instances_condition__(class_, recursive, only_active_objects)
+        if before_id is not None:
+            self.cursor.execute(f"SELECT id FROM data_meta WHERE {condition} AND id < ? ORDER BY id DESC LIMIT ?", (*parameters, before_id, limit))
+            object_ids = [row['id'] for row in self.cursor.fetchall()][::-1]
+        else:
+            self.cursor.execute(f"SELECT id FROM data_meta WHERE {condition} AND id > ? ORDER BY id LIMIT ?", (*parameters, after_id if after_id is not None else 0, limit))
+            object_ids = [row['id'] for row in self.cursor.fetchall()]
+        return self.get_objects(object_ids, attribute_names, prefetch=prefetch)
+    #endregion
+
+    #region Export
+    def get_export_attribute_names(self, class_: Class | int | str, recursive: bool = False) -> list:
+        """ Returns the names of the exported attributes of a class, including those of its subclasses if recursive """
+        class_ = self.parse_class(class_)
+        classes = [class_, *class_.get_children(True)] if recursive else [class_]
+        return list(dict.fromkeys(name for current_class in classes for name in current_class.get_attribute_names()))
+
+    def iter_instance_rows(self, class_: Class | int | str, recursive: bool = False, only_active_objects: bool = True, snapshot_time: datetime = None, chunk_size: int = EXPORT_CHUNK_SIZE):
+        """ Streams the transformed attribute values of the objects of the given class in chunks of dicts, optionally at a snapshot time """
+        class_ = self.parse_class(class_)
+        attribute_names = self.get_export_attribute_names(class_, recursive)
+        sql, parameters = self.__get_export_sql__(class_, recursive, only_active_objects, snapshot_time)
+        cursor = self.connection.execute(sql, parameters)
+        try:
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if len(rows) == 0:
+                    break
+                yield [self.__transform_export_row__(row, attribute_names) for row in rows]
+        finally:
+            cursor.close()
+
+    def __get_export_sql__(self, class_: Class, recursive: bool, only_active_objects: bool, snapshot_time: datetime) -> tuple:
+        """ Returns the statement and parameters reading object id, class id, status and attribute values of the instances of a class (current or at the snapshot time) """
+        classes = [class_, *class_.get_children(True)] if recursive else [class_]
+        class_ids = [current_class.id for current_class in classes]
+
+        # Tables of all exported classes, attributes stored in several tables (siblings) are coalesced
+        columns = {}
+        table_names = []
+        for current_class in classes:
+            for table_name, table_attribute_names in current_class.get_storage_layout():
+                if table_name not in table_names:
+                    table_names.append(table_name)
+                    for name in table_attribute_names:
+                        columns.setdefault(name, []).append(f'{table_name}.{name}')
+        strs_cols = ['data_meta.id AS __object_id__', 'data_meta.class_id AS __class_id__']
+        parameters = []
+
+        # Current versions or versions valid at the snapshot time (latest version created before)
+        if snapshot_time is None:
+            strs_cols.append('data_meta.status AS __status__')
+            strs_joins = [f'LEFT JOIN {table_name} ON {table_name}.id = data_meta.id AND {table_name}.version = data_meta.current_version' for table_name in table_names]
+            str_created = ''
+        else:
+            strs_cols.append(f'{self.__get_snapshot_status_sql__()} AS __status__')
+            parameters.extend([snapshot_time] if self.has_change_feed() else [])
+            strs_joins = [f'LEFT JOIN {table_name} ON {table_name}.id = data_meta.id AND {table_name}.version = (SELECT MAX(snapshot.version) FROM {table_name} AS snapshot WHERE snapshot.id = data_meta.id AND snapshot.created <= ?)' for table_name in table_names]
+            parameters.extend([snapshot_time] * len(table_names))
+            str_created = ' AND data_meta.created <= ?'
+        strs_cols.extend(f'{sources[0]} AS {name}' if len(sources) == 1 else f"COALESCE({', '.join(sources)}) AS {name}" for name, sources in columns.items())
+        parameters.extend(class_ids)
+        if snapshot_time is not None:
+            parameters.append(snapshot_time)
+        str_status = f' WHERE __status__ = {STATUS_ACTIVE}' if only_active_objects else ''
+        return f"SELECT * FROM (SELECT {', '.join(strs_cols)} FROM data_meta {' '.join(strs_joins)} WHERE data_meta.class_id {get_in_condition(len(class_ids))}{str_created}){str_status} ORDER BY __object_id__", parameters
+
+    def __get_snapshot_status_sql__(self) -> str:
+        """ Returns the expression of the status of an object at the snapshot time (parameter), reconstructed from the change feed """
+        if not self.has_change_feed():
+            return 'data_meta.status'
+
+        # Last status change before, in creation if only the creation was logged before, active if the object is older than the feed, otherwise the current status
+        return f"""COALESCE((SELECT json_extract(change.data, '$.status') FROM data_change AS change WHERE change.object_id = data_meta.id AND change.kind = '{CHANGE_STATUS}' AND change.time <= ? ORDER BY change.id DESC LIMIT 1), CASE WHEN EXISTS (SELECT 1 FROM data_change AS change WHERE change.object_id = data_meta.id AND change.kind = '{CHANGE_CREATE}') THEN {STATUS_IN_CREATION} WHEN EXISTS (SELECT 1 FROM data_change AS change WHERE change.object_id = data_meta.id AND change.kind = '{CHANGE_STATUS}') THEN {STATUS_ACTIVE} ELSE data_meta.status END)"""
+
+    def __transform_export_row__(self, row: sqlite3.Row, attribute_names: list) -> dict:
+        """ Applies the read transformers to the attribute values of an exported row. Only transformers depending on the object need a (temporary) object. """
+        class_ = self.get_class(row['__class_id__'])
+        values = {'id': row['__object_id__']}
+        object_ = None
+        for name in attribute_names:
+            assignment = class_.get_attribute_assignment(name)
+            if assignment is None:
+                values[name] = None
+            elif assignment.read_transformer_source:
+                if object_ is None:
+                    object_ = Object(self, row['__object_id__'], class_, row['__status__'], None, None, None, **{name: row[name] for name in class_.get_attribute_names()})
+                values[name] = object_[name]
+            else:
+                values[name] = assignment.datatype_transform_read_value(row[name])
+        return values
     #endregion
 
-    def create_object_list(self, objects: list = []) -> ObjectList:
+    #region Purge
+    def purge(self, stale_after: timedelta = timedelta(days=1), chunk_size: int = BULK_CHUNK_SIZE) -> dict:
+        """ Physically removes deleted and stale objects in chunks with a commit after each chunk and returns the numbers of removed rows """
+        if self.__session__ is not None:
+            raise ValueError('Purge not possible within an active session')
+        if self.connection.in_transaction:
+            raise ValueError('Purge not possible within an open transaction')
+        self.cursor.execute('PRAGMA freelist_count')
+        free_pages = self.cursor.fetchone()[0]
+        stale_time = datetime.now() - stale_after
+        reclaimed = {'objects': 0, 'versions': 0, 'links': 0, 'reference_versions': 0, 'search_entries': 0, 'rebound_origins': 0}
+        self.cursor.execute('SELECT id FROM structure_class ORDER BY id')
+        for class_ in [self.get_class(row['id']) for row in self.cursor.fetchall()]:
+            for status, condition, parameters in ((STATUS_DELETED, '', ()), (STATUS_IN_CREATION, ' AND created < ?', (stale_time,))):
+                last_id = 0
+                while True:
+                    self.cursor.execute(f"SELECT id FROM data_meta WHERE class_id = ? AND status = ?{condition} AND id > ? ORDER BY id LIMIT ?", (class_.id, status, *parameters, last_id, chunk_size))
+                    ids = [row['id'] for row in self.cursor.fetchall()]
+                    if len(ids) == 0:
+                        break
+                    for key, n in self.__purge_objects__(class_, ids).items():
+                        reclaimed[key] += n
+                    self.commit()
+                    last_id = ids[-1]
+        self.__hop_cache__.clear()
+        self.cursor.execute('PRAGMA freelist_count')
+        reclaimed['freed_pages'] = self.cursor.fetchone()[0] - free_pages
+        logging.info(f"Purged {reclaimed['objects']} objects ({', '.join(f'{n} {key}' for key, n in reclaimed.items() if key != 'objects')})")
+        return reclaimed
+
+    def __purge_objects__(self, class_: Class, ids: list) -> dict:
+        """ Removes the rows of the given objects of a class from all tables and returns the numbers of removed rows """
+        str_in = get_in_condition(len(ids))
+        reclaimed = {'objects': 0, 'versions': 0, 'links': 0, 'reference_versions': 0, 'search_entries': 0, 'rebound_origins': 0}
+        for table_name, _ in class_.get_storage_layout():
+            self.cursor.execute(f"DELETE FROM {table_name} WHERE id {str_in}", ids)
+            reclaimed['versions'] += self.cursor.rowcount
+        for reference in class_.get_references(recursive=True):
+            self.cursor.execute(f"DELETE FROM {get_reference_table_name(reference.name)} WHERE origin_id {str_in}", ids)
+            reclaimed['links'] += self.cursor.rowcount
+            self.cursor.execute(f"DELETE FROM structure_reference_version WHERE reference_id = ? AND origin_object_id {str_in}", (reference.id, *ids))
+            reclaimed['reference_versions'] += self.cursor.rowcount
+        for reference in class_.get_references(by_target_class=True, recursive=True):
+            if not reference.get_origin_class().traced:
+                for key, n in self.__purge_targets__(reference, ids).items():
+                    reclaimed[key] += n
+        for search_class in class_.get_family_tree():
+            if len(search_class.get_search_attribute_names()) > 0:
+                self.cursor.execute(f"DELETE FROM {get_search_table_name(search_class.name)} WHERE rowid {str_in}", ids)
+                reclaimed['search_entries'] += self.cursor.rowcount
+        self.cursor.execute(f"DELETE FROM data_meta WHERE id {str_in}", ids)
+        reclaimed['objects'] += self.cursor.rowcount
+        self.__log_changes__([(id, class_.id, CHANGE_PURGE, None, None) for id in ids])
+        self.__hop_cache__.invalidate_targets(ids)
+        return reclaimed
+
+    def __purge_targets__(self, reference: Reference, ids: list) -> dict:
+        """ Removes the links to the given objects from an untraced reference and bumps the reference versions of the affected origins (traced references keep their history, missing targets drop out of hops) """
+        table_name = get_reference_table_name(reference.name)
+        str_in = get_in_condition(len(ids))
+        self.cursor.execute(f"SELECT DISTINCT {table_name}.origin_id, data_meta.class_id FROM {table_name} JOIN data_meta ON data_meta.id = {table_name}.origin_id WHERE {table_name}.target_id {str_in}", ids)
+        origin_class_ids = {row[0]: row[1] for row in self.cursor.fetchall()}
+        self.cursor.execute(f"DELETE FROM {table_name} WHERE target_id {str_in}", ids)
+        n_links = self.cursor.rowcount
+        for chunk in chunk_list(list(origin_class_ids.keys()), BULK_CHUNK_SIZE):
+            str_origin_in = get_in_condition(len(chunk))
+            self.cursor.execute(f"UPDATE {table_name} SET version = version + 1 WHERE origin_id {str_origin_in}", chunk)
+            self.cursor.execute(f"UPDATE structure_reference_version SET current_version = current_version + 1 WHERE reference_id = ? AND origin_object_id {str_origin_in} RETURNING origin_object_id, current_version", (reference.id, *chunk))
+            versions = {row[0]: row[1] for row in self.cursor.fetchall()}
+            target_ids_by_origin = self.__get_target_ids__(reference, chunk, False)
+            self.__log_changes__([(origin_id, origin_class_ids[origin_id], CHANGE_BIND, versions.get(origin_id), {'reference': reference.name, 'targets': target_ids_by_origin.get(origin_id, [])}) for origin_id in chunk])
+            for origin_id in chunk:
+                self.__hop_cache__.invalidate_origin(reference.id, origin_id)
+        return {'links': n_links, 'rebound_origins': len(origin_class_ids)}
+    #endregion
+
+    #region Changes
+    @instance_cache
+    def has_change_feed(self) -> bool:
+        """ Returns whether the database has the change feed table (databases created before it need a migration) """
+        self.cursor.execute("SELECT 1 FROM sqlite_schema WHERE type = 'table' AND name = 'data_change'")
+        return self.cursor.fetchone() is not None
+
+    def __log_changes__(self, changes: list):
+        """ Appends the given changes to the change feed: (object id, class id, kind, version, data) """
+        if len(changes) > 0 and self.has_change_feed():
+            change_time = datetime.now()
+            self.cursor.executemany("INSERT INTO data_change (time, object_id, class_id, kind, version, data) VALUES (?, ?, ?, ?, ?, ?)", ((change_time, object_id, class_id, kind, version, json.dumps(data, default=str) if data is not None else None) for object_id, class_id, kind, version, data in changes))
+
+    def changes_since(self, cursor: int = 0, batch_size: int = BULK_CHUNK_SIZE) -> tuple:
+        """ Returns the next changes after the given cursor and the cursor to continue with """
+        self.cursor.execute("SELECT * FROM data_change WHERE id > ? ORDER BY id LIMIT ?", (cursor, batch_size))
+        changes = []
+        for row in self.cursor.fetchall():
+            change = dict(row)
+            change['data'] = json.loads(change['data']) if change['data'] is not None else None
+            changes.append(change)
+        return changes, changes[-1]['id'] if len(changes) > 0 else cursor
+
+    def acknowledge_changes(self, consumer: str, cursor: int):
+        """ Stores the cursor up to which the given consumer has processed the changes """
+        self.cursor.execute("INSERT INTO data_change_consumer (name, cursor) VALUES (?, ?) ON CONFLICT (name) DO UPDATE SET cursor = MAX(cursor, excluded.cursor)", (consumer, cursor))
+
+    def get_change_cursor(self, consumer: str) -> int:
+        """ Returns the cursor up to which the given consumer has processed the changes (0 if unknown) """
+        self.cursor.execute("SELECT cursor FROM data_change_consumer WHERE name = ?", (consumer,))
+        res = self.cursor.fetchone()
+        return res['cursor'] if res else 0
+
+    def prune_changes(self, cursor: int = None) -> int:
+        """ Removes the changes up to the given cursor, by default those processed by all consumers, and returns their number """
+        if cursor is None:
+            self.cursor.execute("SELECT MIN(cursor) AS cursor FROM data_change_consumer")
+            cursor = self.cursor.fetchone()['cursor']
+            if cursor is None:
+                return 0
+        self.cursor.execute("DELETE FROM data_change WHERE id <= ?", (cursor,))
+        return self.cursor.rowcount
+    #endregion
+
+    def create_object_list(self, objects: list = None) -> ObjectList:
         """ Creates ObjectList object from the given list of Object instances """
         return ObjectList(self, objects)
+
+    def create_lazy_object_list(self, ids: list, query: tuple = None, attribute_names: list = None, deferred: list = None, prefetch: list = None) -> LazyObjectList:
+        """ Creates a LazyObjectList from the given object ids (and the query that selected them), the objects are read on first access """
+        return LazyObjectList(self, ids, query, attribute_names, deferred, prefetch)
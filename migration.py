@@ -0,0 +1,273 @@
+from interface import ObjectInterface
+from ddl import Interpreter, Schema
+from programmability.native import get_native_codec
+from utils import get_data_table_name, get_reference_table_name, get_reference_table_statements, get_search_table_name, get_view_name, get_index_name, bool_to_int, int_to_bool
+import logging
+
+# Columns added to the structure tables after the first release: (table, column, definition)
+STRUCTURE_UPGRADES = [
+    ('structure_datatype', 'native', 'TEXT'),
+    ('structure_attribute_assignment', 'deferred', 'TINYINT NOT NULL DEFAULT 0'),
+    ('structure_class', 'single_table', 'TINYINT NOT NULL DEFAULT 0')
+]
+
+# Structure tables and indexes added after the first release: (name, statement)
+STRUCTURE_OBJECTS = [
+    ('structure_index', "CREATE TABLE structure_index (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE NOT NULL, class_id INTEGER REFERENCES structure_class(id), columns TEXT NOT NULL, covering_columns TEXT)"),
+    ('structure_search', "CREATE TABLE structure_search (class_id INTEGER PRIMARY KEY REFERENCES structure_class(id), columns TEXT NOT NULL)"),
+    ('data_meta_class_status', "CREATE INDEX data_meta_class_status ON data_meta(class_id, status)"),
+    ('data_change', "CREATE TABLE data_change (id INTEGER PRIMARY KEY AUTOINCREMENT, \"time\" DATETIME, object_id INTEGER, class_id INTEGER, kind TEXT NOT NULL, version INTEGER, data TEXT)"),
+    ('data_change_consumer', "CREATE TABLE data_change_consumer (name TEXT PRIMARY KEY, cursor INTEGER NOT NULL DEFAULT 0)"),
+    ('data_change_object', "CREATE INDEX data_change_object ON data_change(object_id, kind)")
+]
+
+def is_native_upgrade(current, datatype) -> bool:
+    """ Returns whether a transformer based root datatype switches to a native type with the same generator (the stored values must already use its format, e.g. dates as DATE text) """
+    return current['native'] is None and current['parent_name'] is None and datatype.native is not None and datatype.parent_name is None and (current['generator'] or '').upper() == get_native_codec(datatype.native).generator
+
+class MigrationPlan:
+    """ Delta between a ddl script and the live structure: new elements are built from the delta schema, changes of existing elements are executed as single statements (or callables for data-dependent steps) """
+    def __init__(self) -> None:
+        self.schema = Schema()
+        self.steps = []
+        self.descriptions = []
+        self.conflicts = []
+
+    def add_step(self, description: str, sql, parameters: tuple = ()):
+        self.steps.append((sql, parameters))
+        self.descriptions.append(description)
+
+    def is_empty(self) -> bool:
+        return len(self.descriptions) == 0
+
+    def __str__(self) -> str:
+        lines = [*self.descriptions, *[f'! {conflict}' for conflict in self.conflicts]]
+        return '\n'.join(lines) if len(lines) > 0 else 'No changes'
+
+class Migrator:
+    """ Applies a ddl script to an existing database by creating and updating only the elements that differ """
+    def __init__(self, interface: ObjectInterface) -> None:
+        self.interface = interface
+        self.interpreter = Interpreter(interface)
+
+    def run(self, text: str, dry_run: bool = False) -> MigrationPlan:
+        """ Plans the migration to the given ddl script, logs the plan and applies it unless dry_run is set """
+        plan = self.plan(self.interpreter.parse(text))
+        for line in str(plan).splitlines():
+            logging.info(f'Migration: {line}')
+        if not dry_run:
+            self.apply(plan)
+        return plan
+
+    def __fetch_by_name__(self, sql: str, key: str = 'name') -> dict:
+        self.interface.cursor.execute(sql)
+        return {row[key]: row for row in self.interface.cursor.fetchall()}
+
+    def __get_table_columns__(self, table_name: str) -> list:
+        self.interface.cursor.execute(f"SELECT name FROM pragma_table_info('{table_name}')")
+        return [row['name'] for row in self.interface.cursor.fetchall()]
+
+    def plan(self, schema: Schema) -> MigrationPlan:
+        """ Compares the given schema model with the live structure tables and returns the migration plan """
+        plan = MigrationPlan()
+        cursor = self.interface.cursor
+
+        # Fehlende Spalten der Strukturtabellen
+        for table_name, column_name, definition in STRUCTURE_UPGRADES:
+            cursor.execute(f"PRAGMA table_info({table_name})")
+            if column_name not in [row['name'] for row in cursor.fetchall()]:
+                plan.add_step(f'+ structure column {table_name}.{column_name}', f"ALTER TABLE {table_name} ADD COLUMN {column_name} {definition}")
+        upgraded_tables = [sql.split()[2] for sql, _ in plan.steps]
+        cursor.execute("SELECT name FROM sqlite_schema")
+        schema_object_names = set(row['name'] for row in cursor.fetchall())
+        for name, sql in STRUCTURE_OBJECTS:
+            if name not in schema_object_names:
+                plan.add_step(f'+ structure object {name}', sql)
+        cursor.execute("SELECT name FROM structure_reference")
+        for row in cursor.fetchall():
+            table_name = get_reference_table_name(row['name'])
+            index_name = get_index_name(table_name, 'origin_version')
+            if index_name not in schema_object_names:
+                plan.add_step(f'+ index {index_name}', get_reference_table_statements(row['name'])[1])
+        native_column = 'datatype.native' if 'structure_datatype' not in upgraded_tables else 'NULL AS native'
+        deferred_column = 'assignment.deferred' if 'structure_attribute_assignment' not in upgraded_tables else '0 AS deferred'
+        single_table_column = 'class.single_table' if 'structure_class' not in upgraded_tables else '0 AS single_table'
+
+        # Live-Struktur lesen
+        datatypes = self.__fetch_by_name__(f"SELECT datatype.name, datatype.generator, datatype.read_transformer_source, datatype.write_transformer_source, {native_column}, parent.name AS parent_name FROM structure_datatype AS datatype LEFT JOIN structure_datatype AS parent ON datatype.parent_id = parent.id")
+        attributes = self.__fetch_by_name__("SELECT attribute.name, datatype.name AS datatype_name FROM structure_attribute AS attribute JOIN structure_datatype AS datatype ON attribute.datatype_id = datatype.id")
+        classes = self.__fetch_by_name__(f"SELECT class.name, class.traced, {single_table_column}, parent.name AS parent_name FROM structure_class AS class LEFT JOIN structure_class AS parent ON class.parent_id = parent.id")
+        references = self.__fetch_by_name__("SELECT reference.name, reference.cardinality, origin.name AS origin_name, target.name AS target_name FROM structure_reference AS reference JOIN structure_class AS origin ON reference.origin_class_id = origin.id JOIN structure_class AS target ON reference.target_class_id = target.id")
+        cursor.execute(f"SELECT class.name AS class_name, attribute.name AS attribute_name, assignment.indexed, {deferred_column}, assignment.read_transformer_source, assignment.write_transformer_source FROM structure_attribute_assignment AS assignment JOIN structure_class AS class ON assignment.class_id = class.id JOIN structure_attribute AS attribute ON assignment.attribute_id = attribute.id")
+        assignments = {(row['class_name'], row['attribute_name']): row for row in cursor.fetchall()}
+        indexes = self.__fetch_by_name__("SELECT name, columns, covering_columns FROM structure_index") if 'structure_index' in schema_object_names else {}
+        searches = self.__fetch_by_name__("SELECT class.name, search.columns FROM structure_search AS search JOIN structure_class AS class ON search.class_id = class.id") if 'structure_search' in schema_object_names else {}
+
+        # Datentypen
+        datatype_definitions = {d.name: d for d in schema.datatypes}
+        for datatype in schema.datatypes:
+            current = datatypes.get(datatype.name)
+            if current is None:
+                plan.schema.datatypes.append(datatype)
+                plan.descriptions.append(f'+ datatype {datatype.name}')
+                continue
+            if is_native_upgrade(current, datatype):
+                plan.add_step(f'~ datatype {datatype.name}: native {datatype.native}', "UPDATE structure_datatype SET native = ? WHERE name = ?", (datatype.native, datatype.name))
+            elif (current['native'], current['parent_name']) != (datatype.native, datatype.parent_name) or (not datatype.native and not datatype.parent_name and current['generator'] != datatype.generator):
+                plan.conflicts.append(f'Datatype {datatype.name} changes its generator, native type or parent')
+            if (current['read_transformer_source'], current['write_transformer_source']) != (datatype.read_transformer_source, datatype.write_transformer_source):
+                plan.add_step(f'~ datatype {datatype.name}: transformers', "UPDATE structure_datatype SET read_transformer_source = ?, write_transformer_source = ? WHERE name = ?", (datatype.read_transformer_source, datatype.write_transformer_source, datatype.name))
+
+        def get_generator(datatype_name: str) -> str:
+            datatype = datatype_definitions.get(datatype_name)
+            if datatype is None:
+                return self.interface.get_datatype(datatype_name).get_generator()
+            elif datatype.native:
+                return get_native_codec(datatype.native).generator
+            elif datatype.generator:
+                return datatype.generator
+            else:
+                return get_generator(datatype.parent_name)
+
+        # Attribute
+        attribute_datatype_names = {name: row['datatype_name'] for name, row in attributes.items()}
+        for attribute in schema.attributes:
+            if attribute.name not in attributes:
+                plan.schema.attributes.append(attribute)
+                plan.descriptions.append(f'+ attribute {attribute.name}: {attribute.datatype_name}')
+                attribute_datatype_names[attribute.name] = attribute.datatype_name
+            elif attributes[attribute.name]['datatype_name'] != attribute.datatype_name:
+                plan.conflicts.append(f'Attribute {attribute.name} changes its datatype')
+
+        # Klassen
+        table_columns = {}
+        for class_ in schema.classes:
+            current = classes.get(class_.name)
+            if current is None:
+                plan.schema.classes.append(class_)
+                plan.descriptions.append(f"+ class {class_.name}{f'({class_.parent_name})' if class_.parent_name else ''}")
+                continue
+            if current['parent_name'] != class_.parent_name:
+                plan.conflicts.append(f'Class {class_.name} changes its parent')
+            if int_to_bool(current['single_table']) != class_.single_table:
+                plan.conflicts.append(f'Class {class_.name} changes its storage mode')
+            if int_to_bool(current['traced']) != class_.traced:
+                plan.add_step(f"~ class {class_.name}: {'traced' if class_.traced else 'not traced'}", "UPDATE structure_class SET traced = ? WHERE name = ?", (bool_to_int(class_.traced), class_.name))
+
+            # Attributzuweisungen
+            table_name = get_data_table_name(self.interpreter.get_storage_class_name(schema, class_.name))
+            for aa in class_.attribute_assignments:
+                index_name = get_index_name(class_.name, aa.attribute_name)
+                current_assignment = assignments.get((class_.name, aa.attribute_name))
+                if current_assignment is None:
+                    if aa.attribute_name not in attribute_datatype_names:
+                        plan.conflicts.append(f'Attribute {aa.attribute_name} not found')
+                        continue
+                    if aa.attribute_name not in table_columns.setdefault(table_name, self.__get_table_columns__(table_name)):
+                        plan.add_step(f'+ column {class_.name}.{aa.attribute_name}', f"ALTER TABLE {table_name} ADD COLUMN {aa.attribute_name} {get_generator(attribute_datatype_names[aa.attribute_name])}")
+                        table_columns[table_name].append(aa.attribute_name)
+                    plan.add_step(f'+ assignment {class_.name}.{aa.attribute_name}', "INSERT INTO structure_attribute_assignment (class_id, attribute_id, indexed, deferred, read_transformer_source, write_transformer_source) VALUES ((SELECT id FROM structure_class WHERE name = ?), (SELECT id FROM structure_attribute WHERE name = ?), ?, ?, ?, ?)", (class_.name, aa.attribute_name, bool_to_int(aa.indexed), bool_to_int(aa.deferred), aa.read_transformer_source, aa.write_transformer_source))
+                    if aa.indexed:
+                        plan.add_step(f'+ index {index_name}', f"CREATE INDEX {index_name} ON {table_name}({aa.attribute_name})")
+                    continue
+                if int_to_bool(current_assignment['indexed']) != aa.indexed:
+                    if aa.indexed:
+                        plan.add_step(f'+ index {index_name}', f"CREATE INDEX {index_name} ON {table_name}({aa.attribute_name})")
+                    else:
+                        plan.add_step(f'- index {index_name}', f"DROP INDEX IF EXISTS {index_name}")
+                if (int_to_bool(current_assignment['indexed']), int_to_bool(current_assignment['deferred']), current_assignment['read_transformer_source'], current_assignment['write_transformer_source']) != (aa.indexed, aa.deferred, aa.read_transformer_source, aa.write_transformer_source):
+                    plan.add_step(f'~ assignment {class_.name}.{aa.attribute_name}', "UPDATE structure_attribute_assignment SET indexed = ?, deferred = ?, read_transformer_source = ?, write_transformer_source = ? WHERE class_id = (SELECT id FROM structure_class WHERE name = ?) AND attribute_id = (SELECT id FROM structure_attribute WHERE name = ?)", (bool_to_int(aa.indexed), bool_to_int(aa.deferred), aa.read_transformer_source, aa.write_transformer_source, class_.name, aa.attribute_name))
+
+            # Indizes
+            for index in class_.indexes:
+                index_name = class_.get_index_name(index)
+                current_index = indexes.get(index_name)
+                columns, covering_columns = ','.join(index.attribute_names), ','.join(index.covering_attribute_names) if index.covering_attribute_names else None
+                if current_index is not None and (current_index['columns'], current_index['covering_columns']) == (columns, covering_columns):
+                    continue
+                try:
+                    index_sql = self.interpreter.get_index_statement(schema, class_, index)
+                except (KeyError, ValueError) as e:
+                    plan.conflicts.append(str(e).strip("'"))
+                    continue
+                if current_index is None:
+                    plan.add_step(f'+ index {index_name}', index_sql)
+                    plan.add_step(f'+ index {index_name}: structure', "INSERT INTO structure_index (name, class_id, columns, covering_columns) VALUES (?, (SELECT id FROM structure_class WHERE name = ?), ?, ?)", (index_name, class_.name, columns, covering_columns))
+                else:
+                    plan.add_step(f'- index {index_name}', f"DROP INDEX IF EXISTS {index_name}")
+                    plan.add_step(f'+ index {index_name}', index_sql)
+                    plan.add_step(f'~ index {index_name}: structure', "UPDATE structure_index SET columns = ?, covering_columns = ? WHERE name = ?", (columns, covering_columns, index_name))
+
+            # Volltextindex
+            current_search = searches.get(class_.name)
+            columns = ','.join(class_.search_attribute_names)
+            search_sql = None
+            if len(class_.search_attribute_names) > 0 and (current_search is None or current_search['columns'] != columns):
+                try:
+                    search_sql = self.interpreter.get_search_statement(schema, class_)
+                except (KeyError, ValueError) as e:
+                    plan.conflicts.append(str(e).strip("'"))
+            if search_sql:
+                search_table_name = get_search_table_name(class_.name)
+                if current_search is None:
+                    plan.add_step(f'+ search index {search_table_name}', search_sql)
+                    plan.add_step(f'+ search index {search_table_name}: structure', "INSERT INTO structure_search (class_id, columns) VALUES ((SELECT id FROM structure_class WHERE name = ?), ?)", (class_.name, columns))
+                else:
+                    plan.add_step(f'- search index {search_table_name}', f"DROP TABLE IF EXISTS {search_table_name}")
+                    plan.add_step(f'+ search index {search_table_name}', search_sql)
+                    plan.add_step(f'~ search index {search_table_name}: structure', "UPDATE structure_search SET columns = ? WHERE class_id = (SELECT id FROM structure_class WHERE name = ?)", (columns, class_.name))
+                plan.add_step(f'~ search index {search_table_name}: fill', self.interface.rebuild_search_index, (class_.name,))
+
+            # Referenzen
+            for reference in class_.references:
+                current_reference = references.get(reference.name)
+                if current_reference is None:
+                    plan.add_step(f'+ reference {reference.name}: {class_.name} -> {reference.target_class_name}', "INSERT INTO structure_reference (name, origin_class_id, target_class_id, cardinality) VALUES (?, (SELECT id FROM structure_class WHERE name = ?), (SELECT id FROM structure_class WHERE name = ?), ?)", (reference.name, class_.name, reference.target_class_name, reference.cardinality))
+                    for sql in get_reference_table_statements(reference.name):
+                        plan.add_step(f'+ {sql.split()[1].lower()} {sql.split()[2]}', sql)
+                elif (current_reference['origin_name'], current_reference['target_name']) != (class_.name, reference.target_class_name):
+                    plan.conflicts.append(f'Reference {reference.name} changes its origin or target class')
+                elif current_reference['cardinality'] != reference.cardinality:
+                    plan.add_step(f'~ reference {reference.name}: cardinality {reference.cardinality}', "UPDATE structure_reference SET cardinality = ? WHERE name = ?", (reference.cardinality, reference.name))
+
+        # Sichten der Klassen neu erzeugen
+        if not plan.is_empty() or any(get_view_name(name) not in schema_object_names for name in classes):
+            plan.add_step('~ class views', self.interface.create_views)
+        return plan
+
+    def apply(self, plan: MigrationPlan):
+        """ Applies the given migration plan in one transaction """
+        if len(plan.conflicts) > 0:
+            raise ValueError(f"Migration not possible: {'; '.join(plan.conflicts)}")
+        if plan.is_empty():
+            return
+        cursor = self.interface.cursor
+        if not self.interface.connection.in_transaction:
+            cursor.execute('BEGIN')
+        try:
+            structure_steps = [step for step in plan.steps if isinstance(step[0], str) and (step[0].startswith('ALTER TABLE structure_') or step[0] in [sql for _, sql in STRUCTURE_OBJECTS])]
+            for sql, parameters in structure_steps:
+                cursor.execute(sql, parameters)
+            self.interpreter.build(plan.schema)
+            for sql, parameters in [step for step in plan.steps if step not in structure_steps]:
+                if callable(sql):
+                    self.interface.clear_cache()
+                    sql(*parameters)
+                else:
+                    cursor.execute(sql, parameters)
+            self.interface.log('DDL migration')
+        except Exception:
+            self.interface.rollback()
+            raise
+        self.interface.commit()
+        self.interface.clear_cache()
+        logging.debug(f'Migration applied ({len(plan.descriptions)} changes)')
+
+if __name__ == '__main__':
+    import sys
+    logging.basicConfig(format='[%(asctime)s] %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S', level=logging.INFO)
+    if len(sys.argv) < 3:
+        print('Usage: python migration.py <database> <ddl file> [--dry-run]')
+        sys.exit(1)
+    with ObjectInterface(sys.argv[1]) as interface, open(sys.argv[2], 'r') as file:
+        print(Migrator(interface).run(file.read(), dry_run='--dry-run' in sys.argv[3:]))
@@ -26,6 +26,8 @@ class ExecutionHandler:
             'get_decimal_base_value': utils.get_decimal_base_value,
             'array_to_bytes': utils.array_to_bytes,
             'bytes_to_array': utils.bytes_to_array,
+            'pack_array': utils.pack_array,
+            'unpack_array': utils.unpack_array,
             'compress': zlib.compress,
             'decompress': zlib.decompress
         }
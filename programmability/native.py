@@ -0,0 +1,71 @@
+from datetime import date, datetime
+from decimal import Decimal
+from functools import cache
+import utils
+
+class NativeCodec:
+    """ Built-in conversion between database and Python values that runs without the execution handler """
+    def __init__(self, generator: str, read, write) -> None:
+        self.generator = generator
+        self.read = read
+        self.write = write
+
+def read_date(value) -> date:
+    return date.fromisoformat(value) if value else None
+
+def write_date(value: date) -> str:
+    if value is None:
+        return None
+    elif isinstance(value, datetime):
+        return value.date().isoformat()
+    else:
+        return value.isoformat()
+
+def read_datetime(value) -> datetime:
+    return datetime.fromisoformat(value) if value else None
+
+def write_datetime(value: datetime) -> str:
+    """ Stores ISO format with microseconds (older transformer based datatypes stored whole seconds, both are read) """
+    return value.isoformat(sep=' ') if value is not None else None
+
+def create_decimal_codec(decimal_digits: int) -> NativeCodec:
+    """ Stores decimals as integers scaled by the given number of decimal digits """
+    def read_decimal(value) -> Decimal:
+        return Decimal(value).scaleb(-decimal_digits) if value not in (None, '') else None
+
+    def write_decimal(value) -> int:
+        if value is None:
+            return None
+        if not isinstance(value, Decimal):
+            value = Decimal(str(value))
+        return int(value.scaleb(decimal_digits).to_integral_value())
+
+    return NativeCodec('INTEGER', read_decimal, write_decimal)
+
+def read_ndarray(value):
+    return utils.unpack_array(value) if value else None
+
+def write_ndarray(value):
+    return utils.pack_array(value) if value is not None else None
+
+NATIVE_CODECS = {
+    'date': lambda: NativeCodec('DATE', read_date, write_date),
+    'datetime': lambda: NativeCodec('DATETIME', read_datetime, write_datetime),
+    'decimal': create_decimal_codec,
+    'ndarray': lambda: NativeCodec('BLOB', read_ndarray, write_ndarray)
+}
+
+@cache
+def get_native_codec(specification: str) -> NativeCodec:
+    """ Returns the native codec for the given specification, e.g. date or decimal(2) """
+    specification = specification.replace(' ', '')
+    bracket_open = specification.find('(')
+    if bracket_open > 0 and specification.endswith(')'):
+        name = specification[:bracket_open]
+        arguments = [int(a) for a in specification[bracket_open + 1: -1].split(',') if len(a) > 0]
+    else:
+        name = specification
+        arguments = []
+    if name not in NATIVE_CODECS.keys():
+        raise KeyError(f'Native datatype {name} not found')
+    return NATIVE_CODECS[name](*arguments)
@@ -0,0 +1,18 @@
+import sys
+import logging
+from datetime import timedelta
+from interface import ObjectInterface
+from utils import print_table
+from constant import BULK_CHUNK_SIZE
+
+def get_option(name: str, default: int) -> int:
+    return int(sys.argv[sys.argv.index(name) + 1]) if name in sys.argv else default
+
+if __name__ == '__main__':
+    logging.basicConfig(format='[%(asctime)s] %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S', level=logging.INFO)
+    if len(sys.argv) < 2:
+        print('Usage: python purge.py <database> [--stale-hours <hours>] [--chunk-size <size>]')
+        sys.exit(1)
+    with ObjectInterface(sys.argv[1]) as interface:
+        reclaimed = interface.purge(timedelta(hours=get_option('--stale-hours', 24)), get_option('--chunk-size', BULK_CHUNK_SIZE))
+        print_table([{'kind': key, 'count': n} for key, n in reclaimed.items()])
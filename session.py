@@ -0,0 +1,75 @@
+from constant import CHANGE_STATUS
+
+class Session:
+    """ Unit of work of an ObjectInterface: records modifications, status changes and bindings and writes them in bulk on flush.
+    Repeated modifications of an object are coalesced into one version, repeated bindings of an origin into one reference version.
+    Objects are created immediately (to get their ids), reads see the database state of the last flush. """
+    def __init__(self, interface) -> None:
+        self.interface = interface
+        self.modifications = {}
+        self.statuses = {}
+        self.binds = {}
+
+    def record_modification(self, object_, raw_attributes: dict):
+        """ Records the given raw attributes of an object, later values replace earlier ones """
+        self.modifications.setdefault(object_.id, (object_, {}))[1].update(raw_attributes)
+
+    def record_status(self, object_, status: int):
+        self.statuses[object_.id] = (object_, status)
+
+    def record_bind(self, reference, origin, targets: list, rebind: bool = False):
+        """ Records a binding. A rebind replaces the targets recorded before, a bind adds to them. """
+        key = (reference.id, origin.id)
+        if rebind or key not in self.binds:
+            self.binds[key] = (reference, origin, list(targets), rebind)
+        else:
+            current_targets = self.binds[key][2]
+            current_target_ids = set(t.id for t in current_targets)
+            current_targets.extend(t for t in targets if t.id not in current_target_ids)
+
+    def is_empty(self) -> bool:
+        return len(self.modifications) + len(self.statuses) + len(self.binds) == 0
+
+    def clear(self):
+        self.modifications.clear()
+        self.statuses.clear()
+        self.binds.clear()
+
+    def flush(self):
+        """ Writes the recorded changes: one version per modified object, bulk status updates and one bulk binding per reference """
+        session, self.interface.__session__ = self.interface.__session__, None
+        try:
+            if len(self.modifications) > 0:
+                self.interface.__write_modifications__(list(self.modifications.values()))
+            if len(self.statuses) > 0:
+                self.interface.__hop_cache__.invalidate_targets(list(self.statuses.keys()))
+                self.interface.cursor.executemany('UPDATE data_meta SET status = ? WHERE id = ?', [(status, id) for id, (_, status) in self.statuses.items()])
+                self.interface.__log_changes__([(id, object_.get_class().id, CHANGE_STATUS, object_.current_version, {'status': status}) for id, (object_, status) in self.statuses.items()])
+            binds_by_reference = {}
+            for reference, origin, targets, rebind in self.binds.values():
+                binds_by_reference.setdefault((reference.id, rebind), (reference, {}))[1][origin] = targets
+            for (_, rebind), (reference, bindings) in binds_by_reference.items():
+                self.interface.bind_many(reference, bindings, rebind)
+        finally:
+            self.interface.__session__ = session
+        self.clear()
+
+    def __enter__(self):
+        if self.interface.__session__ is not None:
+            raise ValueError('Session already active')
+        self.interface.__session__ = self
+        return self
+
+    def __exit__(self, exception_type, exception_value, exception_traceback):
+        self.interface.__session__ = None
+        if exception_type is None:
+            try:
+                self.flush()
+            except Exception:
+                self.clear()
+                self.interface.rollback()
+                raise
+            self.interface.commit()
+        else:
+            self.clear()
+            self.interface.rollback()
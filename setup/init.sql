@@ -13,7 +13,8 @@ CREATE TABLE structure_datatype (
     read_transformer_source TEXT,
     write_transformer_source TEXT,
     generator TEXT,
-    parent_id INTEGER REFERENCES structure_class(id)
+    parent_id INTEGER REFERENCES structure_class(id),
+    native TEXT
 );
 CREATE INDEX datatype_name ON structure_datatype(name);
 
@@ -22,7 +23,8 @@ CREATE TABLE structure_class (
     id INTEGER PRIMARY KEY AUTOINCREMENT,
     name TEXT UNIQUE NOT NULL,
     traced TINYINT NOT NULL,
-    parent_id INTEGER REFERENCES structure_class(id)
+    parent_id INTEGER REFERENCES structure_class(id),
+    single_table TINYINT NOT NULL DEFAULT 0
 );
 CREATE INDEX class_name ON structure_class(name);
 
@@ -39,6 +41,7 @@ CREATE TABLE structure_attribute_assignment (
     class_id INTEGER REFERENCES structure_class(id),
     attribute_id INTEGER REFERENCES structure_attribute(id),
     indexed TINYINT NOT NULL,
+    deferred TINYINT NOT NULL DEFAULT 0,
     read_transformer_source TEXT,
     write_transformer_source TEXT,
     PRIMARY KEY (class_id, attribute_id)
@@ -54,6 +57,21 @@ CREATE TABLE structure_reference (
 );
 CREATE INDEX reference_name ON structure_reference(name);
 
+-- Index: Mehrspaltige und abdeckende Indizes einer Klasse
+CREATE TABLE structure_index (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    name TEXT UNIQUE NOT NULL,
+    class_id INTEGER REFERENCES structure_class(id),
+    columns TEXT NOT NULL,
+    covering_columns TEXT
+);
+
+-- Volltextindex: Attribute einer Klasse in einer FTS5-Tabelle (search_<Klasse>)
+CREATE TABLE structure_search (
+    class_id INTEGER PRIMARY KEY REFERENCES structure_class(id),
+    columns TEXT NOT NULL
+);
+
 -- Referenz-Versionen nach Ursprungsobjekt
 CREATE TABLE structure_reference_version (
     reference_id INTEGER REFERENCES structure_reference(id),
@@ -69,4 +87,23 @@ CREATE TABLE data_meta (
     status INTEGER REFERENCES utils_status(id) DEFAULT {STATUS_IN_CREATION},
     created DATETIME,
     current_version INTEGER DEFAULT 0
-);
\ No newline at end of file
+);
+CREATE INDEX data_meta_class_status ON data_meta(class_id, status);
+
+-- Änderungsprotokoll: Erzeugung, Änderung, Statuswechsel, Bindung und Entfernung von Objekten
+CREATE TABLE data_change (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    "time" DATETIME,
+    object_id INTEGER,
+    class_id INTEGER,
+    kind TEXT NOT NULL,
+    version INTEGER,
+    data TEXT
+);
+CREATE INDEX data_change_object ON data_change(object_id, kind);
+
+-- Verarbeitungsstand der Abnehmer des Änderungsprotokolls
+CREATE TABLE data_change_consumer (
+    name TEXT PRIMARY KEY,
+    cursor INTEGER NOT NULL DEFAULT 0
+);
@@ -0,0 +1,25 @@
+import os
+import sys
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from interface import ObjectInterface
+from ddl import Interpreter
+
+@pytest.fixture
+def filename(tmp_path, monkeypatch):
+    """ Database with the example structure """
+    monkeypatch.chdir(ROOT)
+    filename = str(tmp_path / 'test.db')
+    with ObjectInterface(filename) as interface:
+        interface.setup()
+        with open('setup/example_structure.ddl', 'r') as file:
+            Interpreter(interface).run(file.read())
+    return filename
+
+@pytest.fixture
+def interface(filename):
+    with ObjectInterface(filename) as interface:
+        yield interface
@@ -0,0 +1,26 @@
+import builtins
+import pytest
+from decimal import Decimal
+import aggregation
+from aggregation import count, sum_, avg, min_, max_
+
+def test_aggregation_does_not_shadow_builtins():
+    for name in ('sum', 'min', 'max'):
+        assert not hasattr(aggregation, name) or getattr(aggregation, name) is getattr(builtins, name)
+
+def test_aggregate_metrics(interface):
+    for name, price in (('Pen', '1.50'), ('Pad', '2.50'), ('Ink', '4.00')):
+        interface.create_object('Product', name=name, price=Decimal(price))
+    interface.commit()
+    [row] = interface.aggregate('Product', metrics={'n': count(), 'total': sum_('price'), 'cheapest': min_('price'), 'priciest': max_('price'), 'mean': avg('price')})
+    assert round(row.pop('mean'), 2) == Decimal('2.67')
+    assert row == {'n': 3, 'total': Decimal('8.00'), 'cheapest': Decimal('1.50'), 'priciest': Decimal('4.00')}
+
+def test_aggregate_group_by_and_where(interface):
+    for first_name, zip_ in (('Anna', '11111'), ('Bernd', '11111'), ('Clara', '22222')):
+        interface.create_object('Customer', first_name=first_name, last_name='Kunde', zip=zip_)
+    interface.commit()
+    assert interface.aggregate('Customer', group_by=['zip'], metrics={'n': count(), 'first': min_('first_name')}) == [{'zip': '11111', 'n': 2, 'first': 'Anna'}, {'zip': '22222', 'n': 1, 'first': 'Clara'}]
+    assert interface.aggregate('Customer', where={'zip': ['22222']}) == [{'n': 1}]
+    with pytest.raises(ValueError):
+        interface.aggregate('Person', metrics={'n': count('full_name')})
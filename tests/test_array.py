@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+
+def create_array_object(interface, array):
+    interface.create_attribute('trace', 'array')
+    interface.assign_attribute_to_class('TextObject', 'trace')
+    interface.clear_cache()
+    object_ = interface.create_object('TextObject', example_text='text', trace=array)
+    interface.commit()
+    return object_
+
+def test_read_array_rows(interface):
+    array = np.arange(60, dtype='<i4').reshape(20, 3)
+    object_ = create_array_object(interface, array)
+    assert np.array_equal(interface.read_array(object_, 'trace', 5, 9), array[5:9])
+    assert np.array_equal(interface.read_array(object_, 'trace', -3), array[-3:])
+    assert np.array_equal(interface.read_array(object_, 'trace'), array)
+    with pytest.raises(ValueError):
+        interface.read_array(object_, 'example_text')
+
+def test_iterate_array_opens_blob_once(interface, monkeypatch):
+    array = np.arange(70, dtype='<f8').reshape(35, 2)
+    object_ = create_array_object(interface, array)
+    opened = []
+    open_attribute_blob = interface.open_attribute_blob
+    def record_open(*args, **kwargs):
+        opened.append(args)
+        return open_attribute_blob(*args, **kwargs)
+    monkeypatch.setattr(interface, 'open_attribute_blob', record_open)
+    chunks = list(interface.iterate_array(object_, 'trace', 10))
+    assert len(opened) == 1
+    assert [len(chunk) for chunk in chunks] == [10, 10, 10, 5]
+    assert np.array_equal(np.concatenate(chunks), array)
@@ -0,0 +1,40 @@
+import sqlite3
+from explore import audit, normalize_sql, suggest_index
+from interface import ObjectInterface
+
+def create_sample_objects(filename):
+    with ObjectInterface(filename) as interface:
+        customer = interface.create_object('Customer', first_name='Anna', last_name='Alt', zip='12345', city='Bonn')
+        order = interface.create_object('Order')
+        order.bind('order_to_customer', [customer])
+        interface.commit()
+        interface.cursor.execute('SELECT COUNT(*) FROM data_change')
+        n_changes = interface.cursor.fetchone()[0]
+        return interface.get_object(customer.id).current_version, n_changes
+
+def test_normalize_sql():
+    assert normalize_sql("SELECT *  FROM data_Person\n WHERE id = 12 AND name = 'Anna'") == 'SELECT * FROM data_Person WHERE id = ? AND name = ?'
+
+def test_suggest_index():
+    connection = sqlite3.connect(':memory:')
+    connection.execute('CREATE TABLE data_Person (id INTEGER, zip TEXT, created DATETIME)')
+    assert suggest_index(connection, "SELECT id FROM data_Person WHERE zip = '1' AND created > '2024'", 'data_Person') == 'CREATE INDEX idx_data_Person_zip_created ON data_Person(zip, created)'
+    assert suggest_index(connection, 'SELECT id FROM data_Person', 'data_Person') is None
+
+def test_audit_rolls_back_and_flags(filename):
+    version, n_changes = create_sample_objects(filename)
+    rows = audit(filename)
+    assert all(row['issue'] in ('full scan', 'temp b-tree') for row in rows)
+    assert not any(row['operation'].startswith(('modify', 'bind')) and row['issue'] == 'full scan' for row in rows)
+    with ObjectInterface(filename) as interface:
+        interface.cursor.execute('SELECT COUNT(*) FROM data_change')
+        assert interface.cursor.fetchone()[0] == n_changes
+        assert interface.get_object(interface.get_instances('Customer').get_ids()[0]).current_version == version
+
+def test_audit_suggests_missing_index(filename):
+    create_sample_objects(filename)
+    with ObjectInterface(filename) as interface:
+        interface.cursor.execute('DROP INDEX data_meta_class_status')
+        interface.commit()
+    rows = audit(filename)
+    assert any(row['suggestion'] == 'CREATE INDEX idx_data_meta_class_id_status ON data_meta(class_id, status)' for row in rows)
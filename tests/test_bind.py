@@ -0,0 +1,73 @@
+import pytest
+from control import ConflictError
+
+def create_order(interface):
+    order = interface.create_object('Order')
+    positions = [interface.create_object('OrderPosition', amount=i) for i in range(3)]
+    order.bind('order_to_positions', positions[:1])
+    interface.commit()
+    return order, positions
+
+def count_links(interface) -> int:
+    return interface.cursor.execute('SELECT COUNT(*) FROM reference_order_to_positions').fetchone()[0]
+
+def block_version_updates(interface):
+    """ Simulates a concurrent change: the conditional version bump does not apply """
+    interface.cursor.execute('CREATE TEMP TRIGGER block_version BEFORE UPDATE ON structure_reference_version BEGIN SELECT RAISE(IGNORE); END')
+
+def test_bind_version_conflict_writes_nothing(interface):
+    order, positions = create_order(interface)
+    n_links = count_links(interface)
+    with pytest.raises(ConflictError):
+        order.bind('order_to_positions', positions[1:], version=0)
+    interface.commit()
+    assert count_links(interface) == n_links
+    assert [p.id for p in order.hop('order_to_positions')] == [positions[0].id]
+
+@pytest.mark.parametrize('bulk', [False, True])
+def test_bind_conflict_rolls_back_links(interface, bulk):
+    order, positions = create_order(interface)
+    n_links = count_links(interface)
+    block_version_updates(interface)
+    with pytest.raises(ConflictError):
+        if bulk:
+            interface.bind_many('order_to_positions', {order: positions[1:]})
+        else:
+            order.bind('order_to_positions', positions[1:])
+    interface.commit()
+    assert count_links(interface) == n_links
+    assert interface.get_reference_version('order_to_positions', order) == 1
+
+def test_bind_many_version_conflict(interface):
+    order, positions = create_order(interface)
+    other = interface.create_object('Order')
+    interface.commit()
+    n_links = count_links(interface)
+    with pytest.raises(ConflictError) as info:
+        interface.bind_many('order_to_positions', {order: positions[1:2], other: positions[2:]}, versions={order: 0, other: 0})
+    assert info.value.ids == [order.id]
+    interface.commit()
+    assert count_links(interface) == n_links
+    interface.bind_many('order_to_positions', {order: positions[1:2], other: positions[2:]}, versions={order: 1, other: 0})
+    assert [p.id for p in interface.hop('order_to_positions', other)] == [positions[2].id]
+
+def test_bind_many_cardinality(interface):
+    orders = [interface.create_object('Order') for i in range(2)]
+    customers = [interface.create_object('Customer') for i in range(2)]
+    interface.commit()
+    with pytest.raises(ValueError):
+        interface.bind_many('order_to_customer', {orders[0]: customers})
+    interface.bind_many('order_to_customer', {order: customers[:1] for order in orders})
+    interface.commit()
+    statements = []
+    interface.connection.set_trace_callback(statements.append)
+    try:
+        with pytest.raises(ValueError):
+            interface.bind_many('order_to_customer', {orders[0]: customers[1:]})
+    finally:
+        interface.connection.set_trace_callback(None)
+    assert not any('data_Customer' in statement for statement in statements)
+    interface.bind_many('order_to_customer', {orders[0]: customers[1:]}, rebind=True)
+    interface.commit()
+    assert [c.id for c in orders[0].hop('order_to_customer')] == [customers[1].id]
+    assert [c.id for c in orders[1].hop('order_to_customer')] == [customers[0].id]
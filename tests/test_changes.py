@@ -0,0 +1,42 @@
+def test_changes_logged(interface):
+    order = interface.create_object('Order')
+    position = interface.create_object('OrderPosition', amount=1)
+    interface.commit()
+    _, cursor = interface.changes_since()
+    order.bind('order_to_positions', [position])
+    position.modify(amount=2)
+    position.delete()
+    interface.commit()
+    changes, cursor = interface.changes_since(cursor)
+    assert [(change['object_id'], change['kind']) for change in changes] == [(order.id, 'bind'), (position.id, 'modify'), (position.id, 'status')]
+    assert changes[0]['data'] == {'reference': 'order_to_positions', 'targets': [position.id]}
+    assert changes[1]['data'] == {'attributes': {'amount': 2}}
+    assert changes[2]['data'] == {'status': 3}
+    assert cursor == changes[-1]['id']
+    assert interface.changes_since(cursor) == ([], cursor)
+
+def test_changes_paging(interface):
+    for i in range(5):
+        interface.create_object('OrderPosition', amount=i)
+    interface.commit()
+    n_changes = interface.cursor.execute('SELECT COUNT(*) FROM data_change').fetchone()[0]
+    cursor, ids = 0, []
+    while True:
+        changes, cursor = interface.changes_since(cursor, 2)
+        if len(changes) == 0:
+            break
+        assert len(changes) <= 2
+        ids.extend(change['id'] for change in changes)
+    assert ids == sorted(set(ids)) and len(ids) == n_changes
+
+def test_change_consumers(interface):
+    interface.create_object('OrderPosition', amount=1)
+    interface.commit()
+    assert interface.get_change_cursor('a') == 0
+    changes, cursor = interface.changes_since()
+    interface.acknowledge_changes('a', cursor)
+    interface.acknowledge_changes('a', cursor - 1)
+    interface.acknowledge_changes('b', cursor - 1)
+    assert interface.get_change_cursor('a') == cursor
+    assert interface.prune_changes() == len(changes) - 1
+    assert [change['id'] for change in interface.changes_since()[0]] == [cursor]
@@ -0,0 +1,85 @@
+import pytest
+from interface import ObjectInterface
+from ddl import Interpreter, Parser
+
+STRUCTURE = '''
+#text { TEXT }
+#int { INTEGER }
++attributes { name: text, salary: int, level: int }
+Entity* { name, +storage single }
+Employee(Entity) { salary }
+Manager(Employee) { level }
+Note { name }
+'''
+
+@pytest.fixture
+def empty_interface(tmp_path):
+    with ObjectInterface(str(tmp_path / 'ddl.db')) as interface:
+        interface.setup()
+        yield interface
+
+def get_columns(interface, table_name):
+    interface.cursor.execute(f"SELECT name FROM pragma_table_info('{table_name}')")
+    return [row['name'] for row in interface.cursor.fetchall()]
+
+def test_build_creates_tables_with_all_columns(empty_interface):
+    statements = []
+    empty_interface.connection.set_trace_callback(statements.append)
+    Interpreter(empty_interface).run(STRUCTURE)
+    empty_interface.connection.set_trace_callback(None)
+    assert not any(statement.startswith('ALTER TABLE') for statement in statements)
+    assert len([statement for statement in statements if statement.startswith('CREATE TABLE data_')]) == 2
+    assert get_columns(empty_interface, 'data_Entity') == ['id', 'version', 'created', 'name', 'salary', 'level']
+    assert get_columns(empty_interface, 'data_Note') == ['id', 'version', 'created', 'name']
+
+def test_build_objects_in_single_table(empty_interface):
+    Interpreter(empty_interface).run(STRUCTURE)
+    manager = empty_interface.create_object('Manager', name='Boss', salary=100, level=3)
+    empty_interface.commit()
+    assert empty_interface.get_object(manager.id).raw_attributes == {'name': 'Boss', 'salary': 100, 'level': 3}
+    assert [row['id'] for row in empty_interface.cursor.execute('SELECT __object_id__ AS id FROM view_Employee')] == [manager.id]
+
+def test_build_extends_existing_structure(empty_interface):
+    Interpreter(empty_interface).run(STRUCTURE)
+    Interpreter(empty_interface).run('+attributes { title: text }\nMemo(Note) { title }')
+    memo = empty_interface.create_object('Memo', name='Memo', title='Title')
+    empty_interface.commit()
+    assert empty_interface.get_object(memo.id)['title'] == 'Title'
+
+def test_parse_example_structure():
+    with open('setup/example_structure.ddl', 'r') as file:
+        schema = Parser(file.read()).parse()
+    datatypes = {datatype.name: datatype for datatype in schema.datatypes}
+    assert datatypes['shorttext'].generator == 'VARCHAR(64)'
+    assert datatypes['date'].native == 'date' and datatypes['currency2'].native == 'decimal(2)'
+    assert datatypes['cstring'].parent_name == 'cbytes' and datatypes['cstring'].read_transformer_source.strip() == "return value.decode('utf-8')"
+    classes = {class_.name: class_ for class_ in schema.classes}
+    assert classes['Customer'].parent_name == 'Person' and classes['Customer'].traced
+    assert [index.attribute_names for index in classes['Customer'].indexes] == [['zip', 'city']]
+    assert classes['Customer'].indexes[0].covering_attribute_names == ['street']
+    assert classes['Person'].search_attribute_names == ['first_name', 'last_name']
+    assert [(reference.name, reference.target_class_name, reference.cardinality) for reference in classes['Order'].references] == [('order_to_customer', 'Customer', 1), ('order_to_positions', 'OrderPosition', None)]
+    assert [a.attribute_name for a in classes['TextObject'].attribute_assignments if a.deferred] == ['example_text']
+
+def test_parse_transformer_with_braces():
+    schema = Parser('#json { TEXT, get { return {"a": {"b": value}} }, set { return str(value) } }').parse()
+    assert schema.datatypes[0].read_transformer_source == 'return {"a": {"b": value}}'
+    assert schema.datatypes[0].write_transformer_source == 'return str(value)'
+
+@pytest.mark.parametrize('text, message', [
+    ('Person { name', "Expected '}', found end of script (line 1, column 14)"),
+    ('#text {\n}', 'Missing generator of datatype text (line 2, column 1)'),
+    ('Person {\n  name ?\n}', "Unexpected character '?' (line 2, column 8)"),
+    ('Person { +storage double }', "Expected single or split, found 'double' (line 1, column 19)"),
+    ('#text { TEXT, get { return value', 'Missing closing brace (line 1, column 19)'),
+    ('#text { TEXT, get { return value }', 'Expected name, found end of script (line 1, column 35)')
+])
+def test_parse_errors(text, message):
+    with pytest.raises(SyntaxError) as info:
+        Parser(text).parse()
+    assert info.value.msg == message
+
+def test_parse_large_script_linear():
+    text = '+attributes { name: text }\n' + '\n'.join(f'Class{i} {{ name, ~link{i} -> Class0(1) }}' for i in range(5000))
+    schema = Parser(text).parse()
+    assert len(schema.classes) == 5000 and schema.classes[-1].references[0].name == 'link4999'
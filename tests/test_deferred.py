@@ -0,0 +1,43 @@
+from datetime import date
+
+def count_selects(interface, function):
+    statements = []
+    interface.connection.set_trace_callback(lambda sql: statements.append(sql) if sql.startswith('SELECT') else None)
+    try:
+        result = function()
+    finally:
+        interface.connection.set_trace_callback(None)
+    return len(statements), result
+
+def test_deferred_attribute_loaded_on_access(interface):
+    text_object = interface.create_object('TextObject', example_text='long text')
+    interface.commit()
+    text_object = interface.get_object(text_object.id)
+    assert not text_object.is_loaded('example_text')
+    assert text_object['example_text'] == 'long text'
+    assert text_object.is_loaded('example_text')
+
+def test_deferred_attributes_loaded_in_bulk(interface):
+    ids = [interface.create_object('TextObject', example_text=f'text {i}').id for i in range(3)]
+    interface.commit()
+    objects = interface.get_objects(ids)
+    n, _ = count_selects(interface, objects.load_attributes)
+    assert n == 1
+    assert [object_['example_text'] for object_ in objects] == ['text 0', 'text 1', 'text 2']
+
+def test_deferred_by_request_kept_on_modify(interface):
+    person = interface.create_object('Person', first_name='Anna', last_name='Alt', birthday=date(1990, 1, 2))
+    interface.commit()
+    person = interface.get_object(person.id, deferred=['birthday'])
+    assert not person.is_loaded('birthday') and person.is_loaded('first_name')
+    person.modify(first_name='Anne')
+    interface.commit()
+    person = interface.get_object(person.id)
+    assert person['first_name'] == 'Anne' and person['birthday'] == date(1990, 1, 2)
+
+def test_instances_load_deferred_attribute_on_access(interface):
+    text_object = interface.create_object('TextObject', example_text='long text')
+    interface.commit()
+    objects = interface.get_instances('TextObject')
+    assert objects.get_ids() == [text_object.id]
+    assert objects[0]['example_text'] == 'long text'
@@ -0,0 +1,83 @@
+import csv
+import json
+import pytest
+from datetime import date, datetime
+import numpy as np
+from export import export, get_export_types
+from utils import decode_export_value
+
+def create_objects(interface):
+    interface.create_attribute('trace', 'array')
+    interface.create_attribute('payload', 'cbytes')
+    interface.assign_attribute_to_class('TextObject', 'trace')
+    interface.assign_attribute_to_class('TextObject', 'payload')
+    interface.clear_cache()
+    array = np.arange(2000, dtype='<f8').reshape(500, 4)
+    payload = bytes(range(256)) * 4
+    object_ = interface.create_object('TextObject', example_text='text', trace=array, payload=payload)
+    interface.commit()
+    return object_, array, payload
+
+def test_export_ndjson_array_and_blob(interface, tmp_path):
+    object_, array, payload = create_objects(interface)
+    filename = str(tmp_path / 'export.ndjson')
+    assert export(interface, 'TextObject', filename) == 1
+    with open(filename, 'r', encoding='utf-8') as file:
+        row = json.loads(file.readline())
+    assert row['id'] == object_.id and row['example_text'] == 'text'
+    assert np.array_equal(decode_export_value(row['trace']), array)
+    assert decode_export_value(row['payload']) == payload
+
+def test_export_csv_array_and_blob(interface, tmp_path):
+    object_, array, payload = create_objects(interface)
+    filename = str(tmp_path / 'export.csv')
+    assert export(interface, 'TextObject', filename) == 1
+    with open(filename, 'r', newline='', encoding='utf-8') as file:
+        row = next(csv.DictReader(file))
+    assert int(row['id']) == object_.id and row['example_text'] == 'text'
+    assert np.array_equal(decode_export_value(json.loads(row['trace'])), array)
+    assert decode_export_value(json.loads(row['payload'])) == payload
+
+def read_ndjson(filename):
+    with open(filename, 'r', encoding='utf-8') as file:
+        return [json.loads(line) for line in file]
+
+def test_export_recursive_includes_subclass_columns(interface, tmp_path):
+    person = interface.create_object('Person', first_name='Anna', last_name='Alt')
+    customer = interface.create_object('Customer', first_name='Bernd', last_name='Berg', city='Bonn')
+    interface.commit()
+    filename = str(tmp_path / 'export.ndjson')
+    assert export(interface, 'Person', filename, recursive=True) == 2
+    rows = {row['id']: row for row in read_ndjson(filename)}
+    assert rows[person.id]['city'] is None and rows[person.id]['full_name'] == 'Anna Alt'
+    assert rows[customer.id]['city'] == 'Bonn' and rows[customer.id]['full_name'] == 'Bernd Berg'
+
+def test_export_snapshot_before_deletion(interface, tmp_path):
+    customer = interface.create_object('Customer', first_name='Clara', last_name='Cord', city='Celle')
+    interface.commit()
+    snapshot_time = datetime.now()
+    customer.modify(city='Chemnitz')
+    interface.delete(customer)
+    interface.commit()
+    filename = str(tmp_path / 'export.ndjson')
+    assert export(interface, 'Customer', filename) == 0
+    assert export(interface, 'Customer', filename, snapshot_time=snapshot_time) == 1
+    assert read_ndjson(filename)[0]['city'] == 'Celle'
+    assert export(interface, 'Person', filename, recursive=True, snapshot_time=snapshot_time) == 1
+    assert read_ndjson(filename)[0]['city'] == 'Celle'
+
+def test_export_types(interface):
+    types = get_export_types(interface.get_class('Person'), recursive=True)
+    assert types['id'] == 'int64' and types['birthday'] == 'date' and types['city'] == 'string'
+    assert types['full_name'] is None
+    assert get_export_types(interface.get_class('Product'))['price'] == 'decimal(2)'
+
+def test_export_parquet_null_first_chunk(interface, tmp_path):
+    pyarrow_parquet = pytest.importorskip('pyarrow.parquet')
+    for i in range(5):
+        interface.create_object('Person', first_name=f'P{i}', last_name='Name', birthday=date(1990, 1, i + 1) if i >= 3 else None)
+    interface.commit()
+    filename = str(tmp_path / 'export.parquet')
+    assert export(interface, 'Person', filename, chunk_size=2) == 5
+    table = pyarrow_parquet.read_table(filename)
+    assert table.column('birthday').to_pylist() == [None, None, None, date(1990, 1, 4), date(1990, 1, 5)]
@@ -0,0 +1,16 @@
+from concurrent.futures import ThreadPoolExecutor
+import gui
+
+def test_pool_created_once(filename, monkeypatch):
+    monkeypatch.setattr(gui, 'FILENAME_DATABASE', filename)
+    monkeypatch.setattr(gui, 'pool', None)
+    with ThreadPoolExecutor(8) as executor:
+        pools = list(executor.map(lambda _: gui.get_pool(), range(64)))
+    assert all(pool is pools[0] for pool in pools)
+
+def test_stats_page(filename, monkeypatch):
+    monkeypatch.setattr(gui, 'FILENAME_DATABASE', filename)
+    monkeypatch.setattr(gui, 'pool', None)
+    client = gui.app.test_client()
+    assert client.get('/').status_code == 200
+    assert client.get('/stats').status_code == 200
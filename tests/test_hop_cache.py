@@ -0,0 +1,37 @@
+from interface import ObjectInterface
+
+def test_hop_after_activation(interface, filename):
+    order = interface.create_object('Order')
+    customer = interface.touch('Customer')
+    order.bind('order_to_customer', [customer])
+    interface.commit()
+    assert len(order.hop('order_to_customer')) == 0
+    customer.activate()
+    interface.commit()
+    assert [c.id for c in order.hop('order_to_customer')] == [customer.id]
+    with ObjectInterface(filename) as other:
+        assert [c.id for c in other.get_object(order.id).hop('order_to_customer')] == [customer.id]
+
+def test_hop_after_deactivation(interface):
+    order = interface.create_object('Order')
+    customer = interface.create_object('Customer', first_name='A', last_name='B')
+    order.bind('order_to_customer', [customer])
+    interface.commit()
+    assert [c.id for c in order.hop('order_to_customer')] == [customer.id]
+    interface.get_object(customer.id).deactivate()
+    interface.commit()
+    assert len(order.hop('order_to_customer')) == 0
+
+def test_hop_after_rollback(interface):
+    order = interface.create_object('Order')
+    customers = [interface.create_object('Customer', first_name=name, last_name='B') for name in ('A', 'B', 'C')]
+    order.bind('order_to_customer', customers[:1])
+    interface.commit()
+    order.bind('order_to_customer', customers[1:2], rebind=True)
+    assert [c.id for c in order.hop('order_to_customer')] == [customers[1].id]
+    interface.rollback()
+    order = interface.get_object(order.id)
+    assert [c.id for c in order.hop('order_to_customer')] == [customers[0].id]
+    order.bind('order_to_customer', customers[2:], rebind=True)
+    interface.commit()
+    assert [c.id for c in interface.get_object(order.id).hop('order_to_customer')] == [customers[2].id]
@@ -0,0 +1,27 @@
+import pytest
+from ddl import Interpreter
+
+def get_index_sql(interface, name):
+    interface.cursor.execute("SELECT sql FROM sqlite_schema WHERE type = 'index' AND name = ?", (name,))
+    row = interface.cursor.fetchone()
+    return row['sql'] if row else None
+
+def test_covering_index_from_ddl(interface):
+    assert get_index_sql(interface, 'idx_Customer_zip_city') == 'CREATE INDEX idx_Customer_zip_city ON data_Customer(zip, city, street)'
+    interface.cursor.execute("SELECT columns, covering_columns FROM structure_index WHERE name = 'idx_Customer_zip_city'")
+    assert tuple(interface.cursor.fetchone()) == ('zip,city', 'street')
+    interface.cursor.execute('EXPLAIN QUERY PLAN SELECT street FROM data_Customer WHERE zip = ? AND city = ?', ('12345', 'Bonn'))
+    assert 'COVERING INDEX idx_Customer_zip_city' in interface.cursor.fetchone()['detail']
+
+def test_create_index(interface):
+    name = interface.create_index('Person', ['last_name', 'first_name'])
+    assert name == 'idx_Person_last_name_first_name'
+    assert get_index_sql(interface, name) == 'CREATE INDEX idx_Person_last_name_first_name ON data_Person(last_name, first_name)'
+
+def test_index_over_tables_rejected(interface):
+    with pytest.raises(ValueError):
+        interface.create_index('Customer', ['last_name', 'city'])
+    with pytest.raises(KeyError):
+        interface.create_index('Customer', ['unknown'])
+    with pytest.raises(ValueError):
+        Interpreter(interface).run('Customer2*(Person) { city, +index (last_name, city) }')
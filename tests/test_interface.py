@@ -0,0 +1,57 @@
+import gc
+import weakref
+import sqlite3
+import pytest
+from decimal import Decimal
+import interface as interface_module
+from interface import ObjectInterface
+
+def test_connect_closes_probe_connection(filename, monkeypatch):
+    connections = []
+    connect = sqlite3.connect
+    def record_connect(*args, **kwargs):
+        connections.append(connect(*args, **kwargs))
+        return connections[-1]
+    monkeypatch.setattr(interface_module.sqlite3, 'connect', record_connect)
+    with ObjectInterface(filename) as interface:
+        other_connections = [connection for connection in connections if connection is not interface.connection]
+        assert len(other_connections) > 0
+        for connection in other_connections:
+            with pytest.raises(sqlite3.ProgrammingError):
+                connection.execute('SELECT 1')
+
+def test_clear_cache_only_clears_own_interface(filename):
+    with ObjectInterface(filename) as interface, ObjectInterface(filename) as other:
+        interface.get_class('Person')
+        other.get_class('Person')
+        other.clear_cache()
+        assert interface.get_cache_info()['class'].currsize == 1
+        assert other.get_cache_info()['class'].currsize == 0
+
+def test_instance_cache_without_reference_cycle(interface):
+    interface.create_object('Product', name='Pen', price=Decimal('1.50'))
+    interface.commit()
+    gc.disable()
+    try:
+        products = interface.get_instances('Product')
+        assert len(products.get_dataframe()) == 1
+        assert products.get_dataframe.cache_info().hits == 0
+        products.get_dataframe()
+        assert products.get_dataframe.cache_info().hits == 1
+        reference = weakref.ref(products)
+        del products
+        assert reference() is None
+    finally:
+        gc.enable()
+
+def test_objects_not_registered_but_cleared(interface):
+    product = interface.create_object('Product', name='Pen', price=Decimal('1.50'))
+    position = interface.create_object('OrderPosition', amount=2)
+    position.bind('position_to_product', [product])
+    interface.commit()
+    assert position['price'] == Decimal('3.00')
+    assert position not in set(interface.__controls__)
+    product.modify(price=Decimal('2.00'))
+    assert position['price'] == Decimal('3.00')
+    interface.clear_object_cache()
+    assert position['price'] == Decimal('4.00')
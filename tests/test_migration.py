@@ -0,0 +1,127 @@
+import pytest
+from datetime import date
+from decimal import Decimal
+from interface import ObjectInterface
+from ddl import Interpreter
+from migration import Migrator
+
+TRANSFORMER_STRUCTURE = '''
+#date {
+    DATE,
+    get {
+        if value:
+            return parse_sqlite_date(value)
+        else:
+            return None
+    }
+    set {
+        if value:
+            return date_to_string(value)
+        else:
+            return None
+    }
+}
+#currency2 {
+    INTEGER,
+    get {
+        if value:
+            return create_decimal(value, 2)
+        else:
+            return None
+    }
+    set {
+        if value:
+            return get_decimal_base_value(value, 2)
+        else:
+            return None
+    }
+}
++attributes {
+    birthday: date,
+    price: currency2
+}
+Item* {
+    birthday,
+    price
+}
+'''
+
+NATIVE_STRUCTURE = '''
+#date {
+    @date
+}
+#currency2 {
+    @decimal(2)
+}
++attributes {
+    birthday: date,
+    price: currency2
+}
+Item* {
+    birthday,
+    price
+}
+'''
+
+def test_migrate_transformer_datatypes_to_native(tmp_path):
+    filename = str(tmp_path / 'migration.db')
+    with ObjectInterface(filename) as interface:
+        interface.setup()
+        Interpreter(interface).run(TRANSFORMER_STRUCTURE)
+        item = interface.create_object('Item', birthday=date(1990, 5, 6), price=Decimal('12.34'))
+        empty = interface.create_object('Item')
+        interface.cursor.execute('UPDATE data_Item SET birthday = ? WHERE id = ?', ('', empty.id))
+        interface.commit()
+    with ObjectInterface(filename) as interface:
+        plan = Migrator(interface).run(NATIVE_STRUCTURE)
+        assert plan.conflicts == []
+    with ObjectInterface(filename) as interface:
+        assert interface.get_datatype('date').native == 'date'
+        assert interface.get_datatype('currency2').native == 'decimal(2)'
+        assert interface.get_object(item.id)['birthday'] == date(1990, 5, 6)
+        assert interface.get_object(item.id)['price'] == Decimal('12.34')
+        assert interface.get_object(empty.id)['birthday'] is None
+
+def test_migrate_native_datatype_with_other_generator_conflicts(tmp_path):
+    filename = str(tmp_path / 'migration.db')
+    with ObjectInterface(filename) as interface:
+        interface.setup()
+        Interpreter(interface).run(TRANSFORMER_STRUCTURE.replace('DATE,', 'TEXT,'))
+        plan = Migrator(interface).run(NATIVE_STRUCTURE, dry_run=True)
+        assert plan.conflicts == ['Datatype date changes its generator, native type or parent']
+
+def read_example_structure():
+    with open('setup/example_structure.ddl', 'r') as file:
+        return file.read()
+
+def test_migrate_unchanged_structure(interface):
+    plan = Migrator(interface).run(read_example_structure())
+    assert plan.is_empty() and str(plan) == 'No changes'
+
+def test_migrate_additions(interface):
+    person = interface.create_object('Person', first_name='Anna', last_name='Alt')
+    interface.commit()
+    text = read_example_structure().replace('    birthday: date,', '    birthday: date,\n    nickname: shorttext,').replace('    birthday,\n    +search', '    birthday,\n    nickname*,\n    +search') + '\nSupplier(Person) {\n    city,\n    ~supplier_to_products -> Product\n}\n'
+    migrator = Migrator(interface)
+    plan = migrator.run(text, dry_run=True)
+    assert str(plan).splitlines() == ['+ attribute nickname: shorttext', '+ column Person.nickname', '+ assignment Person.nickname', '+ index idx_Person_nickname', '+ class Supplier(Person)', '~ class views']
+    assert 'nickname' not in interface.get_class('Person').get_attribute_names()
+    migrator.apply(plan)
+    interface.commit()
+    interface.clear_cache()
+    assert interface.get_object(person.id)['first_name'] == 'Anna'
+    person.modify(nickname='Ann')
+    supplier = interface.create_object('Supplier', first_name='Sam', last_name='Supply', city='Bonn')
+    product = interface.create_object('Product', name='Pen')
+    supplier.bind('supplier_to_products', [product])
+    interface.commit()
+    assert interface.get_object(person.id)['nickname'] == 'Ann'
+    assert [p.id for p in interface.get_object(supplier.id).hop('supplier_to_products')] == [product.id]
+    assert Migrator(interface).run(text).is_empty()
+
+def test_migrate_conflicts(interface):
+    text = read_example_structure().replace('Customer*(Person) {', 'Customer*(Product) {')
+    plan = Migrator(interface).run(text, dry_run=True)
+    assert plan.conflicts == ['Class Customer changes its parent']
+    with pytest.raises(ValueError):
+        Migrator(interface).apply(plan)
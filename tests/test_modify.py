@@ -0,0 +1,34 @@
+import pytest
+from control import ConflictError
+from constant import CHANGE_MODIFY
+
+def get_state(interface, object_id: int) -> tuple:
+    version = interface.cursor.execute('SELECT current_version FROM data_meta WHERE id = ?', (object_id,)).fetchone()[0]
+    n_versions = interface.cursor.execute('SELECT COUNT(*) FROM data_Person WHERE id = ?', (object_id,)).fetchone()[0]
+    n_changes = interface.cursor.execute('SELECT COUNT(*) FROM data_change WHERE object_id = ? AND kind = ?', (object_id, CHANGE_MODIFY)).fetchone()[0]
+    return version, n_versions, n_changes
+
+def test_failed_modify_rolls_back(interface, monkeypatch):
+    customer = interface.create_object('Customer', first_name='A', last_name='B')
+    interface.commit()
+    state = get_state(interface, customer.id)
+    def fail(*args):
+        raise RuntimeError('Search index failed')
+    monkeypatch.setattr(interface, '__write_search_index__', fail)
+    with pytest.raises(RuntimeError):
+        interface.modify(customer, first_name='C')
+    interface.commit()
+    assert get_state(interface, customer.id) == state
+    assert customer.current_version == state[0]
+
+def test_modify_conflict_rolls_back(interface):
+    customers = [interface.create_object('Customer', first_name='A', last_name=str(i)) for i in range(2)]
+    interface.commit()
+    stale = interface.get_object(customers[1].id)
+    interface.get_object(customers[1].id).modify(first_name='B')
+    interface.commit()
+    states = [get_state(interface, customer.id) for customer in customers]
+    with pytest.raises(ConflictError):
+        interface.__write_modifications__([(customers[0], {'first_name': 'C'}), (stale, {'first_name': 'D'})])
+    interface.commit()
+    assert [get_state(interface, customer.id) for customer in customers] == states
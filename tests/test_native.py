@@ -0,0 +1,23 @@
+from datetime import date, datetime
+from programmability.native import get_native_codec
+
+def test_datetime_reads_old_format():
+    codec = get_native_codec('datetime')
+    assert codec.read('2024-01-02 03:04:05') == datetime(2024, 1, 2, 3, 4, 5)
+    assert codec.read('2024-01-02 03:04:05.123456') == datetime(2024, 1, 2, 3, 4, 5, 123456)
+
+def test_datetime_stores_microseconds():
+    codec = get_native_codec('datetime')
+    assert codec.write(datetime(2024, 1, 2, 3, 4, 5, 123456)) == '2024-01-02 03:04:05.123456'
+    assert codec.write(datetime(2024, 1, 2, 3, 4, 5)) == '2024-01-02 03:04:05'
+
+def test_date_reads_old_format():
+    codec = get_native_codec('date')
+    assert codec.read('2024-01-02') == date(2024, 1, 2)
+    assert codec.write(date(2024, 1, 2)) == '2024-01-02'
+
+def test_datetime_old_value_in_database(interface):
+    order = interface.create_object('Order', creation_time=datetime(2024, 1, 2, 3, 4, 5, 123456))
+    interface.cursor.execute('UPDATE data_Order SET creation_time = ? WHERE id = ?', ('2024-01-02 03:04:05', order.id))
+    interface.commit()
+    assert interface.get_object(order.id)['creation_time'] == datetime(2024, 1, 2, 3, 4, 5)
@@ -0,0 +1,41 @@
+import pytest
+from control import ObjectList, LazyObjectList
+
+def create_products(interface, n):
+    products = [interface.create_object('Product', name=f'Product {i}') for i in range(n)]
+    interface.commit()
+    return products
+
+@pytest.mark.parametrize('lazy', [False, True])
+def test_object_list_mutation(interface, lazy):
+    products = create_products(interface, 6)
+    objects = interface.get_instances('Product') if lazy else ObjectList(interface, list(interface.get_instances('Product')))
+    assert isinstance(objects, LazyObjectList) == lazy
+    assert len(objects.get_dataframe()) == 6
+    objects[0] = products[5]
+    del objects[1]
+    objects.insert(1, products[0])
+    objects.remove(products[3])
+    assert objects.pop().id == products[5].id
+    objects[1:3] = [products[2]]
+    objects.append(products[1])
+    assert objects.get_ids() == [products[5].id, products[2].id, products[4].id, products[1].id]
+    assert [object_.id for object_ in objects] == objects.get_ids()
+    assert list(objects.get_dataframe()['name']) == ['Product 5', 'Product 2', 'Product 4', 'Product 1']
+
+def test_lazy_object_list_objects_assignment(interface):
+    products = create_products(interface, 3)
+    objects = interface.get_instances('Product')
+    objects.objects = products[1:]
+    assert objects.get_ids() == [products[1].id, products[2].id]
+    assert objects.is_loaded()
+
+def test_lazy_object_list_pages(interface):
+    products = create_products(interface, 5)
+    objects = interface.get_instances('Product')
+    objects.page_size = 2
+    assert objects[3].id == products[3].id
+    assert not objects.is_loaded()
+    assert objects[1:4].get_ids() == [product.id for product in products[1:4]]
+    assert [object_['name'] for object_ in objects] == [f'Product {i}' for i in range(5)]
+    assert objects.is_loaded()
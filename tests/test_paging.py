@@ -0,0 +1,36 @@
+import gui
+from interface import ObjectInterface
+
+def create_products(filename, n):
+    with ObjectInterface(filename) as interface:
+        ids = [interface.create_object('Product', name=f'Product {i}').id for i in range(n)]
+        interface.commit()
+        return ids, interface.get_class('Product').id
+
+def test_instances_page_keyset(filename):
+    ids, _ = create_products(filename, 7)
+    with ObjectInterface(filename) as interface:
+        assert interface.get_instances_page('Product', 3).get_ids() == ids[:3]
+        assert interface.get_instances_page('Product', 3, after_id=ids[2]).get_ids() == ids[3:6]
+        assert interface.get_instances_page('Product', 3, after_id=ids[5]).get_ids() == ids[6:]
+        assert interface.get_instances_page('Product', 3, before_id=ids[5]).get_ids() == ids[2:5]
+        assert interface.get_instances_page('Product', 3, before_id=ids[1]).get_ids() == ids[:1]
+
+def test_instances_page_skips_inactive(filename):
+    ids, _ = create_products(filename, 4)
+    with ObjectInterface(filename) as interface:
+        interface.get_object(ids[1]).deactivate()
+        interface.commit()
+        assert interface.get_instances_page('Product', 2).get_ids() == [ids[0], ids[2]]
+        assert interface.get_instances_page('Product', 4, only_active_objects=False).get_ids() == ids
+
+def test_class_page_links(filename, monkeypatch):
+    ids, class_id = create_products(filename, 5)
+    monkeypatch.setattr(gui, 'FILENAME_DATABASE', filename)
+    monkeypatch.setattr(gui, 'pool', None)
+    monkeypatch.setattr(gui, 'PAGE_SIZE', 2)
+    client = gui.app.test_client()
+    page = client.get(f'/class/{class_id}').get_data(as_text=True)
+    assert f'after={ids[1]}' in page and f'/object/{ids[2]}' not in page
+    page = client.get(f'/class/{class_id}?after={ids[3]}').get_data(as_text=True)
+    assert f'/object/{ids[4]}' in page and f'before={ids[4]}' in page
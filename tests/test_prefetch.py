@@ -0,0 +1,77 @@
+import pytest
+
+def create_orders(interface, n: int = 3):
+    orders = []
+    for i in range(n):
+        order = interface.create_object('Order')
+        order.bind('order_to_positions', [interface.create_object('OrderPosition', amount=i)])
+        orders.append(order)
+    interface.commit()
+    return [order.id for order in orders]
+
+def count_statements(interface, function):
+    statements = []
+    interface.connection.set_trace_callback(lambda sql: statements.append(sql) if not sql.startswith('PRAGMA') else None)
+    try:
+        result = function()
+    finally:
+        interface.connection.set_trace_callback(None)
+    return len(statements), result
+
+def test_prefetch_served_from_memory(interface):
+    ids = create_orders(interface)
+    orders = interface.get_objects(ids, prefetch=['order_to_positions'])
+    n, positions = count_statements(interface, lambda: [order.hop('order_to_positions') for order in orders])
+    assert n == 0
+    assert [len(p) for p in positions] == [1, 1, 1]
+
+def test_prefetch_copied_per_hop(interface):
+    ids = create_orders(interface)
+    order = interface.get_objects(ids, prefetch=['order_to_positions'])[0]
+    order.hop('order_to_positions').append(order)
+    assert len(order.hop('order_to_positions')) == 1
+
+def test_prefetch_invalidated_by_bind(interface):
+    ids = create_orders(interface)
+    order = interface.get_objects(ids, prefetch=['order_to_positions'])[0]
+    position = interface.create_object('OrderPosition', amount=10)
+    interface.get_object(order.id).bind('order_to_positions', [position])
+    interface.commit()
+    assert position.id in [p.id for p in order.hop('order_to_positions')]
+
+def test_prefetch_invalidated_by_modify_and_status(interface):
+    ids = create_orders(interface)
+    order = interface.get_objects(ids, prefetch=['order_to_positions'])[0]
+    position = interface.get_object(order.hop('order_to_positions')[0].id)
+    position.modify(amount=42)
+    interface.commit()
+    assert order.hop('order_to_positions')[0]['amount'] == 42
+    position.deactivate()
+    interface.commit()
+    assert len(order.hop('order_to_positions')) == 0
+    position.activate()
+    interface.commit()
+    assert len(order.hop('order_to_positions')) == 1
+
+def test_prefetch_after_rollback(interface):
+    order = interface.create_object('Order')
+    customers = [interface.create_object('Customer', first_name=name, last_name='B') for name in ('A', 'B')]
+    order.bind('order_to_customer', customers[:1])
+    interface.commit()
+    order.bind('order_to_customer', customers[1:], rebind=True)
+    [order] = interface.get_objects([order.id], prefetch=['order_to_customer'])
+    assert [c.id for c in order.hop('order_to_customer')] == [customers[1].id]
+    interface.rollback()
+    assert [c.id for c in order.hop('order_to_customer')] == [customers[0].id]
+
+def test_prefetch_after_savepoint_rollback(interface):
+    order = interface.create_object('Order')
+    customers = [interface.create_object('Customer', first_name=name, last_name='B') for name in ('A', 'B')]
+    order.bind('order_to_customer', customers[:1])
+    interface.commit()
+    with pytest.raises(KeyError):
+        with interface.__savepoint__('test'):
+            order.bind('order_to_customer', customers[1:], rebind=True)
+            [prefetched_order] = interface.get_objects([order.id], prefetch=['order_to_customer'])
+            raise KeyError('Rolled back')
+    assert [c.id for c in prefetched_order.hop('order_to_customer')] == [customers[0].id]
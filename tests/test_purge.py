@@ -0,0 +1,73 @@
+from datetime import datetime, timedelta
+import pytest
+from constant import CHANGE_PURGE, CHANGE_BIND
+
+def create_positions(interface, n: int) -> list:
+    positions = [interface.create_object('OrderPosition', amount=i) for i in range(n)]
+    interface.commit()
+    return positions
+
+def test_purge_deleted_in_chunks(interface):
+    positions = create_positions(interface, 5)
+    for position in positions[:4]:
+        position.delete()
+    interface.commit()
+    reclaimed = interface.purge(chunk_size=2)
+    assert reclaimed['objects'] == 4
+    assert reclaimed['versions'] == 4
+    assert not interface.connection.in_transaction
+    assert [row[0] for row in interface.cursor.execute('SELECT id FROM data_meta').fetchall()] == [positions[4].id]
+
+def test_purge_stale_objects_in_creation(interface):
+    old = interface.touch('OrderPosition')
+    new = interface.touch('OrderPosition')
+    interface.cursor.execute('UPDATE data_meta SET created = ? WHERE id = ?', (datetime.now() - timedelta(days=2), old.id))
+    interface.commit()
+    assert interface.purge(timedelta(days=1))['objects'] == 1
+    ids = [row[0] for row in interface.cursor.execute('SELECT id FROM data_meta').fetchall()]
+    assert old.id not in ids and new.id in ids
+
+def test_purge_logs_changes(interface):
+    positions = create_positions(interface, 3)
+    for position in positions:
+        position.delete()
+    interface.commit()
+    interface.purge(chunk_size=2)
+    changes, _ = interface.changes_since(0, 1000)
+    assert sorted(change['object_id'] for change in changes if change['kind'] == CHANGE_PURGE) == [p.id for p in positions]
+
+def test_purge_requires_closed_transaction(interface):
+    interface.create_object('OrderPosition', amount=1)
+    with pytest.raises(ValueError):
+        interface.purge()
+
+def test_purge_untraced_reference_bumps_version(interface):
+    order = interface.create_object('Order')
+    positions = create_positions(interface, 2)
+    order.bind('order_to_positions', positions)
+    interface.commit()
+    assert len(order.hop('order_to_positions')) == 2
+    version = interface.get_reference_version('order_to_positions', order)
+    positions[0].delete()
+    interface.commit()
+    reclaimed = interface.purge()
+    assert reclaimed['rebound_origins'] == 1
+    assert interface.get_reference_version('order_to_positions', order) == version + 1
+    assert [p.id for p in interface.hop('order_to_positions', order, only_active_objects=False)] == [positions[1].id]
+    changes, _ = interface.changes_since(0, 1000)
+    assert any(c['kind'] == CHANGE_BIND and c['object_id'] == order.id and c['data']['targets'] == [positions[1].id] for c in changes)
+
+def test_purge_keeps_traced_reference_history(interface):
+    interface.create_reference('customer_to_product', 'Customer', 'Product')
+    interface.commit()
+    interface.clear_cache()
+    customer = interface.create_object('Customer', first_name='A', last_name='B')
+    products = [interface.create_object('Product', name=f'P{i}') for i in range(2)]
+    customer.bind('customer_to_product', products)
+    interface.commit()
+    products[0].delete()
+    interface.commit()
+    interface.purge()
+    n_links = interface.cursor.execute('SELECT COUNT(*) FROM reference_customer_to_product').fetchone()[0]
+    assert n_links == 2
+    assert [p.id for p in interface.hop('customer_to_product', interface.get_object(customer.id), only_active_objects=False)] == [products[1].id]
@@ -0,0 +1,49 @@
+import pytest
+from constant import STATUS_INACTIVE
+
+def test_session_coalesces_modifications(interface):
+    person = interface.create_object('Person', first_name='Anna', last_name='Alt')
+    interface.commit()
+    version = person.current_version
+    with interface.session():
+        person.modify(first_name='Anne')
+        person.modify(last_name='Neu')
+        person.modify(first_name='Anni')
+    person = interface.get_object(person.id)
+    assert person.current_version == version + 1
+    assert (person['first_name'], person['last_name']) == ('Anni', 'Neu')
+
+def test_session_binds_and_statuses(interface):
+    order = interface.create_object('Order')
+    positions = [interface.create_object('OrderPosition', amount=i) for i in range(3)]
+    interface.commit()
+    with interface.session():
+        order.bind('order_to_positions', positions[:1])
+        order.bind('order_to_positions', positions[1:2])
+        positions[2].deactivate()
+    order = interface.get_object(order.id)
+    assert interface.get_reference_version('order_to_positions', order) == 1
+    assert [p.id for p in order.hop('order_to_positions')] == [p.id for p in positions[:2]]
+    assert interface.get_object(positions[2].id).status == STATUS_INACTIVE
+    assert not interface.connection.in_transaction
+
+def test_session_rolled_back_on_error(interface):
+    person = interface.create_object('Person', first_name='Anna', last_name='Alt')
+    interface.commit()
+    with pytest.raises(KeyError):
+        with interface.session():
+            person.modify(first_name='Anne')
+            created = interface.create_object('Person', first_name='Bernd', last_name='Berg')
+            raise KeyError('Abort')
+    assert interface.get_object(person.id)['first_name'] == 'Anna'
+    assert interface.get_object(created.id) is None
+
+def test_session_restrictions(interface):
+    order = interface.create_object('Order')
+    interface.commit()
+    with interface.session():
+        with pytest.raises(ValueError):
+            with interface.session():
+                pass
+        with pytest.raises(ValueError):
+            order.bind('order_to_positions', [], version=0)
@@ -0,0 +1,37 @@
+import pytest
+from ddl import Interpreter
+
+def test_family_tree_not_shared(interface):
+    customer = interface.get_class('Customer')
+    person = interface.get_class('Person')
+    assert [c.name for c in customer.get_family_tree()] == ['Person', 'Customer']
+    assert [c.name for c in person.get_family_tree()] == ['Person']
+    assert [c.name for c in customer.get_family_tree()] == ['Person', 'Customer']
+
+def trace_created_views(interface):
+    statements = []
+    interface.connection.set_trace_callback(lambda statement: statements.append(statement.split(' AS ')[0]) if statement.startswith('CREATE VIEW') else None)
+    return statements
+
+def test_create_class_rebuilds_family_views(interface):
+    statements = trace_created_views(interface)
+    interface.create_class('VipCustomer', parent=interface.get_class('Customer'))
+    assert statements == ['CREATE VIEW view_Person', 'CREATE VIEW view_Customer', 'CREATE VIEW view_VipCustomer']
+    interface.create_attribute('level', 'int')
+    statements.clear()
+    interface.assign_attribute_to_class('Customer', 'level')
+    assert statements == ['CREATE VIEW view_Customer', 'CREATE VIEW view_VipCustomer']
+    interface.connection.set_trace_callback(None)
+    interface.commit()
+    customer = interface.create_object('VipCustomer', first_name='Vera', last_name='Vogel', level=3)
+    interface.cursor.execute('SELECT __object_id__, level FROM view_Person LEFT JOIN view_Customer USING (__object_id__)')
+    assert [tuple(row) for row in interface.cursor.fetchall()] == [(customer.id, 3)]
+
+def test_build_failure_keeps_transaction(interface):
+    person = interface.create_object('Person', first_name='Tom', last_name='Tau')
+    interpreter = Interpreter(interface)
+    with pytest.raises(KeyError):
+        interpreter.build(interpreter.parse('+attributes { broken: missing_datatype }'))
+    assert interface.connection.in_transaction
+    interface.commit()
+    assert interface.get_object(person.id)['first_name'] == 'Tom'
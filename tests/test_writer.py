@@ -0,0 +1,92 @@
+import pickle
+import sqlite3
+from threading import Thread, Timer
+import pytest
+from control import ConflictError
+from interface import ObjectInterface
+from writer import Operation, WriterService, WriterServer, WriterClient
+
+AUTHKEY = b'test'
+
+@pytest.fixture
+def client(filename):
+    service = WriterService(filename).start()
+    server = WriterServer(service, ('localhost', 0), AUTHKEY)
+    Thread(target=server.serve_forever, daemon=True).start()
+    with WriterClient(server.listener.address, AUTHKEY) as client:
+        yield client
+    service.stop()
+
+def test_conflict_error_pickle():
+    error = pickle.loads(pickle.dumps(ConflictError('Conflict', [1, 2])))
+    assert isinstance(error, ConflictError)
+    assert str(error) == 'Conflict'
+    assert error.ids == [1, 2]
+
+def test_writer_client_conflict(client):
+    order_id = client.create_object('Order')
+    customer_ids = [client.create_object('Customer', first_name='A', last_name='B') for _ in range(2)]
+    client.bind('order_to_customer', order_id, customer_ids[:1], version=0)
+    with pytest.raises(ConflictError) as info:
+        client.bind('order_to_customer', order_id, customer_ids[1:], rebind=True, version=0)
+    assert info.value.ids == [order_id]
+
+def test_writer_authkey(filename, monkeypatch):
+    monkeypatch.delenv('ODAI_WRITER_AUTHKEY', raising=False)
+    service = WriterService(filename).start()
+    server = WriterServer(service, ('localhost', 0))
+    Thread(target=server.serve_forever, daemon=True).start()
+    assert len(server.authkey) == 32 and server.authkey != AUTHKEY
+    with pytest.raises(KeyError):
+        WriterClient(server.listener.address)
+    with WriterClient(server.listener.address, server.authkey) as client:
+        assert client.create_object('Order') > 0
+    service.stop()
+
+def test_writer_client_versions(client):
+    order_id = client.create_object('Order')
+    position_id = client.create_object('OrderPosition', amount=1)
+    version = client.modify(position_id, amount=2)
+    with pytest.raises(ConflictError):
+        client.modify(position_id, expected_version=version - 1, amount=3)
+    assert client.modify(position_id, expected_version=version, amount=3) == version + 1
+    with pytest.raises(ConflictError):
+        client.bind_many('order_to_positions', {order_id: [position_id]}, versions={order_id: 1})
+    client.bind_many('order_to_positions', {order_id: [position_id]}, versions={order_id: 0})
+
+def create_operations(names):
+    return [Operation('create_object', ('Product',), {'name': name}) for name in names]
+
+def test_writer_batch_retried_while_locked(filename):
+    lock = sqlite3.connect(filename, check_same_thread=False)
+    lock.execute('BEGIN IMMEDIATE')
+    Timer(0.3, lock.rollback).start()
+    batch = create_operations(['Pen', 'Pad'])
+    with ObjectInterface(filename) as interface:
+        interface.cursor.execute('PRAGMA busy_timeout = 0')
+        WriterService(filename, retry_timeout=5).execute_batch(interface, batch)
+        ids = [operation.future.result(0) for operation in batch]
+        assert [interface.get_object(id)['name'] for id in ids] == ['Pen', 'Pad']
+    lock.close()
+
+def test_writer_batch_retry_timeout(filename):
+    lock = sqlite3.connect(filename, check_same_thread=False)
+    lock.execute('BEGIN IMMEDIATE')
+    batch = create_operations(['Pen'])
+    with ObjectInterface(filename) as interface:
+        interface.cursor.execute('PRAGMA busy_timeout = 0')
+        WriterService(filename, retry_timeout=0.2).execute_batch(interface, batch)
+    with pytest.raises(sqlite3.OperationalError):
+        batch[0].future.result(0)
+    lock.close()
+
+def test_writer_aborted_operation_fails_alone(filename):
+    batch = create_operations(['Pen', 'Rejected', 'Pad'])
+    with ObjectInterface(filename) as interface:
+        interface.cursor.execute("CREATE TEMP TRIGGER reject_product BEFORE INSERT ON data_Product WHEN NEW.name = 'Rejected' BEGIN SELECT RAISE(ROLLBACK, 'Rejected'); END")
+        WriterService(filename).execute_batch(interface, batch)
+        with pytest.raises(sqlite3.IntegrityError):
+            batch[1].future.result(0)
+        ids = [batch[0].future.result(0), batch[2].future.result(0)]
+        assert [interface.get_object(id)['name'] for id in ids] == ['Pen', 'Pad']
+        assert interface.count_instances('Product') == 2
@@ -3,7 +3,10 @@ from decimal import Decimal
 import math
 import numpy as np
 from io import BytesIO
-from functools import wraps
+import struct
+import base64
+from functools import wraps, cache, update_wrapper
+from cache import CacheInfo
 from time import time
 
 def display_datetime(dt: datetime | str):
@@ -20,9 +23,83 @@ def get_data_table_name(class_name: str) -> str:
 def get_reference_table_name(reference_name: str) -> str:
     return f"reference_{reference_name}"
 
+def get_view_name(class_name: str) -> str:
+    return f"view_{class_name}"
+
+def get_search_table_name(class_name: str) -> str:
+    return f"search_{class_name}"
+
 def get_index_name(table_name: str, column_name: str) -> str:
     return f"idx_{table_name}_{column_name}"
 
+def get_reference_table_statements(reference_name: str) -> list:
+    """ Returns the statements creating the table of a reference and its index for hops (origin and version) """
+    table_name = get_reference_table_name(reference_name)
+    return [
+        f"CREATE TABLE {table_name} (origin_id INTEGER REFERENCES data_meta(id), target_id INTEGER REFERENCES data_meta(id), version INTEGER, created DATETIME DEFAULT CURRENT_TIMESTAMP, PRIMARY KEY(origin_id, target_id, version))",
+        f"CREATE INDEX {get_index_name(table_name, 'origin_version')} ON {table_name}(origin_id, version, target_id)"
+    ]
+
+class InstanceCacheState:
+    """ Results and statistics of a cached method of one instance """
+    __slots__ = ('results', 'hits', 'misses')
+
+    def __init__(self) -> None:
+        self.results = {}
+        self.hits = 0
+        self.misses = 0
+
+class BoundInstanceCache:
+    """ Cached method bound to an instance, created on each access so that the instance only stores the results (no reference cycle through a bound method) """
+    __slots__ = ('function', 'instance', 'state')
+
+    def __init__(self, function, instance, state: InstanceCacheState) -> None:
+        self.function = function
+        self.instance = instance
+        self.state = state
+
+    def __call__(self, *args, **kwargs):
+        key = (args, tuple(kwargs.items())) if kwargs else args
+        try:
+            result = self.state.results[key]
+        except KeyError:
+            self.state.misses += 1
+            result = self.state.results[key] = self.function(self.instance, *args, **kwargs)
+            return result
+        self.state.hits += 1
+        return result
+
+    def cache_clear(self):
+        self.state.results.clear()
+        self.state.hits = 0
+        self.state.misses = 0
+
+    def cache_info(self) -> CacheInfo:
+        return CacheInfo(self.state.hits, self.state.misses, None, len(self.state.results))
+
+class instance_cache:
+    """ Caches the results of a method like functools.cache, but with one cache per instance: cache_clear and cache_info only concern the instance """
+    def __init__(self, function) -> None:
+        self.function = function
+        self.state_name = f'__{function.__name__}_cache__'
+        update_wrapper(self, function)
+
+    def __set_name__(self, owner, name: str):
+        self.state_name = f'__{name}_cache__'
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        state = instance.__dict__.get(self.state_name)
+        if state is None:
+            state = instance.__dict__[self.state_name] = InstanceCacheState()
+        return BoundInstanceCache(self.function, instance, state)
+
+@cache
+def get_in_condition(count: int) -> str:
+    """ Returns the condition comparing a column with the given number of parameters """
+    return '= ?' if count == 1 else f"IN ({', '.join(['?'] * count)})"
+
 def create_condition(key: int | str):
     if isinstance(key, int):
         return 'id = ?', (key,)
@@ -40,8 +117,9 @@ def get_filled_parameter_name(**parameters):
 def print_table(rows: list):
     """ Prints a list of dictionaries with equal keys as table """
     if len(rows) > 0:
-        headers = rows[0].keys()
+        headers = list(rows[0].keys())
         n_cols = len(headers)
+        rows = [[row[header] for header in headers] for row in rows]
         max_length = list(map(lambda col: max(max(map(lambda row: len(str(rows[row][col])), range(len(rows)))), len(headers[col])), range(n_cols)))
         table_rows = [' | '.join(map(lambda i: headers[i].ljust(max_length[i]), range(n_cols)))]
         table_rows.append(''.ljust(len(table_rows[0]), '-'))
@@ -61,6 +139,11 @@ def remove_duplicates(objects: list):
             unique_objects.append(obj)
     return unique_objects
 
+def chunk_list(items: list, size: int):
+    """ Splits the given list into consecutive chunks with the given maximum size """
+    for start in range(0, len(items), size):
+        yield items[start: start + size]
+
 def measure_runtime(func):
     @wraps(func)
     def wrapper_func(*args, **kwargs):
@@ -99,6 +182,64 @@ def bytes_to_array(bytes_: bytes) -> np.array:
     buffer = BytesIO(bytes_)
     return np.load(buffer, allow_pickle=True)
 
+ARRAY_HEADER_LENGTH_FORMAT = '<H'
+ARRAY_HEADER_LENGTH_SIZE = struct.calcsize(ARRAY_HEADER_LENGTH_FORMAT)
+
+def pack_array(array: np.ndarray) -> bytes:
+    """ Packs an array as compact header (dtype and shape) followed by the raw C-ordered buffer """
+    array = np.asarray(array)
+    if not array.flags.c_contiguous:
+        array = array.copy(order='C')
+    if array.dtype.hasobject:
+        raise ValueError('Arrays with object dtype can not be packed')
+    header = f"{array.dtype.str};{','.join(str(n) for n in array.shape)}".encode('ascii')
+    return b''.join([struct.pack(ARRAY_HEADER_LENGTH_FORMAT, len(header)), header, array.reshape(-1).view(np.uint8)])
+
+def parse_array_header(header: bytes) -> tuple:
+    """ Returns dtype and shape of a packed array header (without the length prefix) """
+    str_dtype, str_shape = header.decode('ascii').split(';')
+    return np.dtype(str_dtype), tuple(int(n) for n in str_shape.split(',') if len(n) > 0)
+
+def unpack_array(bytes_: bytes) -> np.ndarray:
+    """ Unpacks a packed array without copying the buffer (the returned array is read-only) """
+    header_length, = struct.unpack_from(ARRAY_HEADER_LENGTH_FORMAT, bytes_)
+    offset = ARRAY_HEADER_LENGTH_SIZE + header_length
+    dtype, shape = parse_array_header(bytes_[ARRAY_HEADER_LENGTH_SIZE: offset])
+    return np.frombuffer(bytes_, dtype, offset=offset).reshape(shape)
+
+def encode_change_value(value):
+    """ Returns a JSON compatible representation of a raw attribute value (bytes are base64 encoded) """
+    if isinstance(value, bytes):
+        return {'base64': base64.b64encode(value).decode('ascii')}
+    return value
+
+def decode_change_value(value):
+    """ Returns the raw attribute value of a value of the change feed """
+    if isinstance(value, dict) and 'base64' in value:
+        return base64.b64decode(value['base64'])
+    return value
+
+def encode_export_value(value, binary: bool = False):
+    """ Returns a lossless JSON compatible representation of an exported value: arrays with dtype, shape and data, bytes base64 encoded (kept if binary) """
+    if isinstance(value, (np.ndarray, np.generic)):
+        array = np.ascontiguousarray(value)
+        if array.dtype.hasobject:
+            raise ValueError('Arrays with object dtype can not be exported')
+        data = array.tobytes()
+        return {'dtype': array.dtype.str, 'shape': list(array.shape), 'data': data if binary else base64.b64encode(data).decode('ascii')}
+    elif isinstance(value, (bytes, bytearray, memoryview)):
+        return bytes(value) if binary else {'base64': base64.b64encode(value).decode('ascii')}
+    return value
+
+def decode_export_value(value):
+    """ Returns the array or bytes of an exported value (inverse of encode_export_value) """
+    if isinstance(value, dict) and 'dtype' in value:
+        data = value['data'] if isinstance(value['data'], bytes) else base64.b64decode(value['data'])
+        return np.frombuffer(data, np.dtype(value['dtype'])).reshape(value['shape'])
+    elif isinstance(value, dict) and 'base64' in value:
+        return base64.b64decode(value['base64'])
+    return value
+
 def bool_to_int(value: bool) -> int:
     if value:
         return 1
@@ -0,0 +1,269 @@
+import sys
+import os
+import logging
+import secrets
+import sqlite3
+from queue import Queue, Empty
+from threading import Thread
+from concurrent.futures import Future
+from multiprocessing.connection import Listener, Client
+from time import monotonic, sleep
+from interface import ObjectInterface, ConflictError
+from constant import WRITER_MAX_BATCH_SIZE, WRITER_MAX_DELAY, WRITER_RETRY_TIMEOUT, WRITER_RETRY_DELAY
+
+WRITER_ADDRESS = ('localhost', 6001)
+WRITER_AUTHKEY_VARIABLE = 'ODAI_WRITER_AUTHKEY'
+WRITER_BACKLOG = 64
+
+class Operation:
+    """ Write operation submitted to the writer service. Objects are addressed by id, classes and references by id or name. """
+    def __init__(self, name: str, args: tuple, kwargs: dict) -> None:
+        self.name = name
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()
+
+    def get_object_ids(self) -> list:
+        """ Returns the ids of the objects the operation works on """
+        if self.name in ('modify', 'activate', 'deactivate', 'delete'):
+            return [self.args[0]]
+        elif self.name == 'bind':
+            return [self.args[1], *self.args[2]]
+        return []
+
+class AbortedOperation(Exception):
+    """ Raised when an operation aborted the transaction of its batch (e.g. by a RAISE(ROLLBACK) trigger or a full disk) """
+    def __init__(self, operation: Operation, exception: Exception) -> None:
+        super().__init__(str(exception))
+        self.operation = operation
+        self.exception = exception
+
+class WriterService:
+    """ Owns the write connection of a database: operations of all producers are queued and executed by one thread in batched transactions (group commit).
+    Every operation runs in its own savepoint, so a failing operation does not affect the others of its batch. Results are returned after the commit. """
+    OPERATIONS = ('create_object', 'modify', 'bind', 'bind_many', 'activate', 'deactivate', 'delete')
+
+    def __init__(self, filename: str, max_batch_size: int = WRITER_MAX_BATCH_SIZE, max_delay: float = WRITER_MAX_DELAY, retry_timeout: float = WRITER_RETRY_TIMEOUT) -> None:
+        self.filename = filename
+        self.max_batch_size = max_batch_size
+        self.max_delay = max_delay
+        self.retry_timeout = retry_timeout
+        self.queue = Queue()
+        self.thread = None
+        self.batches = 0
+        self.operations = 0
+
+    def start(self):
+        self.thread = Thread(target=self.run, name='odai-writer', daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        """ Executes the queued operations and stops the service """
+        self.queue.put(None)
+        self.thread.join()
+
+    def submit(self, operation_name: str, /, *args, **kwargs) -> Future:
+        """ Queues a write operation and returns a future of its result """
+        if operation_name not in self.OPERATIONS:
+            raise KeyError(f'Invalid operation {operation_name}')
+        operation = Operation(operation_name, args, kwargs)
+        self.queue.put(operation)
+        return operation.future
+
+    def execute(self, operation_name: str, /, *args, **kwargs):
+        """ Queues a write operation and waits for its result """
+        return self.submit(operation_name, *args, **kwargs).result()
+
+    def run(self):
+        with ObjectInterface(self.filename) as interface:
+            stopped = False
+            while not stopped:
+                batch = [self.queue.get()]
+
+                # Collect further operations until the batch is full or the delay has passed
+                deadline = monotonic() + self.max_delay
+                while batch[-1] is not None and len(batch) < self.max_batch_size:
+                    try:
+                        batch.append(self.queue.get(timeout=max(0, deadline - monotonic())))
+                    except Empty:
+                        break
+                if batch[-1] is None:
+                    stopped = True
+                    batch.pop()
+                if len(batch) > 0:
+                    self.execute_batch(interface, batch)
+
+    def execute_batch(self, interface: ObjectInterface, batch: list):
+        """ Executes the operations in one transaction and resolves their futures after the commit.
+        Operational errors of the transaction (e.g. a locked database) are retried until the retry timeout, an operation aborting the transaction fails alone and the others are retried. """
+        deadline = monotonic() + self.retry_timeout
+        while len(batch) > 0:
+            try:
+                results = self.execute_transaction(interface, batch)
+            except AbortedOperation as aborted:
+                interface.rollback()
+                interface.clear_object_cache()
+                aborted.operation.future.set_exception(aborted.exception)
+                batch = [operation for operation in batch if operation is not aborted.operation]
+                continue
+            except Exception as exception:
+                if interface.connection.in_transaction:
+                    interface.rollback()
+                interface.clear_object_cache()
+                if isinstance(exception, sqlite3.OperationalError) and monotonic() < deadline:
+                    logging.warning(f'Writer batch of {len(batch)} operations failed ({exception}), retrying')
+                    sleep(WRITER_RETRY_DELAY)
+                    continue
+                for operation in batch:
+                    operation.future.set_exception(exception)
+                return
+            self.batches += 1
+            self.operations += len(batch)
+            for operation, result, exception in results:
+                if exception is not None:
+                    operation.future.set_exception(exception)
+                else:
+                    operation.future.set_result(result)
+            return
+
+    def execute_transaction(self, interface: ObjectInterface, batch: list) -> list:
+        """ Executes the operations in one committed transaction and returns the result or exception of each operation """
+        results = []
+        interface.cursor.execute('BEGIN IMMEDIATE')
+        object_ids = list(dict.fromkeys(id for operation in batch for id in operation.get_object_ids()))
+        objects = {object_.id: object_ for object_ in interface.get_objects(object_ids, attribute_names=[])}
+        for operation in batch:
+            interface.cursor.execute('SAVEPOINT operation')
+            try:
+                results.append((operation, self.execute_operation(interface, objects, operation), None))
+                interface.cursor.execute('RELEASE operation')
+            except Exception as exception:
+                if not interface.connection.in_transaction:
+                    raise AbortedOperation(operation, exception) from exception
+                interface.cursor.execute('ROLLBACK TO operation')
+                interface.cursor.execute('RELEASE operation')
+                results.append((operation, None, exception))
+
+                # Reread the objects, their versions in memory may be ahead of the rolled back state
+                objects.update({object_.id: object_ for object_ in interface.get_objects(operation.get_object_ids(), attribute_names=[])})
+        interface.commit()
+        return results
+
+    def execute_operation(self, interface: ObjectInterface, objects: dict, operation: Operation):
+        args, kwargs = operation.args, dict(operation.kwargs)
+        if operation.name == 'create_object':
+            return interface.create_object(args[0], **kwargs).id
+        elif operation.name == 'bind_many':
+            missing_ids = [id for origin_id, target_ids in args[1].items() for id in [origin_id, *target_ids] if id not in objects]
+            objects.update({object_.id: object_ for object_ in interface.get_objects(missing_ids, attribute_names=[])})
+            versions = kwargs.get('versions')
+            interface.bind_many(args[0], {self.get_object(objects, origin_id): [self.get_object(objects, id) for id in target_ids] for origin_id, target_ids in args[1].items()}, kwargs.get('rebind', False), {self.get_object(objects, origin_id): version for origin_id, version in versions.items()} if versions else None)
+            return None
+        elif operation.name == 'bind':
+            interface.bind(args[0], self.get_object(objects, args[1]), [self.get_object(objects, id) for id in args[2]], kwargs.get('rebind', False), kwargs.get('version'))
+            return None
+        object_ = self.get_object(objects, args[0])
+        if operation.name == 'modify':
+            expected_version = kwargs.pop('expected_version', None)
+            if expected_version is not None and expected_version != object_.current_version:
+                raise ConflictError(f'Object {object_.id} was modified concurrently (expected version {expected_version})', [object_.id])
+            return interface.modify(object_, **kwargs).version
+        getattr(interface, operation.name)(object_)
+        return None
+
+    def get_object(self, objects: dict, id: int):
+        if id not in objects:
+            raise KeyError(f'Invalid object {id}')
+        return objects[id]
+
+def get_writer_authkey() -> bytes:
+    """ Returns the authentication key of the writer server given by the environment (None if not set) """
+    authkey = os.environ.get(WRITER_AUTHKEY_VARIABLE)
+    return authkey.encode() if authkey else None
+
+class WriterServer:
+    """ Makes a writer service available to other processes (multiprocessing connection, one thread per client).
+    The connection unpickles the received operations, so the authentication key is required: it is taken from the environment or generated and logged. """
+    def __init__(self, service: WriterService, address: tuple = WRITER_ADDRESS, authkey: bytes = None) -> None:
+        self.service = service
+        self.authkey = authkey or get_writer_authkey()
+        if self.authkey is None:
+            self.authkey = secrets.token_hex(16).encode()
+            logging.warning(f'{WRITER_AUTHKEY_VARIABLE} not set, generated the key {self.authkey.decode()} for the clients')
+        self.listener = Listener(address, backlog=WRITER_BACKLOG, authkey=self.authkey)
+
+    def serve_forever(self):
+        logging.info(f'Writer service listening on {self.listener.address}')
+        while True:
+            connection = self.listener.accept()
+            Thread(target=self.serve, args=(connection,), daemon=True).start()
+
+    def serve(self, connection):
+        with connection:
+            while True:
+                try:
+                    operation_name, args, kwargs = connection.recv()
+                except EOFError:
+                    return
+                try:
+                    connection.send((True, self.service.execute(operation_name, *args, **kwargs)))
+                except Exception as exception:
+                    connection.send((False, exception))
+
+class WriterClient:
+    """ Client of a writer server, the operations block until their batch is committed """
+    def __init__(self, address: tuple = WRITER_ADDRESS, authkey: bytes = None) -> None:
+        authkey = authkey or get_writer_authkey()
+        if authkey is None:
+            raise KeyError(f'Authentication key of the writer server required ({WRITER_AUTHKEY_VARIABLE})')
+        self.connection = Client(address, authkey=authkey)
+
+    def execute(self, operation_name: str, /, *args, **kwargs):
+        self.connection.send((operation_name, args, kwargs))
+        success, result = self.connection.recv()
+        if not success:
+            raise result
+        return result
+
+    def create_object(self, class_: int | str, **attributes) -> int:
+        """ Creates an object and returns its id """
+        return self.execute('create_object', class_, **attributes)
+
+    def modify(self, object_id: int, expected_version: int = None, **attributes) -> int:
+        """ Modifies an object and returns its new version, a ConflictError is raised if the expected version is outdated """
+        return self.execute('modify', object_id, expected_version=expected_version, **attributes)
+
+    def bind(self, reference: int | str, origin_id: int, target_ids: list, rebind: bool = False, version: int = None):
+        """ Binds the targets to the origin, a ConflictError is raised if the given version of the binding is outdated """
+        self.execute('bind', reference, origin_id, target_ids, rebind=rebind, version=version)
+
+    def bind_many(self, reference: int | str, bindings: dict, rebind: bool = False, versions: dict = None):
+        """ Binds the target ids to their origin ids ({origin_id: target_ids}), a ConflictError is raised if one of the given versions ({origin_id: version}) is outdated """
+        self.execute('bind_many', reference, bindings, rebind=rebind, versions=versions)
+
+    def activate(self, object_id: int):
+        self.execute('activate', object_id)
+
+    def deactivate(self, object_id: int):
+        self.execute('deactivate', object_id)
+
+    def delete(self, object_id: int):
+        self.execute('delete', object_id)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, exception_traceback):
+        self.close()
+
+if __name__ == '__main__':
+    logging.basicConfig(format='[%(asctime)s] %(levelname)s: %(message)s', datefmt='%Y-%m-%d %H:%M:%S', level=logging.INFO)
+    if len(sys.argv) < 2:
+        print('Usage: python writer.py <database> [<host>:<port>]')
+        sys.exit(1)
+    host, port = sys.argv[2].split(':') if len(sys.argv) > 2 else WRITER_ADDRESS
+    WriterServer(WriterService(sys.argv[1]).start(), (host, int(port))).serve_forever()